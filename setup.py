@@ -16,6 +16,8 @@ import adl2pydm as package
 __entry_points__  = {
     'console_scripts': [
         'adl2pydm = adl2pydm.cli:main',
+        'adl2pydm-index = adl2pydm.pv_index:main',
+        'adl2pydm-client = adl2pydm.client:main',
         ],
     #'gui_scripts': [],
 }
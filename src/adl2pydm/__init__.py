@@ -17,10 +17,6 @@ __python_version_required__ = ">=2.7"
 __package_name__ = __project__
 __long_description__ = __description__
 
-from ._requirements import learn_requirements
-__install_requires__ = learn_requirements()
-del learn_requirements
-
 __classifiers__ = [
     'Development Status :: 5 - Production/Stable',
     'Environment :: Console',
@@ -48,6 +44,21 @@ __classifiers__ = [
     'Topic :: Utilities',
 ]
 
-from ._version import get_versions
-__version__ = get_versions()['version']
-del get_versions
+
+def __getattr__(name):
+    """
+    package metadata that is slow to learn, learned when first used
+
+    (versioneer may run git, the requirements are read from a file:
+    importing the package should not pay for either.)
+    """
+    if name == "__version__":
+        from ._version import get_versions
+        value = get_versions()['version']
+    elif name == "__install_requires__":
+        from ._requirements import learn_requirements
+        value = learn_requirements()
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value     # learned once
+    return value
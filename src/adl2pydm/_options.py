@@ -0,0 +1,39 @@
+"""
+command line options shared by the adl2pydm tools
+
+Only rely on packages in the standard Python distribution.
+(Kept apart from :mod:`adl2pydm.cli` so every tool can use them
+without importing the converter.)
+"""
+
+import argparse
+
+
+class VersionAction(argparse.Action):
+    """
+    print the version and exit, like ``action='version'``
+
+    The version is learned only when asked for, so parsing the
+    command line does not run versioneer (which may run git).
+    """
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, help=None):
+        argparse.Action.__init__(
+            self, option_strings, dest, nargs=0, default=argparse.SUPPRESS,
+            help=help or "show program's version number and exit")
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        import adl2pydm
+        print(adl2pydm.__version__)
+        parser.exit()
+
+
+def positiveInt(text):
+    """argparse *type*: an int of 1 or more"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an integer: {text!r}")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be 1 or more, not {value}")
+    return value
@@ -34,8 +34,10 @@ parent GUI widget.
 from collections import namedtuple, OrderedDict
 import logging
 import os
+import sys
 
 from . import symbols
+from .geometry import Geometry, Point, PointArray
 
 
 logger = logging.getLogger(__name__)
@@ -43,15 +45,23 @@ logger = logging.getLogger(__name__)
 """a color used in MEDM"""
 Color = namedtuple('Color', 'r g b')
 
-"""MEDM's object block contains the widget geometry"""
-Geometry = namedtuple('Geometry', 'x y width height')
-
-"""MEDM's points item: points = [Point]"""
-Point = namedtuple('Point', 'x y')
-
 # Internally the angles are specified in integer 1/64-degree units.
 MEDM_DEGREE_UNITS = 64.0
 
+# Colors and color tables are interned (one copy per process):
+# almost all screens use the same color map.
+_colors_ = {}           # (r, g, b): Color
+_color_tables_ = {}     # text of "colors" block: [Color]
+
+
+def internColor(r, g, b):
+    """the one Color with these RGB values"""
+    key = (r, g, b)
+    color = _colors_.get(key)
+    if color is None:
+        color = _colors_[key] = Color(r, g, b)
+    return color
+
 
 def deg_to_adl(deg):
     """
@@ -94,54 +104,69 @@ def adl_to_deg(deg):
 
 
 class Block(object):
-    """ADL file block structure"""
+    """
+    ADL file block structure
+
+    *start* and *end* are the line numbers of the opening and
+    closing lines of the block.  *buf* holds the lines, starting
+    with line number *offset*.  When built by
+    :meth:`MedmBaseWidget.locateBlockTree`, the block also holds
+    its own *assignments* and its nested *blocks*.
+    """
+
+    __slots__ = (
+        "start", "end", "level", "symbol", "buf", "offset",
+        "assignments", "blocks",
+    )
     
-    def __init__(self, start, end, level, symbol):
+    def __init__(self, start, end, level, symbol, buf=None, offset=0):
         self.start = start
         self.end = end
         self.level = level
         self.symbol = symbol
+        self.buf = buf
+        self.offset = offset
+        self.assignments = OrderedDict()
+        self.blocks = []
     
     def __str__(self):
         fmt = "Block: %d:%d:%d %s"
         return fmt % (self.level, self.start, self.end, str(self.symbol))
 
+    @property
+    def lines(self):
+        """the lines of text inside this block"""
+        return self.buf[self.start+1-self.offset:self.end-self.offset]
+
+    @property
+    def text(self):
+        """the text inside this block, as a single string"""
+        return "".join(self.lines)
+
 
 class MedmBaseWidget(object):
+    """
+    common parts of all MEDM widgets
+
+    Widgets use ``__slots__`` to keep the parsed tree of a large
+    screen small.  The table of widget handlers
+    (``medm_widget_handlers``, by symbol) is shared by all widgets.
+    """
+
+    __slots__ = (
+        "adl_line", "background_color", "color", "contents", "geometry",
+        "line_offset", "main", "points", "symbol", "title",
+    )
+    medm_widget_handlers = {}       # defined after the widget classes
     
     def __init__(self):
+        self.adl_line = 0       # line in the .adl file where the block starts
         self.background_color = None
         self.color = None
         self.geometry = None
         self.line_offset = 0
         self.symbol = None
         self.title = None
-        self.medm_widget_handlers = {
-            "arc" : MedmArcWidget,
-            "bar" : MedmBarWidget,
-            "byte" : MedmByteWidget,
-            "cartesian plot" : MedmCartesianPlotWidget,
-            "choice button" : MedmChoiceButtonWidget,
-            "composite" : MedmCompositeWidget,
-            "embedded display" : MedmEmbeddedDisplayWidget,
-            "image" : MedmImageWidget,
-            "indicator" : MedmIndicatorWidget,
-            "menu" : MedmMenuWidget,
-            "message button" : MedmMessageButtonWidget,
-            "meter" : MedmMeterWidget,
-            "oval" : MedmOvalWidget,
-            "polygon" : MedmPolygonWidget,
-            "polyline" : MedmPolylineWidget,
-            "rectangle" : MedmRectangleWidget,
-            "related display" : MedmRelatedDisplayWidget,
-            "shell command" : MedmShellCommandWidget,
-            "strip chart" : MedmStripChartWidget,
-            "text" : MedmTextWidget,
-            "text entry" : MedmTextEntryWidget,
-            "text update" : MedmTextUpdateWidget,
-            "valuator" : MedmValuatorWidget,
-            "wheel switch" : MedmWheelSwitchWidget,
-            }
     
     def __str__(self):
         fmt = "Widget(%s)"
@@ -199,11 +224,79 @@ class MedmBaseWidget(object):
                     block.end = line
                     blocks.append(block)
         return blocks
+
+    def locateBlockTree(self, buf):
+        """
+        identify all blocks and assignments in the buffer in a single pass
+
+        Returns a root :class:`Block` that spans the entire buffer.
+        Each block holds the assignments at its own nesting level
+        and the list of its nested blocks, all with line numbers
+        relative to the start of *buf*.
+        """
+        root = Block(-1, len(buf), -1, None, buf)
+        for item in self.iterBlockTree(buf, buf):
+            if isinstance(item, Block):
+                root.blocks.append(item)
+            else:
+                key, value = item
+                root.assignments[key] = value
+        return root
+
+    def iterBlockTree(self, lines, buf=None):
+        """
+        identify all blocks and assignments, one line at a time
+
+        Yields each top-level :class:`Block` (with its nested blocks
+        and assignments) as soon as it closes, and each top-level
+        assignment as a ``(key, value)`` tuple.
+
+        *lines* may be any iterable of lines, such as a file object.
+        If *buf* (the list of all the lines) is given, the blocks
+        refer to it.  Otherwise, each top-level block keeps a list
+        of its own lines, so no list of all the lines is needed.
+        """
+        stack = []
+        block_buf, offset = buf, 0
+        for line, text in enumerate(lines):
+            if buf is None and len(stack) > 0:
+                block_buf.append(text)
+            stripped = text.rstrip()
+            if stripped.endswith(" {"):
+                if buf is None and len(stack) == 0:
+                    block_buf, offset = [text], line
+                symbol = stripped.lstrip()[:-2]
+                block = Block(
+                    line, None, len(stack), sys.intern(symbol.strip('"')),
+                    block_buf, offset)
+                stack.append(block)
+            elif stripped.endswith("}"):
+                if len(stack) > 0:
+                    block = stack.pop()
+                    block.end = line
+                    if len(stack) > 0:
+                        stack[-1].blocks.append(block)
+                    else:
+                        yield block
+            else:
+                p = text.find("=")
+                if p > 0:
+                    key = sys.intern(text[:p].strip().strip('"'))
+                    value = text[p+1:].strip().strip('"')
+                    # TODO: look for parentheses
+                    if len(stack) > 0:
+                        stack[-1].assignments[key] = value
+                    else:
+                        yield key, value
     
-    def parseAdlBuffer(self, buf):              # lgtm [py/similar-function]
+    def parseAdlBuffer(self, buf):
+        """parse the buffer of lines from an .adl file"""
+        return self.parseAdlBlock(self.locateBlockTree(buf))
+    
+    def parseAdlBlock(self, node):              # lgtm [py/similar-function]
         """generic handling, override as needed"""
-        assignments = self.locateAssignments(buf)
-        blocks = self.locateBlocks(buf)
+        assignments = OrderedDict(node.assignments)
+        blocks = list(node.blocks)
 
         # assign certain items in named attributes
         assignments = self.parseColorAssignments(assignments)
@@ -211,7 +304,7 @@ class MedmBaseWidget(object):
         # all widget blocks have an "object"
         block = self.getNamedBlock("object", blocks)
         if block is not None:
-            self.geometry = self.parseObjectBlock(buf[block.start+1:block.end])
+            self.geometry = self.parseObjectBlock(block)
             
             # remove that block
             for i, b in enumerate(blocks):
@@ -229,19 +322,19 @@ class MedmBaseWidget(object):
         # stash remaining contents
         contents = dict(**assignments)
         for block in blocks:            # TODO: improve
-            contents[block.symbol] = "".join(buf[block.start+1:block.end])
+            contents[block.symbol] = block.text
         self.contents = contents
 
         limits = self.contents.get("limits", "").strip()
         if len(limits) > 0:
-            for line in self.contents.pop("limits").splitlines():
-                k, v = line.strip().split("=")
-                self.contents[k] = v.strip('"')
+            self.contents.pop("limits")
+            block = self.getNamedBlock("limits", blocks)
+            self.contents.update(block.assignments)
 
         for symbol in ("basic attribute", "dynamic attribute", "control", "monitor", "param"):
             block = self.getNamedBlock(symbol, blocks)
             if block is not None:
-                aa = self.locateAssignments(buf[block.start+1:block.end])
+                aa = OrderedDict(block.assignments)
                 aa = self.parseColorAssignments(aa)
                 self.contents[symbol] = aa
 
@@ -252,23 +345,31 @@ class MedmBaseWidget(object):
 
         block = self.getNamedBlock("points", blocks)
         if block is not None:
-            points = []
-            for pair in buf[block.start+1:block.end]:
+            points = PointArray()
+            for pair in block.lines:
                 x, y = map(int, pair.replace("(", "").replace(")", "").split(","))
-                points.append(Point(x, y))
+                points.append(x, y)
             self.points = points
             if "points" in self.contents:
                 del self.contents["points"]
 
         return assignments, blocks
     
-    def parseChildren(self, main, blocks, buf):
+    def parseChildren(self, main, blocks, first_line=0):
+        """
+        create and parse a widget for each widget block
+
+        *first_line* is the line number (in the buffer) that
+        corresponds to this widget's *line_offset*
+        """
         for block in blocks:
             if block.symbol in symbols.adl_widgets:
-                logger.debug("(#%d) %s" % (self.line_offset+block.start, block.symbol))
+                line = self.line_offset + block.start - first_line
+                logger.debug("(#%d) %s" % (line, block.symbol))
                 handler = self.medm_widget_handlers.get(block.symbol, MedmGenericWidget)
-                widget = handler(self.line_offset+block.start, main, block.symbol)
-                widget.parseAdlBuffer(buf[block.start+1:block.end])
+                widget = handler(line, main, block.symbol)
+                widget.adl_line = block.start + 1   # also in composites
+                widget.parseAdlBlock(block)
                 self.widgets.append(widget)
     
     def parseColorAssignments(self, assignments):
@@ -289,21 +390,17 @@ class MedmBaseWidget(object):
                 del assignments[k]
         return assignments
     
-    def parseObjectBlock(self, buf):
+    def parseObjectBlock(self, block):
         """MEDM "object" block defines a Geometry for its parent"""
-        a = self.locateAssignments(buf)
+        a = block.assignments
         arr = map(int, (a["x"], a["y"], a["width"], a["height"]))   # convert to int
         return Geometry(*list(arr))
 
-    def parsePlotcomBlock(self, buf, blocks):
+    def parsePlotcomBlock(self, blocks):
         block = self.getNamedBlock("plotcom", blocks)
         if block is not None:
-            self.parseColorAssignments(
-                self.locateAssignments(
-                    buf[block.start+1:block.end]
-                    )
-                )
-            aa = self.locateAssignments(buf[block.start+1:block.end])
+            self.parseColorAssignments(OrderedDict(block.assignments))
+            aa = OrderedDict(block.assignments)
             for symbol in "clr bclr".split():
                 if symbol in aa:
                     del aa[symbol]
@@ -317,6 +414,9 @@ class MedmBaseWidget(object):
 
 
 class MedmMainWidget(MedmBaseWidget):
+    """the screen, with attributes from its display block"""
+
+    __slots__ = ("__dict__",)   # parseDisplayBlock() adds attributes
     
     def __init__(self, given_filename=None):
         MedmBaseWidget.__init__(self)
@@ -327,22 +427,80 @@ class MedmMainWidget(MedmBaseWidget):
         self.widgets = []
         self.line_offset = 1            # line numbers start at 1
     
-    def getAdlLines(self, fname=None):
+    def findAdlFile(self, fname=None):
+        """the name of the .adl file to read, which must exist"""
         fname = fname or self.given_filename
         if not os.path.exists(fname):
             msg = "Could not find file: " + fname
             raise ValueError(msg)
         self.given_filename = fname
+        return fname
+
+    def getAdlLines(self, fname=None):
+        fname = self.findAdlFile(fname)
         with open(fname, "r") as fp:
             return fp.readlines()
 
-    def parseAdlBuffer(self, buf):              # lgtm [py/similar-function]
+    def parseAdlFile(self, fname=None):
+        """parse the .adl file, reading it one line at a time"""
+        fname = self.findAdlFile(fname)
+        with open(fname, "r") as fp:
+            self.parseAdlStream(fp)
+
+    def parseAdlStream(self, lines):
+        """
+        parse the lines of an .adl file from any iterable (or file object)
+
+        Each widget is parsed as soon as its block closes, so only
+        the lines of one top-level block are held at a time.  The
+        file, color map, and display blocks must come before the
+        first widget, as MEDM writes them.
+        """
+        self.parseBlockItems(self.iterBlockTree(lines))
+
+    def parseBlockItems(self, items):
+        """
+        parse the top-level blocks as they come from iterBlockTree()
+
+        (or from any source of top-level :class:`Block` objects
+        and ``(key, value)`` assignments)
+        """
+        logger.debug("\n"*2)
+        logger.debug(self.given_filename)
+        header = []
+        for item in items:
+            if not isinstance(item, Block):
+                continue    # ignore assignments outside of blocks
+            logger.debug(str(item))
+            if item.symbol in symbols.adl_widgets:
+                if header is not None:
+                    self.parseHeaderBlocks(header)
+                    header = None
+                self.parseChildren(self, [item])
+            elif header is not None:
+                header.append(item)
+        if header is not None:
+            self.parseHeaderBlocks(header)
+
+    def parseAdlBlock(self, node):              # lgtm [py/similar-function]
         logger.debug("\n"*2)
         logger.debug(self.given_filename)
-        blocks = self.locateBlocks(buf)
+        blocks = node.blocks
         for block in blocks:
             logger.debug(str(block))
-        
+
+        self.parseHeaderBlocks(blocks)
+         
+        # sift out the three block types already handled
+        blocks = [
+            block 
+            for block in blocks 
+            if block.symbol in symbols.adl_widgets
+            ]
+        self.parseChildren(self, blocks)
+
+    def parseHeaderBlocks(self, blocks):
+        """parse the file, color map, and display blocks"""
         xref = OrderedDict([
             ("file", self.parseFileBlock),
             ("color map", self.parseColorMapBlock), # must BEFORE display
@@ -354,30 +512,22 @@ class MedmMainWidget(MedmBaseWidget):
                 logger.warn("Did not find %s block" % symbol)
             else:
                 logger.debug("Processing %s block" % symbol)
-                handler(buf[block.start+1:block.end])
-         
-        # sift out the three block types already handled
-        blocks = [
-            block 
-            for block in blocks 
-            if block.symbol in symbols.adl_widgets
-            ]
-        self.parseChildren(self, blocks, buf)
+                handler(block)
     
-    def parseFileBlock(self, buf):
+    def parseFileBlock(self, node):
         # TODO: keep original line numbers for debug purposes
         xref = dict(name="adl_filename", version="adl_version")
-        assignments = self.locateAssignments(buf)
+        assignments = node.assignments
         for k, sk in xref.items():
             value = assignments.get(k)
             if value is not None:
                 self.__setattr__(sk, value)
     
-    def parseColorMapBlock(self, buf):
+    def parseColorMapBlock(self, node):
         """read the color_table (clut) from the "color map"""
         # TODO: keep original line numbers for debug purposes
-        # assignments = self.locateAssignments(buf)   # ignore ncolors=
-        blocks = self.locateBlocks(buf)
+        # assignments = node.assignments   # ignore ncolors=
+        blocks = node.blocks
 
         block = self.getNamedBlock("colors", blocks)
         if block is not None:
@@ -386,27 +536,31 @@ class MedmMainWidget(MedmBaseWidget):
                 r = int(rgbhex[:2], 16)
                 g = int(rgbhex[2:4], 16)
                 b = int(rgbhex[4:6], 16)
-                return Color(r, g, b)
-
-            text = "".join(buf[block.start+1:block.end])
-            clut = map(_parse_colors_, text.replace(",", " ").split())
-            self.color_table = list(clut)
+                return internColor(r, g, b)
+
+            # same text, same table: shared by all screens (do not modify)
+            text = block.text
+            clut = _color_tables_.get(text)
+            if clut is None:
+                clut = list(map(_parse_colors_, text.replace(",", " ").split()))
+                _color_tables_[text] = clut
+            self.color_table = clut
         else:
             # dl_color blocks  contain assignments: r, g, b inten
             block = self.getNamedBlock("dl_color", blocks)
             if block is not None:
                 clut = []
                 for block in blocks:
-                    a = self.locateAssignments(buf[block.start+1:block.end])
+                    a = block.assignments
                     arr = map(int, (a["r"], a["g"], a["b"]))
-                    color = Color(*list(arr))   # ignore inten (default = 255)
+                    color = internColor(*arr)   # ignore inten (default = 255)
                     clut.append(color)
                 self.color_table = clut
     
-    def parseDisplayBlock(self, buf):
+    def parseDisplayBlock(self, node):
         # TODO: keep original line numbers for debug purposes
-        assignments = self.locateAssignments(buf)
-        blocks = self.locateBlocks(buf)
+        assignments = OrderedDict(node.assignments)
+        blocks = node.blocks
 
         # assign certain items in named attributes
         assignments = self.parseColorAssignments(assignments)
@@ -417,12 +571,13 @@ class MedmMainWidget(MedmBaseWidget):
 
         block = self.getNamedBlock("object", blocks)
         if block is not None:
-            self.geometry = self.parseObjectBlock(buf[block.start+1:block.end])
+            self.geometry = self.parseObjectBlock(block)
         # ignore any other blocks
 
 
 class MedmGenericWidget(MedmBaseWidget):
-    
+
+    __slots__ = ()
     debug = False
     
     def __init__(self, line, main, symbol):
@@ -431,38 +586,40 @@ class MedmGenericWidget(MedmBaseWidget):
         self.main = main
         self.symbol = symbol
 
-    def parseAdlBuffer(self, buf):              # lgtm [py/similar-function]
-        assignments, blocks = MedmBaseWidget.parseAdlBuffer(self, buf)  # lgtm [py/unused-local-variable]
+    def parseAdlBlock(self, node):              # lgtm [py/similar-function]
+        assignments, blocks = MedmBaseWidget.parseAdlBlock(self, node)  # lgtm [py/unused-local-variable]
         if self.debug:
             _debug = self.debug  # lgtm [py/unused-local-variable]
 
 
-class MedmArcWidget(MedmGenericWidget): pass
-class MedmBarWidget(MedmGenericWidget): pass
-class MedmByteWidget(MedmGenericWidget): pass
+class MedmArcWidget(MedmGenericWidget): __slots__ = ()
+class MedmBarWidget(MedmGenericWidget): __slots__ = ()
+class MedmByteWidget(MedmGenericWidget): __slots__ = ()
 
 
 class MedmCartesianPlotWidget(MedmGenericWidget):
+
+    __slots__ = ()
     
     def __init__(self, line, main, symbol):
         MedmGenericWidget.__init__(self, line, main, symbol)
 
-    def parseAdlBuffer(self, buf):          # lgtm [py/similar-function] 
-        assignments, blocks = MedmBaseWidget.parseAdlBuffer(self, buf)
+    def parseAdlBlock(self, node):          # lgtm [py/similar-function] 
+        assignments, blocks = MedmBaseWidget.parseAdlBlock(self, node)
 
-        self.parsePlotcomBlock(buf, blocks)
+        self.parsePlotcomBlock(blocks)
 
         for symbol in ("x_axis", "y1_axis", "y2_axis"):
             block = self.getNamedBlock(symbol, blocks)
             if block is not None:
-                aa = self.locateAssignments(buf[block.start+1:block.end])
+                aa = OrderedDict(block.assignments)
                 self.contents[symbol] = aa
 
         traces = {}
         for block in blocks:
             if block.symbol.startswith("trace["):
                 del self.contents[block.symbol]
-                aa = self.locateAssignments(buf[block.start+1:block.end])
+                aa = OrderedDict(block.assignments)
                 clr = aa.get("data_clr")
                 if clr is not None:
                     del aa["data_clr"]
@@ -475,11 +632,13 @@ class MedmCartesianPlotWidget(MedmGenericWidget):
         self.contents["traces"] = [traces[k] for k in sorted(traces.keys(), key=sorter)]
 
 
-class MedmChoiceButtonWidget(MedmGenericWidget): pass
+class MedmChoiceButtonWidget(MedmGenericWidget): __slots__ = ()
 
 
 class MedmCompositeWidget(MedmBaseWidget):
     """contains other widgets or an entire .adl screen"""
+
+    __slots__ = ("widgets",)
     
     def __init__(self, line, main, symbol):
         MedmBaseWidget.__init__(self)
@@ -488,17 +647,16 @@ class MedmCompositeWidget(MedmBaseWidget):
         self.symbol = symbol        # "composite"
         self.widgets = []
 
-    def parseAdlBuffer(self, buf):              # lgtm [py/similar-function]
-        assignments, blocks = MedmBaseWidget.parseAdlBuffer(self, buf)
+    def parseAdlBlock(self, node):              # lgtm [py/similar-function]
+        assignments, blocks = MedmBaseWidget.parseAdlBlock(self, node)
         
         block = self.getNamedBlock("children", blocks)
         if block is not None:
-            # aa = self.locateAssignments(buf[block.start+1:block.end])
-            bb = self.locateBlocks(buf[block.start+1:block.end])
-            self.parseChildren(self.main, bb, buf[block.start+1:block.end])
+            self.parseChildren(self.main, block.blocks, block.start+1)
 
 
 class MedmEmbeddedDisplayWidget(MedmGenericWidget): 
+    __slots__ = ()
     debug = True # TODO: need example in .adl file!
 
     def __init__(self, line, main, symbol):
@@ -517,32 +675,34 @@ class MedmEmbeddedDisplayWidget(MedmGenericWidget):
         """ % (main.given_filename, line)
         raise NotImplementedError(emsg)
 
-class MedmImageWidget(MedmGenericWidget): pass
-class MedmIndicatorWidget(MedmGenericWidget): pass
-class MedmMenuWidget(MedmGenericWidget): pass
-class MedmMessageButtonWidget(MedmGenericWidget): pass
-class MedmMeterWidget(MedmGenericWidget): pass
-class MedmOvalWidget(MedmGenericWidget): pass
-class MedmPolygonWidget(MedmGenericWidget): pass
-class MedmPolylineWidget(MedmGenericWidget): pass
-class MedmRectangleWidget(MedmGenericWidget): pass
+class MedmImageWidget(MedmGenericWidget): __slots__ = ()
+class MedmIndicatorWidget(MedmGenericWidget): __slots__ = ()
+class MedmMenuWidget(MedmGenericWidget): __slots__ = ()
+class MedmMessageButtonWidget(MedmGenericWidget): __slots__ = ()
+class MedmMeterWidget(MedmGenericWidget): __slots__ = ()
+class MedmOvalWidget(MedmGenericWidget): __slots__ = ()
+class MedmPolygonWidget(MedmGenericWidget): __slots__ = ()
+class MedmPolylineWidget(MedmGenericWidget): __slots__ = ()
+class MedmRectangleWidget(MedmGenericWidget): __slots__ = ()
 
 
 class MedmRelatedDisplayWidget(MedmGenericWidget):
+
+    __slots__ = ("displays",)
     
     def __init__(self, line, main, symbol):
         MedmGenericWidget.__init__(self, line, main, symbol)
         self.displays = []
 
-    def parseAdlBuffer(self, buf):          # lgtm [py/similar-function] 
-        assignments, blocks = MedmBaseWidget.parseAdlBuffer(self, buf)
+    def parseAdlBlock(self, node):          # lgtm [py/similar-function] 
+        assignments, blocks = MedmBaseWidget.parseAdlBlock(self, node)
 
         displays = {}
         for block in blocks:
             if not block.symbol.startswith("display["):
                 continue
             del self.contents[block.symbol]
-            aa = self.locateAssignments(buf[block.start+1:block.end])
+            aa = OrderedDict(block.assignments)
             row = block.symbol.replace("[", " ").replace("]", "").split()[-1]
             displays[row] = aa
         
@@ -552,20 +712,22 @@ class MedmRelatedDisplayWidget(MedmGenericWidget):
 
 
 class MedmShellCommandWidget(MedmGenericWidget):
+
+    __slots__ = ("commands",)
     
     def __init__(self, line, main, symbol):
         MedmGenericWidget.__init__(self, line, main, symbol)
         self.commands = []
 
-    def parseAdlBuffer(self, buf):          # lgtm [py/similar-function] 
-        assignments, blocks = MedmBaseWidget.parseAdlBuffer(self, buf)
+    def parseAdlBlock(self, node):          # lgtm [py/similar-function] 
+        assignments, blocks = MedmBaseWidget.parseAdlBlock(self, node)
 
         commands = {}
         for block in blocks:
             if not block.symbol.startswith("command["):
                 continue
             del self.contents[block.symbol]
-            aa = self.locateAssignments(buf[block.start+1:block.end])
+            aa = OrderedDict(block.assignments)
             row = block.symbol.replace("[", " ").replace("]", "").split()[-1]
             commands[row] = aa
         
@@ -575,18 +737,20 @@ class MedmShellCommandWidget(MedmGenericWidget):
 
 
 class MedmStripChartWidget(MedmGenericWidget):
+
+    __slots__ = ()
     
     def __init__(self, line, main, symbol):
         MedmGenericWidget.__init__(self, line, main, symbol)
 
-    def parseAdlBuffer(self, buf):          # lgtm [py/similar-function] 
-        assignments, blocks = MedmBaseWidget.parseAdlBuffer(self, buf)
+    def parseAdlBlock(self, node):          # lgtm [py/similar-function] 
+        assignments, blocks = MedmBaseWidget.parseAdlBlock(self, node)
 
         pens = {}
         for block in blocks:
             if block.symbol.startswith("pen["):
                 del self.contents[block.symbol]
-                aa = self.locateAssignments(buf[block.start+1:block.end])
+                aa = OrderedDict(block.assignments)
                 clr = aa.get("clr")
                 if clr is not None:
                     del aa["clr"]
@@ -594,7 +758,7 @@ class MedmStripChartWidget(MedmGenericWidget):
                 row = block.symbol.replace("[", " ").replace("]", "").split()[-1]
                 pens[row] = aa
             elif block.symbol == "plotcom":
-                self.parsePlotcomBlock(buf, blocks)
+                self.parsePlotcomBlock(blocks)
             # elif block.symbol == "symbol":
             #     raise ValueError(block.symbol + " not handled yet")
             else:
@@ -607,14 +771,44 @@ class MedmStripChartWidget(MedmGenericWidget):
 
 class MedmTextWidget(MedmGenericWidget):
 
-    def parseAdlBuffer(self, buf):              # lgtm [py/similar-function]
-        assignments, blocks = MedmBaseWidget.parseAdlBuffer(self, buf)
+    __slots__ = ()
+
+    def parseAdlBlock(self, node):              # lgtm [py/similar-function]
+        assignments, blocks = MedmBaseWidget.parseAdlBlock(self, node)
         if "textix" in assignments:
             self.title = assignments["textix"]
             del self.contents["textix"], assignments["textix"]
 
 
-class MedmTextEntryWidget(MedmGenericWidget): pass
-class MedmTextUpdateWidget(MedmGenericWidget): pass
-class MedmValuatorWidget(MedmGenericWidget): pass
-class MedmWheelSwitchWidget(MedmGenericWidget): pass
+class MedmTextEntryWidget(MedmGenericWidget): __slots__ = ()
+class MedmTextUpdateWidget(MedmGenericWidget): __slots__ = ()
+class MedmValuatorWidget(MedmGenericWidget): __slots__ = ()
+class MedmWheelSwitchWidget(MedmGenericWidget): __slots__ = ()
+
+
+MedmBaseWidget.medm_widget_handlers.update({
+    "arc" : MedmArcWidget,
+    "bar" : MedmBarWidget,
+    "byte" : MedmByteWidget,
+    "cartesian plot" : MedmCartesianPlotWidget,
+    "choice button" : MedmChoiceButtonWidget,
+    "composite" : MedmCompositeWidget,
+    "embedded display" : MedmEmbeddedDisplayWidget,
+    "image" : MedmImageWidget,
+    "indicator" : MedmIndicatorWidget,
+    "menu" : MedmMenuWidget,
+    "message button" : MedmMessageButtonWidget,
+    "meter" : MedmMeterWidget,
+    "oval" : MedmOvalWidget,
+    "polygon" : MedmPolygonWidget,
+    "polyline" : MedmPolylineWidget,
+    "rectangle" : MedmRectangleWidget,
+    "related display" : MedmRelatedDisplayWidget,
+    "shell command" : MedmShellCommandWidget,
+    "strip chart" : MedmStripChartWidget,
+    "text" : MedmTextWidget,
+    "text entry" : MedmTextEntryWidget,
+    "text update" : MedmTextUpdateWidget,
+    "valuator" : MedmValuatorWidget,
+    "wheel switch" : MedmWheelSwitchWidget,
+    })
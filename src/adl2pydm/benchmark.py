@@ -0,0 +1,389 @@
+#!/usr/bin/env python
+
+"""
+measure the speed of adl2pydm, phase by phase
+
+Only rely on packages in the standard Python distribution.
+
+Each .adl file is converted in phases, timed separately:
+
+=========  ==============================================
+phase      step
+=========  ==============================================
+read       ``MedmMainWidget.getAdlLines()``
+parse      ``MedmMainWidget.parseAdlBuffer()``
+stream     ``MedmMainWidget.parseAdlFile()``
+build      ``Widget2Pydm.write_screen()`` (ElementTree)
+serialize  ``PYDM_Writer.writeDocument()`` (to memory)
+=========  ==============================================
+
+The stream phase reads and parses the file one line at a time, as
+adl2pydm does.  The read and parse phases do the same work from a
+buffer of all the lines, to show the cost of each.  The total is the
+time of a conversion: stream, build, and serialize.
+
+Synthetic screens, made by repeating the widgets of a test screen,
+show how the time grows with the size of a screen.
+
+Results are saved as JSON, to compare releases::
+
+    python -m adl2pydm.benchmark tests/medm -o new.json --compare old.json
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from . import adl_parser
+from . import output_handler
+from . import symbols
+from ._options import positiveInt
+
+
+PHASES = "read parse stream build serialize".split()
+CONVERSION_PHASES = "stream build serialize".split()   # summed as the total
+DEFAULT_REPEAT = 3
+DEFAULT_SCALES = (10, 50)
+SYNTHETIC_SOURCE = "motorx_all-R6-10-1.adl"
+
+logger = logging.getLogger(__name__)
+
+
+def countWidgets(widget):
+    """number of widgets in the screen (includes those inside composites)"""
+    return sum(
+        1 + countWidgets(w)
+        for w in getattr(widget, "widgets", [])
+    )
+
+
+def convertPhases(adl_filename, buffered=True):
+    """
+    convert the file, return the time (s) for each phase and the screen
+
+    Without *buffered*, skip the read and parse phases.
+    """
+    times, lines = {}, None
+    if buffered:
+        t0 = time.perf_counter()
+        screen = adl_parser.MedmMainWidget(adl_filename)
+        buf = screen.getAdlLines(adl_filename)
+        t1 = time.perf_counter()
+        screen.parseAdlBuffer(buf)
+        t2 = time.perf_counter()
+        times.update(read=t1-t0, parse=t2-t1)
+        lines = len(buf)
+        del screen, buf
+
+    t2 = time.perf_counter()
+    screen = adl_parser.MedmMainWidget(adl_filename)
+    screen.parseAdlFile()
+    t3 = time.perf_counter()
+    writer = output_handler.Widget2Pydm()
+    writer.writer = output_handler.PYDM_Writer(None)
+    root = writer.writer.newDocument()
+    writer.write_screen(root, screen)
+    t4 = time.perf_counter()
+    with io.StringIO() as fp:
+        writer.writer.writeDocument(fp)
+    t5 = time.perf_counter()
+
+    times.update(stream=t3-t2, build=t4-t3, serialize=t5-t4)
+    return times, screen, lines
+
+
+def benchmarkFile(adl_filename, repeat=DEFAULT_REPEAT):
+    """
+    benchmark one .adl file, return a dictionary of results
+
+    Phase times are the best of *repeat* conversions.
+    Peak memory (bytes) is measured in a separate conversion,
+    streaming as adl2pydm does.
+    """
+    best = {}
+    for _i in range(repeat):
+        times, screen, lines = convertPhases(adl_filename)
+        for phase, t in times.items():
+            best[phase] = min(t, best.get(phase, t))
+
+    tracemalloc.start()
+    try:
+        convertPhases(adl_filename, buffered=False)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    widgets = countWidgets(screen)
+    total = sum(best[phase] for phase in CONVERSION_PHASES)
+    return dict(
+        file=os.path.basename(adl_filename),
+        lines=lines,
+        widgets=widgets,
+        phases=best,
+        total=total,
+        lines_per_s=lines / total if total > 0 else None,
+        widgets_per_s=widgets / total if total > 0 else None,
+        peak_memory=peak,
+    )
+
+
+def makeSyntheticScreen(adl_filename, scale, output_path):
+    """
+    write a larger screen that repeats the widgets of the .adl file
+
+    Returns the name of the new file.
+    """
+    with open(adl_filename, "r") as fp:
+        buf = fp.readlines()
+    tree = adl_parser.MedmBaseWidget().locateBlockTree(buf)
+    header, widgets = [], []
+    for block in tree.blocks:
+        lines = buf[block.start:block.end+1]
+        if block.symbol in symbols.adl_widgets:
+            widgets += lines
+        else:
+            header += lines
+
+    base = os.path.splitext(os.path.basename(adl_filename))[0]
+    fname = os.path.join(output_path, f"{base}-x{scale}.adl")
+    with open(fname, "w") as fp:
+        fp.writelines(header + widgets * scale)
+    return fname
+
+
+def findAdlFiles(paths):
+    """the .adl files given, or found in the given directories"""
+    adl_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            adl_files += sorted(
+                os.path.join(path, fname)
+                for fname in os.listdir(path)
+                if fname.endswith(".adl")
+            )
+        else:
+            adl_files.append(path)
+    return adl_files
+
+
+def runBenchmarks(adl_files, repeat=DEFAULT_REPEAT, scales=DEFAULT_SCALES, synthetic_source=None):
+    """
+    benchmark the .adl files and synthetic screens
+
+    Returns a dictionary of results, ready to save as JSON.
+    Files that cannot be converted are reported under "errors".
+    """
+    import adl2pydm
+    results = dict(
+        version=adl2pydm.__version__,
+        python=platform.python_version(),
+        platform=platform.platform(),
+        repeat=repeat,
+        files=[],
+        synthetic=[],
+        errors={},
+    )
+
+    def measure(adl_filename, section):
+        try:
+            results[section].append(benchmarkFile(adl_filename, repeat))
+        except Exception as exc:
+            results["errors"][os.path.basename(adl_filename)] = f"{exc}"
+
+    for adl_filename in adl_files:
+        logger.info(f"benchmark: {adl_filename}")
+        measure(adl_filename, "files")
+
+    source = synthetic_source
+    if source is None:
+        # default: the first given file with the synthetic source name
+        choices = [
+            f
+            for f in adl_files
+            if os.path.basename(f) == SYNTHETIC_SOURCE
+        ]
+        source = (choices or adl_files or [None])[0]
+    if source is not None and len(scales) > 0:
+        with tempfile.TemporaryDirectory() as tempdir:
+            for scale in scales:
+                fname = makeSyntheticScreen(source, scale, tempdir)
+                logger.info(f"benchmark: {fname}")
+                measure(fname, "synthetic")
+
+    results["totals"] = summarizeResults(results["files"])
+    return results
+
+
+def summarizeResults(file_results):
+    """total time for each phase and overall throughput"""
+    phases = {
+        # results saved by older versions have no stream phase
+        phase: sum(r["phases"].get(phase, 0) for r in file_results)
+        for phase in PHASES
+    }
+    total = sum(r["total"] for r in file_results)
+    lines = sum(r["lines"] for r in file_results)
+    widgets = sum(r["widgets"] for r in file_results)
+    return dict(
+        files=len(file_results),
+        lines=lines,
+        widgets=widgets,
+        phases=phases,
+        total=total,
+        lines_per_s=lines / total if total > 0 else None,
+        widgets_per_s=widgets / total if total > 0 else None,
+        peak_memory=max([r["peak_memory"] for r in file_results] or [0]),
+    )
+
+
+def formatResults(results):
+    """text table of the results"""
+    fmt = "%-44s %7s %7s" + " %9s" * len(PHASES) + " %10s %10s %9s"
+    header = ["file", "lines", "widgets"] + PHASES
+    header += ["lines/s", "widgets/s", "peak kB"]
+    table = [fmt % tuple(header)]
+
+    def row(name, r):
+        values = [name[:44], r["lines"], r["widgets"]]
+        values += ["%.2f ms" % (1000 * r["phases"].get(p, 0)) for p in PHASES]
+        values += [
+            "%.0f" % (r["lines_per_s"] or 0),
+            "%.0f" % (r["widgets_per_s"] or 0),
+            "%.0f" % (r["peak_memory"] / 1024),
+        ]
+        return fmt % tuple(values)
+
+    for r in results["files"] + results["synthetic"]:
+        table.append(row(r["file"], r))
+    table.append(row("TOTAL (files)", results["totals"]))
+    for fname, err in sorted(results["errors"].items()):
+        table.append(f"ERROR {fname}: {err}")
+    return "\n".join(table)
+
+
+def compareResults(old, new):
+    """
+    text report of the time ratio (new/old) of each phase
+
+    Compares the files (and synthetic screens) found in both results.
+    """
+    def by_file(results):
+        return {
+            r["file"]: r
+            for r in results["files"] + results["synthetic"]
+        }
+
+    old_files, new_files = by_file(old), by_file(new)
+    common = sorted(set(old_files).intersection(new_files))
+    report = [
+        f"comparing v{new['version']} to v{old['version']}"
+        f" on {len(common)} file(s) (new/old time)"
+    ]
+    if len(common) == 0:
+        return "\n".join(report)
+
+    old_totals = summarizeResults([old_files[f] for f in common])
+    new_totals = summarizeResults([new_files[f] for f in common])
+    for phase in PHASES + ["total"]:
+        if phase == "total":
+            t_old, t_new = old_totals["total"], new_totals["total"]
+        else:
+            t_old = old_totals["phases"][phase]
+            t_new = new_totals["phases"][phase]
+            if t_old == 0 or t_new == 0:
+                continue    # not measured by one of the releases
+        ratio = t_new / t_old if t_old > 0 else float("nan")
+        report.append("  %-10s %6.2f" % (phase, ratio))
+    return "\n".join(report)
+
+
+def get_user_parameters():
+    doc = __doc__.strip().splitlines()[0]
+    parser = argparse.ArgumentParser(
+        prog="adl2pydm.benchmark", description=doc)
+
+    parser.add_argument(
+        "paths",
+        action="store",
+        nargs=argparse.ONE_OR_MORE,
+        help="MEDM '.adl' file(s) or directories of them to benchmark",
+        )
+
+    parser.add_argument(
+        "-o",
+        "--output",
+        action="store",
+        default=None,
+        help="save the results in this JSON file",
+        )
+
+    parser.add_argument(
+        "--compare",
+        action="store",
+        default=None,
+        help="compare with results saved (JSON) from another release",
+        )
+
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        action="store",
+        type=positiveInt,
+        default=DEFAULT_REPEAT,
+        help=f"report the best of this many runs, default: {DEFAULT_REPEAT}",
+        )
+
+    parser.add_argument(
+        "--scales",
+        action="store",
+        type=int,
+        nargs=argparse.ZERO_OR_MORE,
+        default=list(DEFAULT_SCALES),
+        help=(
+            "sizes of synthetic screens (times the widgets of the source)"
+            f", default: {' '.join(map(str, DEFAULT_SCALES))}"),
+        )
+
+    parser.add_argument(
+        "--synthetic-source",
+        action="store",
+        default=None,
+        help=(
+            "'.adl' file to repeat for synthetic screens"
+            f", default: {SYNTHETIC_SOURCE} (if given)"
+            " or the first file"),
+        )
+
+    return parser.parse_args()
+
+
+def main():
+    options = get_user_parameters()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    results = runBenchmarks(
+        findAdlFiles(options.paths),
+        repeat=options.repeat,
+        scales=options.scales,
+        synthetic_source=options.synthetic_source,
+        )
+    print(formatResults(results))
+
+    if options.output is not None:
+        with open(options.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+    if options.compare is not None:
+        with open(options.compare, "r") as fp:
+            print(compareResults(json.load(fp), results))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,14 +5,88 @@ convert MEDM calc expressions to PyDM rules
 
 see: https://epics.anl.gov/EpicsDocumentation/ExtensionsManuals/MEDM/MEDM.html#CalcExpression
 see: https://slaclab.github.io/pydm/widgets/widget_rules/index.html
+
+The same few calc expressions (such as ``A=0`` or ``A#0``) appear
+many times across a set of screens.  Translations are kept in a
+bounded LRU cache, see :func:`calcCacheInfo`.
 """
 
-import io
+import functools
 import logging
-import tokenize
+import re
 
 logger = logging.getLogger(__file__)
 
+CALC_CACHE_SIZE = 1024      # maximum number of translations to remember
+
+# lexical tokens of a MEDM calc expression
+CALC_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<space>\s+)
+    | (?P<number>0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    | (?P<name>[A-Za-z_]\w*)
+    | (?P<op>\*\*|//|==|!=|<=|>=|<<|>>|&&|\|\||.)
+    """,
+    re.VERBOSE)
+
+# translation of MEDM operators that differ in PyDM rules
+CALC_OPERATORS = {
+    "#": "!=",
+    "=": "==",
+    "!": " not ",
+    "&": " and ",
+    "&&": " and ",
+    "|": " or ",
+    "||": " or ",
+}
+
+# single-letter names of the calc channels
+CALC_CHANNELS = "ABCDEFGHIJKL"
+
+
+def tokenizeCalc(medm_calc):
+    """
+    split a MEDM calc expression into its lexical tokens
+
+    Yields ``(kind, text)`` tuples where *kind* is one of
+    ``number``, ``name``, or ``op``.  White space is dropped.
+    """
+    for match in CALC_TOKEN_PATTERN.finditer(medm_calc):
+        kind = match.lastgroup
+        if kind != "space":
+            yield kind, match.group()
+
+
+@functools.lru_cache(maxsize=CALC_CACHE_SIZE)
+def _translate_calc_(medm_calc):
+    """translate (uncached) a MEDM calc expression to a PyDM rule"""
+    calc = []
+    for kind, text in tokenizeCalc(medm_calc):
+        if kind == "name":
+            if len(text) == 1:
+                idx = CALC_CHANNELS.find(text.upper())
+                if idx < 0 or idx > 3:
+                    # TODO: consider handling these less common cases
+                    raise ValueError(
+                        f"unhandled complexity in MEDM calc '{medm_calc}''"
+                        f" uses special variable {text}"
+                        )
+                calc.append(f"ch[{idx}]")
+            else:
+                # probably a math expression
+                # TODO: need a mapping?
+                # we have these imports available:
+                #     from math import *
+                #     import numpy as np
+                calc.append(text.lower())  # simply
+        elif kind == "op":
+            calc.append(CALC_OPERATORS.get(text, text))
+        else:
+            calc.append(text)
+
+    pydm_rule = " ".join("".join(calc).split())  # remove interior extra spaces
+    return pydm_rule
+
 
 def convertCalcToRuleExpression(medm_calc):
     """
@@ -29,45 +103,19 @@ def convertCalcToRuleExpression(medm_calc):
         The converted PyDM rule expression.
     """
     logger.debug(f"MEDM: {medm_calc}")
+    return _translate_calc_(medm_calc)
 
-    medm_calc = medm_calc.replace("#", "!=")
-    medm_calc = medm_calc.replace("&&", "&")
-    medm_calc = medm_calc.replace("||", "|")
-
-    calc = ""
-    with io.StringIO(medm_calc) as f:
-        for tok in tokenize.generate_tokens(f.read):
-            logger.debug(tok)
-            if tok.type == tokenize.NAME:
-                if len(tok.string) == 1:
-                    idx = "ABCDEFGHIJKL".index(tok.string.upper())
-                    if idx > 3:
-                        # TODO: consider handling these less common cases
-                        raise ValueError(
-                            f"unhandled complexity in MEDM calc '{medm_calc}''"
-                            f" uses special variable {tok.string}"
-                            )
-                    calc += f"ch[{idx}]"
-                else:
-                    # probably a math expression
-                    # TODO: need a mapping?
-                    # we have these imports available:
-                    #     from math import *
-                    #     import numpy as np
-                    calc += tok.string.lower()  # simply
-            elif tok.type == tokenize.ERRORTOKEN:
-                op = tok.string
-                if op == "!":
-                    op = " not "
-                calc += op
-            elif tok.type == tokenize.OP:
-                calc += {
-                    "=": "==",
-                    "|": " or ",
-                    "&": " and ",
-                }.get(tok.string, tok.string)
-            elif tok.type not in (tokenize.NEWLINE, tokenize.ENDMARKER):
-                calc += tok.string
-
-    pydm_rule = " ".join(calc.strip().split())  # remove interior extra spaces
-    return pydm_rule
+
+def calcCacheInfo():
+    """
+    statistics of the calc translation cache
+
+    Returns a named tuple with ``hits``, ``misses``,
+    ``maxsize``, and ``currsize``.
+    """
+    return _translate_calc_.cache_info()
+
+
+def clearCalcCache():
+    """forget all calc translations (and reset the statistics)"""
+    _translate_calc_.cache_clear()
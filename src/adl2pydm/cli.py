@@ -7,44 +7,251 @@ Only rely on packages in this project or from the standard Python distribution.
 """
 
 import argparse
+from collections import OrderedDict
 # from collections import namedtuple
 import logging
+import multiprocessing
 import os
+import sys
 
 from . import adl_parser
+from ._options import VersionAction, positiveInt
+from . import dedup
+from . import display_graph
+from . import manifest
 from . import output_handler
+from . import parse_cache
+from . import profiler
+from . import tree
+from . import watch
 
 
 logger = None
 
 
-def processFile(adl_filename, output_path=None):
+def processFile(
+        adl_filename, output_path=None, conversions=None, profile=None,
+        parse_cache=None):
+    """
+    convert one .adl file, return the name of the .ui file
+
+    If a :class:`~adl2pydm.manifest.ConversionManifest` is given as
+    *conversions*, skip the conversion when the manifest shows the
+    .ui file is already current and record the conversion otherwise.
+
+    If a :class:`~adl2pydm.profiler.ConversionProfile` is given as
+    *profile*, time each phase of the conversion.
+
+    If a :class:`~adl2pydm.parse_cache.ParseCache` is given as
+    *parse_cache*, load the parsed screen from it when the .adl
+    file has been parsed before.
+    """
     output_path = output_path or os.path.dirname(adl_filename)
+    writer = output_handler.Widget2Pydm(profile=profile)
+    if profile is not None:
+        profile.file(adl_filename)
+
+    digest = None   # a ParseCache hashes the file itself, only if it must
+    if conversions is not None:
+        with writer.timing("digest"):
+            digest = manifest.fileDigest(adl_filename)
+        ui_filename = conversions.isCurrent(adl_filename, digest)
+        if ui_filename is not None:
+            return ui_filename
+
+    with writer.timing("parse"):
+        if parse_cache is not None:
+            screen = parse_cache.parse(adl_filename, digest)
+        else:
+            screen = adl_parser.MedmMainWidget(adl_filename)
+            screen.parseAdlFile(adl_filename)
+
+    ui_filename = writer.write_ui(screen, output_path)
+
+    if conversions is not None:
+        conversions.record(adl_filename, digest, ui_filename)
+    return ui_filename
+
+
+def getManifest(manifests, adl_filename, output_path, settings):
+    """
+    the conversion manifest for the output directory of this file
+
+    *manifests* is a dictionary of the manifests already loaded,
+    by output directory.
+    """
+    path = os.path.abspath(output_path or os.path.dirname(adl_filename))
+    if path not in manifests:
+        manifests[path] = manifest.ConversionManifest(path, settings)
+    return manifests[path]
+
+
+def convertFile(adl_filename, output_path=None, conversions=None, parse_cache=None):
+    """
+    call processFile() but report any error rather than raising it
+
+    Returns a ``(adl_filename, error)`` tuple where *error* is
+    ``None`` when the file was converted.
+    """
+    try:
+        processFile(
+            adl_filename, output_path, conversions, parse_cache=parse_cache)
+    except Exception as exc:
+        return adl_filename, f"{exc}"
+    return adl_filename, None
+
+
+# each worker process keeps its own copy of the manifests
+_worker_settings_ = None
+_worker_manifests_ = {}
+_worker_parse_cache_ = None
+
 
-    screen = adl_parser.MedmMainWidget(adl_filename)
-    buf = screen.getAdlLines(adl_filename)
-    screen.parseAdlBuffer(buf)
-    
-    writer = output_handler.Widget2Pydm()
-    writer.write_ui(screen, output_path)
+def _convert_worker_(args):
+    """
+    run convertFile() in a worker process of the pool
+
+    *args* may also have the screen already parsed from the file.
+    Also returns the file's manifest entry (if incremental) and
+    output directory so the main process can update its manifest.
+    """
+    adlfile, output_path = args[:2]
+    cache = _worker_parse_cache_
+    if len(args) > 2 and args[2] is not None:
+        cache = display_graph.ParsedScreens({adlfile: args[2]}, cache)
+    if _worker_settings_ is None:
+        result = convertFile(adlfile, output_path, parse_cache=cache)
+        return result, None, output_path
+
+    conversions = getManifest(
+        _worker_manifests_, adlfile, output_path, _worker_settings_)
+    result = convertFile(adlfile, output_path, conversions, cache)
+    entry = None
+    if result[1] is None:
+        entry = conversions.getEntry(adlfile)
+    return result, entry, output_path
+
+
+def _init_worker_(options):
+    """configure each worker process of the pool as the main process"""
+    global _worker_settings_, _worker_parse_cache_
+    configure_logging(options)
+    configure_widgets(options)
+    _worker_parse_cache_ = getParseCache(options, evict=False)
+    if options.incremental:
+        _worker_settings_ = conversionSettings(options)
+
+
+def convertFiles(adl_files, output_path=None, jobs=None, options=None):
+    """
+    convert many .adl files using a pool of worker processes
+
+    *jobs* is the number of worker processes
+    (default: number of CPUs).
+
+    Yields ``(adl_filename, error)`` tuples (from :func:`convertFile`)
+    in the same order as *adl_files*.
+    """
+    work = ((adlfile, output_path) for adlfile in adl_files)
+    yield from convertWork(work, jobs, options)
+
+
+def convertWork(work, jobs=None, options=None, screens=None):
+    """
+    convertFiles() with an output directory for each file
+
+    *work* is an iterable of ``(adl_filename, output_path)``, read
+    as the conversions go (it can be a stream from :mod:`~adl2pydm.tree`).
+    The screens in *screens* (:class:`~adl2pydm.display_graph.ParsedScreens`)
+    are sent to the workers, not parsed again.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if screens is not None:
+        work = (
+            (adlfile, output_path, screens.take(adlfile))
+            for adlfile, output_path in work)
+    initargs = (options,) if options is not None else ()
+    initializer = _init_worker_ if options is not None else None
+    manifests = {}
+    try:
+        with multiprocessing.Pool(jobs, initializer, initargs) as pool:
+            for result, entry, output_path in pool.imap(_convert_worker_, work):
+                if entry is not None:
+                    adlfile = result[0]
+                    conversions = getManifest(
+                        manifests, adlfile, output_path,
+                        conversionSettings(options))
+                    conversions.setEntry(adlfile, entry)
+                yield result
+    finally:
+        for conversions in manifests.values():
+            conversions.save()
+
+
+def summarize(results):
+    """text summary of successes and failures from convertFiles()"""
+    failures = [(fname, err) for fname, err in results if err is not None]
+    summary = [
+        f"converted {len(results)-len(failures)} of {len(results)} file(s)"
+        f", {len(failures)} failed"
+    ]
+    for fname, err in failures:
+        summary.append(f"  FAILED {fname}: {err}")
+    return "\n".join(summary)
 
 
 def get_user_parameters():
     import adl2pydm
     doc = __doc__.strip().splitlines()[0]
     doc += ' (%s)' % adl2pydm.__url__
-    doc += ' v' + adl2pydm.__version__
     parser = argparse.ArgumentParser(
-        prog=adl2pydm.__package__, description=doc)
+        prog=adl2pydm.__package__, description=doc,
+        epilog=f"to run as a daemon: {adl2pydm.__package__} serve --help")
 
     msg = "MEDM '.adl' file(s) to convert"
+    msg += " (with --watch, may also be directories of '.adl' files)"
     parser.add_argument(
         'adlfiles', 
         action='store', 
-        nargs=argparse.ONE_OR_MORE,
+        nargs=argparse.ZERO_OR_MORE,
         help=msg,
         )
 
+    msg =  "also convert the files found in this directory and below"
+    msg += " (may be given more than once)"
+    msg += ", with --dir: the .ui files go in the same subdirectories"
+    msg += " of the output directory"
+    parser.add_argument(
+        '-r', 
+        '--recursive',
+        action='append', 
+        dest='recursive', 
+        metavar='DIR',
+        help=msg, 
+        default=[])
+
+    msg =  "with --recursive: convert the files that match this glob"
+    msg += " (may be given more than once; with a '/': matches the path"
+    msg += " relative to DIR)"
+    msg += f", default: {' '.join(tree.DEFAULT_INCLUDE)}"
+    parser.add_argument(
+        '--include',
+        action='append', 
+        dest='include', 
+        metavar='GLOB',
+        help=msg, 
+        default=None)
+
+    msg =  "with --recursive: do not convert the files or search the"
+    msg += " directories that match this glob (may be given more than once)"
+    parser.add_argument(
+        '--exclude',
+        action='append', 
+        dest='exclude', 
+        metavar='GLOB',
+        help=msg, 
+        default=[])
+
     msg =  "output directory"
     msg += ", default: same directory as input file"
     parser.add_argument(
@@ -55,11 +262,125 @@ def get_user_parameters():
         help=msg, 
         default=None)
 
+    msg =  "convert files in parallel with this many worker processes"
+    msg += " and print a summary at the end"
+    msg += ", default: convert one file at a time"
+    parser.add_argument(
+        '-j', 
+        '--jobs',
+        action='store', 
+        dest='jobs', 
+        type=positiveInt,
+        help=msg, 
+        default=None)
+
+    msg =  "skip files whose .ui file is already current"
+    msg += f" (recorded in {manifest.MANIFEST_FILE} in the output directory)"
+    msg += ", default: convert all files"
+    parser.add_argument(
+        '--incremental',
+        action='store_true', 
+        help=msg, 
+        default=False)
+
+    msg =  "keep running and convert each file again when it changes"
+    msg += " (ignores --jobs)"
+    parser.add_argument(
+        '--watch',
+        action='store_true', 
+        help=msg, 
+        default=False)
+
+    msg =  "seconds between checks for changes in --watch mode"
+    msg += f", default: {watch.DEFAULT_POLL_INTERVAL}"
+    parser.add_argument(
+        '--watch-interval',
+        action='store', 
+        dest='watch_interval', 
+        type=float,
+        help=msg, 
+        default=watch.DEFAULT_POLL_INTERVAL)
+
+    msg =  "also convert all the screens that these screens open"
+    msg += " (related display) or embed (composite file), and theirs"
+    msg += ", and report those missing or cyclic"
+    msg += ", default: convert only the files given"
+    parser.add_argument(
+        '--related',
+        action='store_true', 
+        help=msg, 
+        default=False)
+
+    msg =  "convert identical .adl files (same content and name) once"
+    msg += " and copy (or link) the .ui file for the others"
+    msg += " (ignored with --watch and --profile)"
+    parser.add_argument(
+        '--dedup',
+        action='store_true',
+        help=msg,
+        default=False)
+
+    msg =  "how --dedup makes the .ui file of each duplicate"
+    msg += f" ({', '.join(dedup.DEDUP_MODES)}), default: copy"
+    parser.add_argument(
+        '--dedup-mode',
+        action='store',
+        dest='dedup_mode',
+        choices=dedup.DEDUP_MODES,
+        help=msg,
+        default="copy")
+
+    msg =  "keep parsed .adl files and load them"
+    msg += " from there when the file has not changed"
+    msg += ", default: no cache"
+    parser.add_argument(
+        '--parse-cache',
+        action='store_true', 
+        help=msg, 
+        default=False)
+
+    msg =  "directory of the --parse-cache (implies --parse-cache)"
+    msg += f", default: {parse_cache.defaultCacheDir()}"
+    parser.add_argument(
+        '--parse-cache-dir',
+        action='store', 
+        dest='parse_cache_dir', 
+        help=msg, 
+        default=None)
+
+    msg =  "largest size (MB) of the --parse-cache"
+    msg += ", oldest files are removed first"
+    msg += f", default: {parse_cache.DEFAULT_MAX_BYTES // (1024*1024)}"
+    parser.add_argument(
+        '--parse-cache-size',
+        action='store', 
+        dest='parse_cache_size', 
+        type=float,
+        help=msg, 
+        default=parse_cache.DEFAULT_MAX_BYTES / (1024*1024))
+
+    msg =  "print the time of each conversion phase (by file)"
+    msg += " and of each widget handler (by widget type)"
+    msg += " (ignores --jobs)"
+    parser.add_argument(
+        '--profile',
+        action='store_true', 
+        help=msg, 
+        default=False)
+
+    msg =  "also run cProfile and save its statistics (pstats) in this file"
+    msg += " (implies --profile)"
+    parser.add_argument(
+        '--profile-stats',
+        action='store', 
+        dest='profile_stats', 
+        help=msg, 
+        default=None)
+
     parser.add_argument(
         '-v', 
         '--version', 
-        action='version', 
-        version=adl2pydm.__version__)
+        action=VersionAction)
 
     parser.add_argument(
         "-log", 
@@ -79,7 +400,12 @@ def get_user_parameters():
             "instead of `PyDMWaveformPlot`, default=False"),
         )
 
-    return parser.parse_args()
+    options = parser.parse_args()
+    if len(options.adlfiles) == 0 and len(options.recursive) == 0:
+        parser.error("give the .adl file(s) to convert, or --recursive DIR")
+    if len(options.recursive) > 0 and (options.watch or options.related):
+        parser.error("--recursive cannot be used with --watch or --related")
+    return options
 
 
 def configure_logging(options):
@@ -101,22 +427,220 @@ def configure_logging(options):
     logger = logging.getLogger(__name__)
 
 
-def main():
-    options = get_user_parameters()
-    configure_logging(options)
+def conversionSettings(options):
+    """options that change the content of the .ui files"""
+    return dict(use_scatterplot=options.use_scatterplot)
+
+
+def getParseCache(options, evict=True):
+    """
+    the ParseCache chosen by the command line options, or None
+
+    With *evict*, first apply the cache's limits (an earlier run
+    may have stopped before it could).
+    """
+    path = getattr(options, "parse_cache_dir", None)
+    if not (getattr(options, "parse_cache", False) or path):
+        return None
+    cache = parse_cache.ParseCache(
+        path or parse_cache.defaultCacheDir(),
+        max_bytes=int(options.parse_cache_size * 1024 * 1024))
+    if evict:
+        cache.evict()
+    return cache
+
 
+def configure_widgets(options):
     if options.use_scatterplot:
         from .symbols import adl_widgets
         adl_widgets["cartesian plot"]["pydm_widget"] = "PyDMScatterPlot"
 
+
+def processFileWithOptions(
+        adlfile, options, manifests, profile=None, cache=None, output_path=None):
+    """
+    call processFile() as directed by the command line options
+
+    *cache* is the ParseCache from :func:`getParseCache`.
+    *output_path* is the output directory, default: ``--dir``.
+
+    Logs any error.  Returns the name of the .ui file or None.
+    """
+    output_path = output_path or options.dir
+    conversions = None
+    if options.incremental:
+        conversions = getManifest(
+            manifests, adlfile, output_path, conversionSettings(options))
+    try:
+        return processFile(adlfile, output_path, conversions, profile, cache)
+    except Exception as exc:
+        logger.error(
+            f"error processing {adlfile}:"
+            f" {exc}"
+        )
+
+
+def watchFiles(options, polls=None, cache=None):
+    """convert the files again each time they change"""
+    manifests = {}
+
+    def convert(adlfile):
+        ui_filename = processFileWithOptions(
+            adlfile, options, manifests, cache=cache)
+        if ui_filename is not None:
+            print(f"{adlfile} -> {ui_filename}")
+        for conversions in manifests.values():
+            conversions.save()
+
+    print("watching for changes, press ^C to stop")
+    try:
+        watch.watch(options.adlfiles, convert, options.watch_interval, polls)
+    except KeyboardInterrupt:
+        pass
+
+
+def profileFiles(options, cache=None):
+    """
+    convert the files one at a time, then print the profile
+
+    With ``--profile-stats``, also run cProfile and save its statistics.
+    """
+    profile = profiler.ConversionProfile()
+    manifests = {}
+    stats = None
+    if options.profile_stats is not None:
+        import cProfile
+        stats = cProfile.Profile()
+        stats.enable()
+    try:
+        for adlfile, output_path in workItems(options):
+            processFileWithOptions(
+                adlfile, options, manifests, profile, cache, output_path)
+    finally:
+        if stats is not None:
+            stats.disable()
+            stats.dump_stats(options.profile_stats)
+    for conversions in manifests.values():
+        conversions.save()
+    print(profile.report())
+    if stats is not None:
+        print(
+            f"cProfile statistics saved in {options.profile_stats}"
+            " (view with: python -m pstats)")
+    return profile
+
+
+def main():
+    if sys.argv[1:2] == ["serve"]:
+        from . import server
+        server.main(sys.argv[2:])
+        return
+    options = get_user_parameters()
+    configure_logging(options)
+    configure_widgets(options)
+    cache = getParseCache(options)
+    try:
+        parsed = cache
+        if options.related:
+            options.adlfiles, parsed = relatedFiles(options.adlfiles, cache)
+        convertWithOptions(options, parsed)
+    finally:
+        if cache is not None:
+            cache.evict()
+
+
+def relatedFiles(adl_files, cache=None):
+    """
+    these .adl files and all the screens they open or embed
+
+    Reports (as warnings) the references that are missing or cyclic.
+    Returns the files in the order to convert them (each after
+    those it refers to), and the screens parsed to find them
+    (:class:`~adl2pydm.display_graph.ParsedScreens`, to use
+    as the parse cache: they need not be parsed again).
+    """
+    graph = display_graph.DisplayGraph(cache, keep_screens=True)
+    graph.discover(adl_files)
+    report = graph.report()
+    if len(report.splitlines()) > 1:
+        logger.warning(report)
+    else:
+        logger.info(report)
+    return graph.conversionOrder(), display_graph.ParsedScreens(graph.screens, cache)
+
+
+def convertWithOptions(options, cache=None):
+    """convert the files as directed by the command line options"""
+    if options.watch:
+        watchFiles(options, cache=cache)
+        return
+
+    if options.profile or options.profile_stats is not None:
+        profileFiles(options, cache)
+        return
+
+    work = workItems(options)
+    groups = None
+    output_paths = None
+    if options.dedup:
+        output_paths = OrderedDict(work)
+        groups = dedup.groupDuplicates(output_paths)
+        work = [(adlfile, output_paths[adlfile]) for adlfile in groups]
+
+    if options.jobs is not None:
+        results = []
+        screens = None
+        if isinstance(cache, display_graph.ParsedScreens):
+            screens = cache
+        for adlfile, err in convertWork(work, options.jobs, options, screens):
+            if err is not None:
+                logger.error(f"error processing {adlfile}: {err}")
+            results.append((adlfile, err))
+        if groups is not None:
+            failures = {fname: err for fname, err in results if err is not None}
+            results += placeDuplicates(groups, options, failures, output_paths)
+        print(summarize(results))
+        return
+
+    manifests = {}
+    failures = {}
+    for adlfile, output_path in work:
+        ui_filename = processFileWithOptions(
+            adlfile, options, manifests, cache=cache, output_path=output_path)
+        if ui_filename is None:
+            failures[adlfile] = "not converted"
+    for conversions in manifests.values():
+        conversions.save()
+    if groups is not None:
+        placeDuplicates(groups, options, failures, output_paths)
+
+
+def workItems(options):
+    """
+    yield ``(adl_filename, output_path)`` for each file to convert
+
+    The files given, then those found with ``--recursive``
+    (as they are found).
+    """
     for adlfile in options.adlfiles:
-        try:
-            processFile(adlfile, options.dir)
-        except Exception as exc:
-            logger.error(
-                f"error processing {adlfile}:"
-                f" {exc}"
-            )
+        yield adlfile, options.dir
+    for top in options.recursive:
+        yield from tree.treeWork(
+            top, options.dir, options.include, options.exclude)
+
+
+def placeDuplicates(groups, options, failures, output_paths=None):
+    """write the .ui files of the duplicates, as directed by --dedup"""
+    results = []
+    for adlfile, err in dedup.placeDuplicates(
+            groups, options.dir, options.dedup_mode, failures, output_paths):
+        if err is not None:
+            logger.error(f"error processing {adlfile}: {err}")
+        results.append((adlfile, err))
+    n = sum(len(duplicates) for duplicates in groups.values())
+    if n > 0:
+        logger.info(f"{n} duplicate file(s) not converted again ({options.dedup_mode})")
+    return results
 
 
 # if __name__ == "__main__":
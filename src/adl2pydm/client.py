@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+
+"""
+convert .adl files with a running ``adl2pydm serve`` daemon
+
+Only rely on packages in the standard Python distribution.
+
+The daemon (:mod:`adl2pydm.server`) has adl2pydm already imported and
+its caches warm, so each conversion costs only the conversion.  This
+client imports nothing else from adl2pydm::
+
+    adl2pydm serve &
+    adl2pydm-client -d ui screens/*.adl
+
+PROTOCOL
+
+One JSON object per line, each way, on a Unix socket.  A request
+has a *command*, the response has a *status* (``ok`` or ``error``)::
+
+    {"command": "convert", "files": [...], "output": "dir", "incremental": false}
+    {"status": "ok", "results": [{"file": "...", "output": "....ui", "error": null}]}
+
+    {"command": "status"}
+    {"status": "ok", "pid": 1234, "version": "...", "requests": 3, ...}
+
+    {"command": "shutdown"}
+    {"status": "ok"}
+
+File names are absolute (the daemon may run in another directory).
+An ``output`` of ``null`` writes each .ui file beside its .adl file.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+
+
+ENV_SOCKET = "ADL2PYDM_SOCKET"
+
+
+def defaultSocketPath():
+    """the socket of this user's daemon (or ``$ADL2PYDM_SOCKET``)"""
+    path = os.environ.get(ENV_SOCKET)
+    if path:
+        return path
+    path = os.environ.get("XDG_RUNTIME_DIR")
+    if path:
+        return os.path.join(path, "adl2pydm.sock")
+    return os.path.join("/tmp", f"adl2pydm-{os.getuid()}.sock")
+
+
+class Client(object):
+    """
+    connection to an ``adl2pydm serve`` daemon
+
+    Can be used for many requests, or as a context manager.
+    """
+
+    def __init__(self, socket_path=None, timeout=None):
+        self.socket_path = socket_path or defaultSocketPath()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(self.socket_path)
+        except OSError:
+            self.sock.close()
+            raise
+        self.fp = self.sock.makefile("rwb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.fp.close()
+        self.sock.close()
+
+    def request(self, command, **kwargs):
+        """send one request, return the response (dict)"""
+        kwargs["command"] = command
+        self.fp.write(json.dumps(kwargs).encode() + b"\n")
+        self.fp.flush()
+        line = self.fp.readline()
+        if not line:
+            raise ConnectionError(f"no response from {self.socket_path}")
+        return json.loads(line)
+
+    def convert(self, adl_files, output_path=None, incremental=False):
+        """
+        convert the .adl files, return the results
+
+        Returns a list of dict with ``file``, ``output`` (the .ui file,
+        ``None`` if not converted), and ``error`` (``None`` if converted).
+        """
+        response = self.request(
+            "convert",
+            files=[os.path.abspath(f) for f in adl_files],
+            output=None if output_path is None else os.path.abspath(output_path),
+            incremental=incremental,
+        )
+        if response.get("status") != "ok" and "results" not in response:
+            raise ValueError(response.get("error", "conversion failed"))
+        return response["results"]
+
+
+def get_user_parameters(args=None):
+    doc = __doc__.strip().splitlines()[0]
+    parser = argparse.ArgumentParser(prog="adl2pydm-client", description=doc)
+
+    parser.add_argument(
+        'adlfiles',
+        action='store',
+        nargs=argparse.ZERO_OR_MORE,
+        help="MEDM '.adl' file(s) to convert",
+        )
+
+    msg =  "output directory"
+    msg += ", default: same directory as input file"
+    parser.add_argument(
+        '-d',
+        '--dir',
+        action='store',
+        dest='dir',
+        help=msg,
+        default=None)
+
+    msg =  "only convert files changed since last converted"
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help=msg,
+        default=False)
+
+    msg = f"daemon socket, default: {defaultSocketPath()}"
+    parser.add_argument(
+        '--socket',
+        action='store',
+        dest='socket',
+        help=msg,
+        default=None)
+
+    msg =  "print the daemon's status"
+    parser.add_argument(
+        '--status',
+        action='store_true',
+        help=msg,
+        default=False)
+
+    msg =  "stop the daemon"
+    parser.add_argument(
+        '--stop',
+        action='store_true',
+        help=msg,
+        default=False)
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """returns the exit status: 0 if all converted"""
+    options = get_user_parameters(args)
+    try:
+        client = Client(options.socket)
+    except OSError as exc:
+        path = options.socket or defaultSocketPath()
+        print(
+            f"adl2pydm daemon not running at {path}: {exc}"
+            " (start it with: adl2pydm serve)",
+            file=sys.stderr)
+        return 2
+
+    status = 0
+    with client:
+        if options.status:
+            print(json.dumps(client.request("status"), indent=2))
+        if len(options.adlfiles) > 0:
+            results = client.convert(
+                options.adlfiles, options.dir, options.incremental)
+            for result in results:
+                if result["error"] is None:
+                    print(f"{result['file']} -> {result['output']}")
+                else:
+                    status = 1
+                    print(
+                        f"error processing {result['file']}: {result['error']}",
+                        file=sys.stderr)
+        if options.stop:
+            client.request("shutdown")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+
+"""
+convert MEDM .adl screens to PyDM .ui screens in memory
+
+Only rely on packages in the standard Python distribution.
+
+Use this API (instead of :func:`adl2pydm.cli.processFile`) when the
+.adl content does not come from a file or the .ui content should not
+go to a file, such as in a service that previews screens::
+
+    from adl2pydm.converter import convert_text
+
+    ui_bytes = convert_text(adl_text, "motorx.adl")
+
+In an asyncio program, :func:`convert_file` and :func:`convert_many`
+convert files without blocking the event loop::
+
+    from adl2pydm.converter import convert_many
+
+    async for adl_file, ui_file, err in convert_many(adl_files, "ui"):
+        ...
+
+Files are read and written in the event loop's default executor
+(threads), in the same text encoding as ``open()`` uses (as
+:func:`adl2pydm.cli.processFile` reads and writes them).  The parse and write stages run in the *executor* given
+(a :class:`concurrent.futures.ProcessPoolExecutor` to use more than
+one CPU), by default also in the event loop's default executor.
+"""
+
+import asyncio
+import io
+import locale
+import os
+
+from . import adl_parser
+from . import output_handler
+
+
+DEFAULT_CONCURRENCY = 8     # conversions in progress at once
+
+
+def convert_text(adl_text, filename_hint="screen.adl", options=None):
+    """
+    convert the text of a MEDM .adl file to the content of a PyDM .ui file
+
+    Neither reads nor writes any files.
+
+    Parameters
+    ----------
+    adl_text : str or bytes
+        Content of the .adl file (bytes are decoded as UTF-8).
+    filename_hint : str
+        Name of the .adl file, used for the screen title
+        and in messages.
+    options : dict
+        Keyword options for :class:`~adl2pydm.output_handler.Widget2Pydm`,
+        such as ``dict(use_scatterplot=True)``.
+
+    Returns
+    -------
+    bytes
+        The .ui file content (UTF-8 encoded XML).
+    """
+    return _convert_screen_(adl_text, filename_hint, options)[1]
+
+
+def _convert_screen_(adl_text, filename_hint, options, encoding="utf-8"):
+    """convert_text(), also returns the screen title: ``(title, ui_bytes)``"""
+    if isinstance(adl_text, bytes):
+        adl_text = adl_text.decode(encoding)
+    screen = adl_parser.MedmMainWidget(filename_hint)
+    # read lines just as from a file opened in text mode
+    with io.StringIO(adl_text, newline=None) as lines:
+        screen.parseAdlStream(lines)
+
+    writer = output_handler.Widget2Pydm(**(options or {}))
+    with io.StringIO() as fp:
+        writer.write_ui_stream(screen, fp)
+        return writer.get_screen_title(screen), fp.getvalue().encode(encoding)
+
+
+def _read_file_(filename):
+    if not os.path.exists(filename):
+        raise ValueError("Could not find file: " + filename)
+    with open(filename, "rb") as fp:
+        return fp.read()
+
+
+def _write_file_(filename, content):
+    # replace, not write through: filename may be a link (--dedup)
+    tempname = filename + ".tmp"
+    try:
+        with open(tempname, "wb") as fp:
+            fp.write(content)
+        os.replace(tempname, filename)
+    except Exception:
+        if os.path.exists(tempname):
+            os.remove(tempname)
+        raise
+
+
+async def convert_file(adl_filename, output_path=None, options=None, executor=None):
+    """
+    convert one .adl file (asyncio), return the name of the .ui file
+
+    Writes the same .ui file as :func:`adl2pydm.cli.processFile`.
+
+    Parameters
+    ----------
+    adl_filename : str
+        Name of the .adl file.
+    output_path : str
+        Directory for the .ui file, default: same as the .adl file.
+    options : dict
+        Keyword options for :class:`~adl2pydm.output_handler.Widget2Pydm`.
+    executor : concurrent.futures.Executor
+        Where to parse and write the screen,
+        default: the event loop's default executor.
+    """
+    loop = asyncio.get_running_loop()
+    encoding = locale.getpreferredencoding(False)   # as open() does
+    adl_bytes = await loop.run_in_executor(None, _read_file_, adl_filename)
+    title, ui_bytes = await loop.run_in_executor(
+        executor, _convert_screen_, adl_bytes, adl_filename, options, encoding)
+    ui_filename = os.path.join(
+        output_path or os.path.dirname(adl_filename),
+        title + output_handler.SCREEN_FILE_EXTENSION)
+    await loop.run_in_executor(None, _write_file_, ui_filename, ui_bytes)
+    return ui_filename
+
+
+async def _iterate_(items):
+    """
+    iterate over an iterable or an async iterable
+
+    An async iterable (such as an async generator) is closed
+    when this is closed, even before its end.
+    """
+    if hasattr(items, "__aiter__"):
+        try:
+            async for item in items:
+                yield item
+        finally:
+            if hasattr(items, "aclose"):
+                await items.aclose()
+    else:
+        for item in items:
+            yield item
+
+
+async def convert_many(
+        adl_files, output_path=None, options=None, executor=None,
+        concurrency=DEFAULT_CONCURRENCY):
+    """
+    convert many .adl files (asyncio), yield each result as it is done
+
+    Yields ``(adl_filename, ui_filename, error)`` in the order the
+    conversions finish, where *error* is ``None`` when the file was
+    converted (and *ui_filename* is ``None`` when not).
+
+    No more than *concurrency* conversions are in progress at once.
+    The next name is taken from *adl_files* (an iterable or an async
+    iterable) only when a conversion is done and its result taken:
+    a caller that is slow to take the results slows the conversions.
+    Closing the generator early cancels the conversions in progress
+    and closes *adl_files* (if an async generator).
+
+    *output_path*, *options*, and *executor* are as for :func:`convert_file`.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be 1 or more, not {concurrency}")
+
+    async def convert(adl_filename):
+        try:
+            ui_filename = await convert_file(
+                adl_filename, output_path, options, executor)
+        except Exception as exc:
+            return adl_filename, None, f"{exc}"
+        return adl_filename, ui_filename, None
+
+    names = _iterate_(adl_files)
+    pending = set()
+    more = True
+    try:
+        while True:
+            while more and len(pending) < concurrency:
+                try:
+                    adl_filename = await names.__anext__()
+                except StopAsyncIteration:
+                    more = False
+                else:
+                    pending.add(asyncio.ensure_future(convert(adl_filename)))
+            if len(pending) == 0:
+                return
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        await names.aclose()
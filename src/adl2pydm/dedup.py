@@ -0,0 +1,136 @@
+
+"""
+convert identical copies of a screen once
+
+Only rely on packages in this project or from the standard Python distribution.
+
+Installations often keep copies of the same .adl file under several
+directories.  The .ui file depends only on the content of the .adl
+file and on its name (the name of the .ui file and the window title),
+so the files with the same content (SHA-256) and the same name need
+to be converted only once: :func:`groupDuplicates` finds them, and
+:func:`placeDuplicates` then copies (or links) the .ui file of the
+first one for each of the others.
+"""
+
+from collections import OrderedDict
+import logging
+import os
+import shutil
+import tempfile
+
+from . import manifest
+from . import output_handler
+
+
+DEDUP_MODES = ("copy", "hardlink", "symlink")
+
+logger = logging.getLogger(__name__)
+
+
+def screenName(adl_filename):
+    """name of the screen: its .adl file name, without the extension"""
+    return os.path.splitext(os.path.basename(adl_filename))[0]
+
+
+def uiFilename(adl_filename, output_path=None):
+    """
+    name of the .ui file written for this .adl file
+
+    (A screen's title, thus its .ui file name, is its .adl file name.)
+    """
+    return os.path.join(
+        output_path or os.path.dirname(adl_filename),
+        output_handler.replaceExtension(os.path.basename(adl_filename)))
+
+
+def groupDuplicates(adl_files):
+    """
+    group the .adl files that give the same .ui file
+
+    Returns an OrderedDict of ``first file: [files like it]``,
+    in the order of *adl_files* (each file given once).
+    A file that cannot be read is in a group of its own
+    (its conversion reports the error).
+    """
+    groups = OrderedDict()
+    firsts = {}     # (content digest, screen name): first file
+    for adl_filename in adl_files:
+        if adl_filename in groups:
+            continue
+        try:
+            key = (manifest.fileDigest(adl_filename), screenName(adl_filename))
+        except OSError:
+            groups[adl_filename] = []
+            continue
+        first = firsts.setdefault(key, adl_filename)
+        if first == adl_filename:
+            groups[adl_filename] = []
+        elif adl_filename not in groups[first]:
+            groups[first].append(adl_filename)
+    return groups
+
+
+def placeFile(source, target, mode="copy"):
+    """
+    make *target* the same as file *source*: a copy, a hard link, or a symbolic link
+
+    Replaces *target* (atomically) if it exists.
+    """
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"mode must be one of {DEDUP_MODES}, not {mode!r}")
+    if os.path.abspath(source) == os.path.abspath(target):
+        return
+    path = os.path.dirname(os.path.abspath(target))
+    fd, tempname = tempfile.mkstemp(suffix=".tmp", dir=path)
+    os.close(fd)
+    try:
+        if mode == "copy":
+            shutil.copyfile(source, tempname)
+            shutil.copymode(source, tempname)   # not mkstemp's 0600
+        else:
+            os.remove(tempname)     # link needs a new name
+            if mode == "hardlink":
+                os.link(source, tempname)
+            else:
+                os.symlink(os.path.relpath(os.path.abspath(source), path), tempname)
+        os.replace(tempname, target)
+    except Exception:
+        if os.path.lexists(tempname):
+            os.remove(tempname)
+        raise
+
+
+def placeDuplicates(
+        groups, output_path=None, mode="copy", failures=None, output_paths=None):
+    """
+    write the .ui file of each duplicate from that of its first file
+
+    *groups* is from :func:`groupDuplicates`.  *failures* is a dict
+    of ``first file: error`` for the first files not converted:
+    their duplicates are not either.  *output_paths* is a dict of
+    ``.adl file: output directory`` for files not written
+    in *output_path*.
+
+    Yields ``(adl_filename, error)`` for each duplicate, where *error*
+    is ``None`` when its .ui file was written.
+    """
+    failures = failures or {}
+    output_paths = output_paths or {}
+    for first, duplicates in groups.items():
+        source = uiFilename(first, output_paths.get(first, output_path))
+        for adl_filename in duplicates:
+            err = failures.get(first)
+            if err is None and not os.path.exists(source):
+                err = f"{source} (from {first}) not found"
+            if err is None:
+                target = uiFilename(
+                    adl_filename, output_paths.get(adl_filename, output_path))
+                try:
+                    placeFile(source, target, mode)
+                    logger.info(f"{adl_filename} -> {target} (same as {first})")
+                except Exception as exc:
+                    err = f"{exc}"
+            elif first in failures:
+                err = f"same as {first}: {err}"
+            yield adl_filename, err
@@ -0,0 +1,265 @@
+
+"""
+find all the .adl screens that a screen opens or embeds
+
+Only rely on packages in this project or from the standard Python distribution.
+
+A screen refers to other screens by name, from its related display
+widgets (``display[n]`` name) and from composites that embed another
+file (``composite file``).  :class:`DisplayGraph` follows these
+references (parsing, not converting, each screen once) to find all
+the screens needed by the top-level screens, and reports the
+references that are missing or cyclic.  The screens it parsed can
+then be converted without parsing them again (:class:`ParsedScreens`).
+
+A name is looked for in the directory of the screen that refers to
+it, then as :func:`~adl2pydm.output_handler.findFile` does
+(the current directory, then ``PYDM_DISPLAYS_PATH``), then in
+``EPICS_DISPLAY_PATH`` (as MEDM does).
+"""
+
+from collections import OrderedDict, deque, namedtuple
+import logging
+import os
+
+from . import adl_parser
+from . import output_handler
+from .watch import ADL_FILE_EXTENSION
+
+
+ENV_EPICS_DISPLAY_PATH = "EPICS_DISPLAY_PATH"
+
+logger = logging.getLogger(__name__)
+
+Reference = namedtuple("Reference", "name line kind path")
+Reference.__doc__ = """
+a reference from one screen to another
+
+name : the name, as written in the screen
+line : line number of the widget in the screen
+kind : ``related display`` or ``composite file``
+path : the .adl file found, ``None`` if not found
+"""
+
+
+def widgetReferences(parent):
+    """yield ``(name, line, kind)`` for the screens named by these widgets"""
+    for widget in parent.widgets:
+        for display in getattr(widget, "displays", []):
+            name = display.get("name", "").strip()
+            if len(name) > 0:
+                yield name, widget.adl_line, "related display"
+        if widget.symbol == "composite":
+            name = widget.contents.get("composite file", "").split(";")[0]
+            name = name.strip()
+            if len(name) > 0:
+                yield name, widget.adl_line, "composite file"
+            yield from widgetReferences(widget)
+
+
+def findDisplayCandidates(name, referrer):
+    """names to try, in order, for screen *name* used in file *referrer*"""
+    if os.path.splitext(name)[1] == "":
+        name += ADL_FILE_EXTENSION
+    if os.path.isabs(name):
+        return [name]
+    candidates = [os.path.join(os.path.dirname(referrer), name)]
+    candidates += output_handler.findFileCandidates(name)
+    path = os.environ.get(ENV_EPICS_DISPLAY_PATH)
+    if path is not None:
+        candidates += [
+            os.path.join(p, name)
+            for p in path.split(os.pathsep)
+            if len(p) > 0
+        ]
+    return candidates
+
+
+def findDisplay(name, referrer):
+    """the .adl file of screen *name* used in file *referrer*, None if not found"""
+    if "$(" in name:
+        return None     # cannot know the macro values here
+    for candidate in findDisplayCandidates(name, referrer):
+        if os.path.isfile(candidate):
+            return os.path.abspath(candidate)
+    return None
+
+
+class DisplayGraph(object):
+    """
+    the screens reachable from some top-level screens
+
+    PARAMS
+
+    parse_cache (obj) :
+        :class:`~adl2pydm.parse_cache.ParseCache` to parse the
+        screens, default: parse each file
+    keep_screens (bool) :
+        keep the parsed screens (in :attr:`screens`), default: False
+    """
+
+    def __init__(self, parse_cache=None, keep_screens=False):
+        self.parse_cache = parse_cache
+        self.keep_screens = keep_screens
+        self.references = OrderedDict()     # file: [Reference]
+        self.errors = OrderedDict()         # file: could not parse
+        self.screens = OrderedDict()        # file: MedmMainWidget
+
+    def parse(self, adl_filename):
+        if self.parse_cache is not None:
+            screen = self.parse_cache.parse(adl_filename)
+        else:
+            screen = adl_parser.MedmMainWidget(adl_filename)
+            screen.parseAdlFile()
+        if self.keep_screens:
+            self.screens[adl_filename] = screen
+        return screen
+
+    def discover(self, adl_files):
+        """follow all references from these screens, in breadth-first order"""
+        queue = deque(os.path.abspath(f) for f in adl_files)
+        while len(queue) > 0:
+            adl_filename = queue.popleft()
+            if adl_filename in self.references:
+                continue
+            references = []
+            self.references[adl_filename] = references
+            try:
+                screen = self.parse(adl_filename)
+            except Exception as exc:
+                self.errors[adl_filename] = f"{exc}"
+                continue
+            known = set()
+            for name, line, kind in widgetReferences(screen):
+                path = findDisplay(name, adl_filename)
+                logger.debug(f"{adl_filename}:{line}: {kind} {name} -> {path}")
+                references.append(Reference(name, line, kind, path))
+                if path is not None and path not in known:
+                    known.add(path)
+                    queue.append(path)
+        return self
+
+    @property
+    def files(self):
+        """all the screens found (that could be parsed)"""
+        return [f for f in self.references if f not in self.errors]
+
+    def missing(self):
+        """``(file, Reference)`` for each reference not found"""
+        return [
+            (adl_filename, ref)
+            for adl_filename, references in self.references.items()
+            for ref in references
+            if ref.path is None
+        ]
+
+    def dependencies(self, adl_filename):
+        """the screens found that this screen refers to, each one once"""
+        return list(OrderedDict.fromkeys(
+            ref.path
+            for ref in self.references.get(adl_filename, [])
+            if ref.path is not None
+        ))
+
+    def walk(self):
+        """
+        depth-first search of all the screens
+
+        Yields ``("cycle", [files])`` for each reference back to a
+        screen still being searched, and ``("done", file)`` when all
+        the references from a screen have been searched.
+        """
+        state = {}      # file: "open" while on the path, then "done"
+        for root in self.references:
+            if root in state:
+                continue
+            state[root] = "open"
+            path = [root]
+            stack = [iter(self.dependencies(root))]
+            while len(stack) > 0:
+                dep = next(stack[-1], None)
+                if dep is None:
+                    node = path.pop()
+                    stack.pop()
+                    state[node] = "done"
+                    yield "done", node
+                elif state.get(dep) == "open":
+                    yield "cycle", path[path.index(dep):] + [dep]
+                elif dep not in state:
+                    state[dep] = "open"
+                    path.append(dep)
+                    stack.append(iter(self.dependencies(dep)))
+
+    def cycles(self):
+        """each cycle of references, as a list of files"""
+        return [item for event, item in self.walk() if event == "cycle"]
+
+    def conversionOrder(self):
+        """
+        the screens, each after the screens it refers to
+
+        (Within a cycle, the order is arbitrary.)
+        """
+        return [
+            item
+            for event, item in self.walk()
+            if event == "done" and item not in self.errors
+        ]
+
+    def report(self):
+        """text summary of the screens found, missing, and cyclic"""
+        lines = [
+            f"found {len(self.files)} screen(s)"
+            f" from {len(self.references)} file(s)"
+        ]
+        for adl_filename, err in self.errors.items():
+            lines.append(f"  ERROR {adl_filename}: {err}")
+        for adl_filename, ref in self.missing():
+            lines.append(
+                f"  MISSING {adl_filename}:{ref.line}:"
+                f" {ref.kind} {ref.name}")
+        for cycle in self.cycles():
+            lines.append("  CYCLE " + " -> ".join(cycle))
+        return "\n".join(lines)
+
+
+class ParsedScreens(object):
+    """
+    screens parsed already, given out once each, as a parse cache
+
+    Use as the *parse_cache* of :func:`~adl2pydm.cli.processFile`
+    to convert the screens found by a :class:`DisplayGraph` (with
+    *keep_screens*) without parsing them again.  A screen is given
+    out only once (writing it changes it) and other files are parsed
+    with *parse_cache* (or from the file).
+
+    PARAMS
+
+    screens (dict) :
+        ``file: MedmMainWidget``, as :attr:`DisplayGraph.screens`
+    parse_cache (obj) :
+        :class:`~adl2pydm.parse_cache.ParseCache` for the other files,
+        default: parse each file
+    """
+
+    def __init__(self, screens, parse_cache=None):
+        self.screens = {
+            os.path.abspath(f): screen
+            for f, screen in screens.items()
+        }
+        self.parse_cache = parse_cache
+
+    def take(self, adl_filename):
+        """the screen parsed from this file (only once), None if not here"""
+        return self.screens.pop(os.path.abspath(adl_filename), None)
+
+    def parse(self, adl_filename, digest=None):
+        """the parsed screen of this file"""
+        screen = self.take(adl_filename)
+        if screen is not None:
+            return screen
+        if self.parse_cache is not None:
+            return self.parse_cache.parse(adl_filename, digest)
+        screen = adl_parser.MedmMainWidget(adl_filename)
+        screen.parseAdlFile()
+        return screen
@@ -0,0 +1,111 @@
+
+"""
+geometry of MEDM widgets: positions, sizes, and points
+
+Only rely on packages in the standard Python distribution.
+(NumPy is used, if installed, to translate long lists of points.)
+
+The points of a polyline or polygon are kept in two arrays (x and y)
+of a :class:`PointArray` rather than in one object per point, and
+are translated and formatted for the .ui file in one pass
+(:func:`pointStrings`).
+
+MEDM positions all widgets from the origin of the screen, PyDM
+positions the widgets of a composite from the origin of the composite.
+:func:`layoutComposites` moves all the widgets in composites, at any
+depth, in one pass over the screen before it is written.
+"""
+
+from array import array
+from collections import namedtuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+"""MEDM's object block contains the widget geometry"""
+Geometry = namedtuple('Geometry', 'x y width height')
+
+"""MEDM's points item: points = [Point]"""
+Point = namedtuple('Point', 'x y')
+
+NUMPY_MIN_POINTS = 256  # NumPy is faster only for more points than this
+
+
+class PointArray(object):
+    """
+    the points of a widget, as a sequence of :class:`Point`
+
+    Stored as two arrays of int (``x`` and ``y``), not as objects.
+    """
+
+    __slots__ = ("x", "y")
+
+    def __init__(self, points=()):
+        self.x = array("l")
+        self.y = array("l")
+        for x, y in points:
+            self.append(x, y)
+
+    def append(self, x, y):
+        self.x.append(x)
+        self.y.append(y)
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, index):
+        return Point(self.x[index], self.y[index])
+
+    def __iter__(self):
+        return map(Point, self.x, self.y)
+
+    def __eq__(self, other):
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented   # not a sequence of points
+
+    def __repr__(self):
+        return f"PointArray({list(self)})"
+
+
+def pointStrings(points, dx, dy):
+    """
+    the points moved by (-dx, -dy), as text for the .ui file: ``"x, y"``
+
+    *points* is a :class:`PointArray` (or any sequence of :class:`Point`).
+    """
+    if not isinstance(points, PointArray):
+        points = PointArray(points)
+    if numpy is not None and len(points) >= NUMPY_MIN_POINTS:
+        xs = (numpy.asarray(points.x) - dx).tolist()
+        ys = (numpy.asarray(points.y) - dy).tolist()
+    else:
+        xs = [x - dx for x in points.x]
+        ys = [y - dy for y in points.y]
+    return list(map("%d, %d".__mod__, zip(xs, ys)))
+
+
+def layoutComposites(widgets):
+    """
+    move the widgets in composites: from the screen's origin to the composite's
+
+    One pass (without recursion) over all the composites in *widgets*,
+    at any depth.  Each widget of a composite is moved by the
+    position of its composite *after* that composite was moved,
+    as ``write_block_composite()`` did before this pass.
+    Changes the widgets' ``geometry``: call once for each screen.
+    """
+    stack = [w for w in widgets if len(getattr(w, "widgets", [])) > 0]
+    while len(stack) > 0:
+        composite = stack.pop()
+        x0 = composite.geometry.x
+        y0 = composite.geometry.y
+        for widget in composite.widgets:
+            geom = widget.geometry
+            widget.geometry = Geometry(geom.x - x0, geom.y - y0, geom.width, geom.height)
+            if len(getattr(widget, "widgets", [])) > 0:
+                stack.append(widget)
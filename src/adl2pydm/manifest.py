@@ -0,0 +1,128 @@
+
+"""
+record which .adl files have been converted, to skip unchanged files
+
+Only rely on packages in the standard Python distribution.
+
+The manifest is a JSON file in the output directory.  For each
+.adl file converted, it records the content hash of the .adl file,
+the adl2pydm version, the settings that affect the output, and the
+.ui file written.  A file need not be converted again when all of
+these are unchanged and the .ui file has not been modified since.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+
+MANIFEST_FILE = ".adl2pydm_manifest.json"
+
+logger = logging.getLogger(__name__)
+
+
+def fileDigest(filename):
+    """return the SHA-256 hash (hex) of the file's content"""
+    digest = hashlib.sha256()
+    with open(filename, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def uiModified(ui_filename):
+    """modification time (ns) of the .ui file, None if file not found"""
+    try:
+        return os.stat(ui_filename).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ConversionManifest(object):
+    """
+    manifest of the .adl files converted into one output directory
+
+    PARAMS
+
+    output_path (str) :
+        directory of the .ui files (and the manifest file)
+
+    settings (dict) :
+        options (such as ``use_scatterplot``) that affect the output
+    """
+
+    def __init__(self, output_path, settings=None):
+        from . import __version__
+        self.filename = os.path.join(output_path, MANIFEST_FILE)
+        self.settings = dict(settings or {})
+        self.version = __version__
+        self.entries = {}
+        self.modified = False
+        self.load()
+
+    def key(self, adl_filename):
+        """manifest entries are known by absolute path of the .adl file"""
+        return os.path.abspath(adl_filename)
+
+    def load(self):
+        """read the manifest file, if it exists"""
+        if not os.path.exists(self.filename):
+            return
+        try:
+            with open(self.filename, "r") as fp:
+                self.entries = json.load(fp).get("files", {})
+        except (OSError, ValueError) as exc:
+            # an unreadable manifest only means everything is converted
+            logger.warning(f"ignoring manifest {self.filename}: {exc}")
+            self.entries = {}
+
+    def save(self):
+        """write the manifest file, if there were any changes"""
+        if not self.modified:
+            return
+        tempname = self.filename + ".tmp"
+        with open(tempname, "w") as fp:
+            json.dump(dict(files=self.entries), fp, indent=2, sort_keys=True)
+        os.replace(tempname, self.filename)
+        self.modified = False
+
+    def getEntry(self, adl_filename):
+        return self.entries.get(self.key(adl_filename))
+
+    def setEntry(self, adl_filename, entry):
+        """add an entry (such as from another process's manifest)"""
+        self.entries[self.key(adl_filename)] = entry
+        self.modified = True
+
+    def isCurrent(self, adl_filename, digest):
+        """
+        is the .ui file from this .adl file up to date?
+
+        Returns the name of the .ui file if it is current, otherwise None.
+        """
+        entry = self.getEntry(adl_filename)
+        if entry is None:
+            return None
+        ui_filename = entry.get("ui_file")
+        if (
+            entry.get("sha256") != digest
+            or entry.get("version") != self.version
+            or entry.get("settings") != self.settings
+            or ui_filename is None
+            or uiModified(ui_filename) != entry.get("ui_modified")
+        ):
+            return None
+        logger.info(f"up to date: {ui_filename}")
+        return ui_filename
+
+    def record(self, adl_filename, digest, ui_filename):
+        """remember that *adl_filename* was converted to *ui_filename*"""
+        entry = dict(
+            sha256=digest,
+            version=self.version,
+            settings=self.settings,
+            ui_file=os.path.abspath(ui_filename),
+            ui_modified=uiModified(ui_filename),
+        )
+        self.setEntry(adl_filename, entry)
@@ -5,15 +5,17 @@ write the screen in the new XML protocol
 Only rely on packages in the standard Python distribution. (rules out lxml)
 """
 
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
+import functools
 import json
 import logging
 import os
-from xml.dom import minidom
 from xml.etree import ElementTree
 
+from . import geometry
+from . import profiler
 from . import symbols
-from .adl_parser import Color, Geometry
+from .adl_parser import Color
 from .calc2rules import convertCalcToRuleExpression
 
 
@@ -26,6 +28,27 @@ DEFAULT_NUMBER_OF_POINTS = 1200
 logger = logging.getLogger(__name__)
 
 
+# Colors are interned by the parser, so the few Colors of a batch
+# of screens are formatted only once.  (caches: one per process)
+
+@functools.lru_cache(maxsize=None)
+def colorStrings(color):
+    """the red, green, and blue values of *color* as text"""
+    return str(color.r), str(color.g), str(color.b)
+
+
+@functools.lru_cache(maxsize=None)
+def colorStyle(name, color):
+    """stylesheet setting of color property *name*"""
+    return "  %s: rgb(%d, %d, %d);" % (name, *color)
+
+
+@functools.lru_cache(maxsize=None)
+def colorHex(color):
+    """*color* as #rrggbb"""
+    return "#{:02x}{:02x}{:02x}".format(*color)
+
+
 def jsonDecode(src):
     "reads rules json text from .ui file"
     return json.loads(src)
@@ -105,9 +128,15 @@ class Widget2Pydm(object):
 
     """
     
-    def __init__(self):
+    def __init__(self, use_scatterplot=False, profile=None):
         self.custom_widgets = []
+        # optional profiler.ConversionProfile to time phases and handlers
+        self.profile = profile
         self.unique_widget_names = {}
+        # PyDM widget classes to use instead of those in symbols.adl_widgets
+        self.pydm_widget_classes = {}
+        if use_scatterplot:
+            self.pydm_widget_classes["cartesian plot"] = "PyDMScatterPlot"
         self.pydm_widget_handlers = {
             "arc" : self.write_block_arc,
             "bar" : self.write_block_bar,
@@ -162,6 +191,16 @@ class Widget2Pydm(object):
         
         return unique
     
+    def timing(self, phase):
+        """context manager: time this phase if profiling"""
+        if self.profile is None:
+            return profiler.NO_TIMING
+        return self.profile.phase(phase)
+
+    def get_pydm_widget_class(self, symbol, widget_info):
+        """PyDM widget class for this MEDM widget symbol"""
+        return self.pydm_widget_classes.get(symbol, widget_info["pydm_widget"])
+
     def get_channel(self, contents):
         """return the PV channel described in the MEDM widget"""
         pv = None
@@ -176,7 +215,8 @@ class Widget2Pydm(object):
         attr = block.contents.get("dynamic attribute", {})
         if len(attr) > 0:
             # see: http://slaclab.github.io/pydm/widgets/widget_rules/index.html
-            rules = convertDynamicAttribute_to_Rules(attr)
+            with self.timing("calc"):
+                rules = convertDynamicAttribute_to_Rules(attr)
             json_rules = jsonEncode(rules)
             self.writer.writeProperty(widget, "rules", json_rules, stdset="0")
         
@@ -223,7 +263,7 @@ class Widget2Pydm(object):
 
         widget_info = symbols.adl_widgets.get(block.symbol)
         if widget_info is not None:
-            cls = widget_info["pydm_widget"]
+            cls = self.get_pydm_widget_class(block.symbol, widget_info)
             if cls not in self.custom_widgets:
                 self.custom_widgets.append(cls)
 
@@ -231,7 +271,7 @@ class Widget2Pydm(object):
             block.symbol, 
             self.write_block_default)
 
-        cls = widget_info["pydm_widget"]
+        cls = self.get_pydm_widget_class(block.symbol, widget_info)
         if cls == 'PyDMLabel' and not (block.contents.get('monitor') or
                                        block.contents.get('control')):
             # Fall back to QLabel, as there is no associated channel.
@@ -243,16 +283,21 @@ class Widget2Pydm(object):
         qw = self.writer.writeOpenTag(parent, "widget", cls=cls, name=nm)
         self.write_geometry(qw, block.geometry)
         # self.write_stylesheet(qw, block)
-        handler(parent, block, nm, qw)
+        if self.profile is None:
+            handler(parent, block, nm, qw)
+        else:
+            with self.profile.widget(block.symbol):
+                handler(parent, block, nm, qw)
         msg = "(#%d) %s -> %s: %s" % (block.line_offset, block.symbol, cls, nm)
         logger.debug(msg)
 
     def write_color_element(self, xml_element, color, **kwargs):
         if color is not None:
             item = self.writer.writeOpenTag(xml_element, "color", **kwargs)
-            self.writer.writeTaggedString(item, "red", str(color.r))
-            self.writer.writeTaggedString(item, "green", str(color.g))
-            self.writer.writeTaggedString(item, "blue", str(color.b))
+            red, green, blue = colorStrings(color)
+            self.writer.writeTaggedString(item, "red", red)
+            self.writer.writeTaggedString(item, "green", green)
+            self.writer.writeTaggedString(item, "blue", blue)
         
     def write_direction(self, qw, block):
         # up & left only used in Bar Monitor
@@ -290,21 +335,48 @@ class Widget2Pydm(object):
         font = self.writer.writeOpenTag(propty, "font")
         self.writer.writeTaggedString(font, "pointsize", str(pointsize))
 
+    def get_screen_title(self, screen):
+        """title of the screen, also the base name of its .ui file"""
+        return screen.title or os.path.split(os.path.splitext(screen.given_filename)[0])[-1]
+
     def write_ui(self, screen, output_path):
-        """main entry point to write the .ui file"""
-        window_class = "QWidget"
-        # window_class = "QMainWindow"
-        title = screen.title or os.path.split(os.path.splitext(screen.given_filename)[0])[-1]
+        """main entry point to write the .ui file, returns the file name"""
+        title = self.get_screen_title(screen)
         ui_filename = os.path.join(output_path, title + SCREEN_FILE_EXTENSION)
         self.writer = PYDM_Writer(None)
 
-        root = self.writer.openFile(ui_filename)
+        with self.timing("stylesheet"):
+            root = self.writer.openFile(ui_filename)
         logging.info("writing screen file: " + ui_filename)
+        with self.timing("build"):
+            self.write_screen(root, screen)
+        with self.timing("write"):
+            self.writer.closeFile()
+        return ui_filename
+
+    def write_ui_stream(self, screen, fp):
+        """write the .ui file content to file object *fp* (opens no files)"""
+        self.writer = PYDM_Writer(None)
+        root = self.writer.newDocument()
+        with self.timing("build"):
+            self.write_screen(root, screen)
+        with self.timing("write"):
+            self.writer.writeDocument(fp)
+
+    def write_screen(self, root, screen):
+        """create the .ui file content for the screen"""
+        window_class = "QWidget"
+        # window_class = "QMainWindow"
+        title = self.get_screen_title(screen)
         self.writer.writeTaggedString(root, "class", "Dialog")
         form = self.writer.writeOpenTag(root, "widget", cls=window_class, name="screen")
         
         self.write_geometry(form, screen.geometry)
         self.write_stylesheet(form, screen)
+
+        # in MEDM, composites use absolute positioning
+        # in PyDM, composites use relative positioning
+        geometry.layoutComposites(screen.widgets)
     
         propty = self.writer.writeOpenProperty(form, "windowTitle")
         self.writer.writeTaggedString(propty, value=title)
@@ -325,8 +397,6 @@ class Widget2Pydm(object):
     
         # TODO: write .ui file <resources/> elements here (#9)
         # TODO: write .ui file <connections/> elements here (#10)
-        
-        self.writer.closeFile()
     
     def writePropertyBoolean(self, widget, tag, value, **kwargs):
         self.writer.writeProperty(widget, tag, str(value).lower(), tag="bool", **kwargs)
@@ -503,7 +573,7 @@ class Widget2Pydm(object):
                 # if x_channel is missing, y_channel is plotted aginst index
                 x_channel = trace.get("xdata"),
                 y_channel = trace.get("ydata"),
-                color = "#{:02x}{:02x}{:02x}".format(*trace["color"]),
+                color = colorHex(trace["color"]),
                 lineStyle = 1,          # NoLine Solid Dash Dot DashDot DashDotDot
                 lineWidth = trace.get("lineWidth", 1),
                 symbol = trace.get("symbol"),
@@ -551,18 +621,8 @@ class Widget2Pydm(object):
     def write_block_composite(self, parent, block, nm, qw):
         # self.write_tooltip(qw, nm)
         self.write_dynamic_attribute(qw, block)
-        x0 = block.geometry.x
-        y0 = block.geometry.y
+        # widgets already moved to the composite's origin: see write_screen()
         for widget in block.widgets:
-            # in MEDM, composites use absolute positioning
-            # in PyDM, composites use relative positioning
-            # subtract x,y of the composite from each widget
-            widget.geometry = Geometry(
-                widget.geometry.x - x0,
-                widget.geometry.y - y0,
-                widget.geometry.width,
-                widget.geometry.height,
-            )
             self.write_block(qw, widget)
 
     def write_block_embedded_display(self, parent, block, nm, qw):
@@ -684,12 +744,11 @@ class Widget2Pydm(object):
             logger.critical(f"penWidth: {exc}")
             penWidth = 1
 
-        pt_list = []
-        for pt in block.points:
-            # translate global to local
-            x = pt.x - block.geometry.x - penWidth
-            y = pt.y - block.geometry.y - penWidth
-            pt_list.append("%d, %d" % (x, y))
+        # translate global to local
+        pt_list = geometry.pointStrings(
+            block.points,
+            block.geometry.x + penWidth,
+            block.geometry.y + penWidth)
         self.writePropertyStringlist(qw, "points", pt_list, stdset="0")
 
     def write_block_polyline(self, parent, block, nm, qw):
@@ -708,12 +767,11 @@ class Widget2Pydm(object):
         if pv is not None:
             self.write_channel(qw, pv)
 
-        pt_list = []
-        for pt in block.points:
-            # translate global to local
-            x = pt.x - block.geometry.x - penWidth
-            y = pt.y - block.geometry.y - penWidth
-            pt_list.append("%d, %d" % (x, y))
+        # translate global to local
+        pt_list = geometry.pointStrings(
+            block.points,
+            block.geometry.x + penWidth,
+            block.geometry.y + penWidth)
         self.writePropertyStringlist(qw, "points", pt_list, stdset="0")
 
     def write_block_rectangle(self, parent, block, nm, qw):
@@ -805,9 +863,8 @@ class Widget2Pydm(object):
 
             curves = []
             for v in block.contents["pens"]:
-                c = v["color"]
                 trace = dict(
-                    color = "#%02x%02x%02x" % (c.r, c.g, c.b),
+                    color = colorHex(v["color"]),
                     # MEDM only supports Solid line with color, width=1
                     lineStyle = 1,          # NoLine Solid Dash Dot DashDot DashDotDot
                     lineWidth = 1,
@@ -943,12 +1000,11 @@ class Widget2Pydm(object):
             others = kwargs.pop("extra_classes")
 
         parts = []
-        fmt = "  %s: rgb(%d, %d, %d);"
         if block.color is not None:
-            parts.append(fmt % ("color", *block.color))
+            parts.append(colorStyle("color", block.color))
 
         if block.background_color is not None:
-            parts.append(fmt % ("background-color", *block.background_color))
+            parts.append(colorStyle("background-color", block.background_color))
 
         for k, v in kwargs.items():
             parts.append(f"  {k}: {v};")
@@ -1121,8 +1177,12 @@ class PYDM_Writer(object):
     write the screen description to a PyDM .ui file
     """
 
-    def __init__(self, adlParser):
+    def __init__(self, adlParser, lookup_cache=None):
         self.adlParser = adlParser
+        # shared by all writers unless another cache is given
+        if lookup_cache is None:
+            lookup_cache = file_lookup_cache
+        self.lookup_cache = lookup_cache
         self.filename = None
         self.path = None
         self.file_suffix = SCREEN_FILE_EXTENSION
@@ -1137,16 +1197,15 @@ class PYDM_Writer(object):
             msg = "Environment variable %s is not defined." % "PYDM_DISPLAYS_PATH"
             logger.info(msg)
 
-        sfile = findFile(QT_STYLESHEET_FILE)
+        sfile = self.lookup_cache.findFile(QT_STYLESHEET_FILE)
         if sfile is None:
             msg = "file not found: " + QT_STYLESHEET_FILE
             logger.info(msg)
         else:
-            with open(sfile, "r") as fp:
-                self.stylesheet = fp.read()
-                msg = "Using stylesheet file in .ui files: " + sfile
-                msg += "\n  unset %d to not use any stylesheet" % ENV_PYDM_DISPLAYS_PATH
-                logger.info(msg)
+            self.stylesheet = self.lookup_cache.readFile(sfile)
+            msg = "Using stylesheet file in .ui files: " + sfile
+            msg += "\n  unset %s to not use any stylesheet" % ENV_PYDM_DISPLAYS_PATH
+            logger.info(msg)
         
         # adl2ui opened outFile here AND started to write XML-like content
         # that is not necessary now
@@ -1155,15 +1214,32 @@ class PYDM_Writer(object):
             logger.info(msg)
         self.outFile = outFile
         
+        # write the XML to the file in the close() method
+        return self.newDocument()
+
+    def newDocument(self):
+        """begin to create the .ui file content IN MEMORY"""
         # Qt .ui files are XML, use XMl tools to create the content
         # create the XML file root element
         self.root = ElementTree.Element("ui", attrib=dict(version="4.0"))
-        # write the XML to the file in the close() method
-        
         return self.root
 
     def closeFile(self):
         """finally, write .ui file (XML content)"""
+        # write a new file, then replace outFile with it:
+        # outFile may be a link (--dedup) to the .ui file of another screen
+        tempname = self.outFile + ".tmp"
+        try:
+            with open(tempname, "w") as f:
+                self.writeDocument(f)
+            os.replace(tempname, self.outFile)
+        except Exception:
+            if os.path.exists(tempname):
+                os.remove(tempname)
+            raise
+
+    def writeDocument(self, fp):
+        """write the .ui file (XML content) to file object *fp*"""
         
         def sorter(widget):
             return widget.order
@@ -1176,10 +1252,7 @@ class PYDM_Writer(object):
 
         # ElementTree needs help to pretty print
         # (easier in lxml but that's an additional package to add)
-        text = ElementTree.tostring(self.root)
-        xmlstr = minidom.parseString(text).toprettyxml(indent=" "*2)
-        with open(self.outFile, "w") as f:
-            f.write(xmlstr)
+        writePrettyXml(self.root, fp, indent=" "*2)
 
     def writeProperty(self, parent, name, value, tag="string", **kwargs):
         prop = self.writeOpenTag(parent, "property", name=name)
@@ -1219,11 +1292,8 @@ class PYDM_Writer(object):
     # def writeMessage(self, mess): ...        # nothing to do
 
 
-def findFile(fname):
-    """look for file in PYDM_DISPLAYS_PATH"""
-    if fname is None or len(fname) == 0:
-        return None
-    
+def findFileCandidates(fname):
+    """names to try, in order, when looking for file in PYDM_DISPLAYS_PATH"""
     if os.name =="nt":
         delimiter = ";"
     else:
@@ -1235,14 +1305,154 @@ def findFile(fname):
     else:
         paths = path.split(delimiter)
 
-    if os.path.exists(fname):
-        # found it in current directory
-        return fname
-    
-    for path in paths:
-        path_fname = os.path.join(path, fname)
+    # first, the current directory, then the DISPLAYS path
+    return [fname] + [os.path.join(path, fname) for path in paths]
+
+
+def findFile(fname):
+    """look for file in PYDM_DISPLAYS_PATH"""
+    if fname is None or len(fname) == 0:
+        return None
+
+    for path_fname in findFileCandidates(fname):
         if os.path.exists(path_fname):
-            # found it in the DISPLAYS path
             return path_fname
 
     return None
+
+
+def _mtime_ns_(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class FileLookupCache(object):
+    """
+    remember where findFile() found each file, and what it contains
+
+    One cache is shared by all :class:`PYDM_Writer` objects
+    (``file_lookup_cache``) so a batch of conversions finds and
+    reads each file (such as the stylesheet) only once.
+
+    A location is searched again when the modified time of a
+    directory in the search changes (a file was added or removed)
+    or that of the file found.  A file is read again when its
+    modified time or size changes.
+    """
+
+    def __init__(self):
+        # (fname, PYDM_DISPLAYS_PATH, cwd): (location, signature)
+        self.locations = {}
+        # location: ((modified time, size), text)
+        self.contents = {}
+        self.searches = 0
+        self.reads = 0
+
+    def clear(self):
+        self.locations = {}
+        self.contents = {}
+
+    def _signature_(self, candidates, location):
+        if location is not None:
+            # directories after the one with the file do not matter
+            candidates = candidates[:candidates.index(location)+1]
+        dirs = [os.path.dirname(os.path.abspath(c)) for c in candidates]
+        signature = [_mtime_ns_(d) for d in OrderedDict.fromkeys(dirs)]
+        if location is not None:
+            signature.append(_mtime_ns_(location))
+        return tuple(signature)
+
+    def findFile(self, fname):
+        """look for file in PYDM_DISPLAYS_PATH, as findFile() does"""
+        if fname is None or len(fname) == 0:
+            return None
+
+        key = (fname, os.environ.get(ENV_PYDM_DISPLAYS_PATH), os.getcwd())
+        candidates = findFileCandidates(fname)
+        if key in self.locations:
+            location, signature = self.locations[key]
+            if self._signature_(candidates, location) == signature:
+                return location
+
+        self.searches += 1
+        location = findFile(fname)
+        signature = self._signature_(candidates, location)
+        self.locations[key] = (location, signature)
+        return location
+
+    def readFile(self, filename):
+        """contents of the text file, read again only when it changes"""
+        st = os.stat(filename)
+        signature = (st.st_mtime_ns, st.st_size)
+        cached = self.contents.get(filename)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        self.reads += 1
+        with open(filename, "r") as fp:
+            text = fp.read()
+        self.contents[filename] = (signature, text)
+        return text
+
+
+file_lookup_cache = FileLookupCache()
+
+
+def _escape_xml_(text):
+    """escape text as xml.dom.minidom does when writing"""
+    text = text.replace("&", "&amp;").replace("<", "&lt;")
+    return text.replace("\"", "&quot;").replace(">", "&gt;")
+
+
+def _normalize_newlines_(text):
+    """an XML parser reads any line ending as a newline"""
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _write_pretty_element_(write, element, indent, addindent):
+    write(indent + "<" + element.tag)
+    for k, v in element.attrib.items():
+        write(" %s=\"%s\"" % (k, _escape_xml_(v)))
+
+    # the child nodes, as minidom would see them
+    nodes = []
+    if element.text:
+        nodes.append(element.text)
+    for child in element:
+        nodes.append(child)
+        if child.tail:
+            nodes.append(child.tail)
+
+    if len(nodes) == 0:
+        write("/>\n")
+        return
+    write(">")
+    if len(nodes) == 1 and isinstance(nodes[0], str):
+        write(_escape_xml_(_normalize_newlines_(nodes[0])))
+    else:
+        write("\n")
+        for node in nodes:
+            if isinstance(node, str):
+                text = _normalize_newlines_(node)
+                write(_escape_xml_(indent + addindent + text) + "\n")
+            else:
+                _write_pretty_element_(write, node, indent + addindent, addindent)
+        write(indent)
+    write("</%s>\n" % element.tag)
+
+
+def writePrettyXml(root, fp, indent="  "):
+    """
+    write ElementTree *root* as indented XML text to file object *fp*
+
+    Writes in one pass, straight from the ElementTree, the same text as::
+
+        minidom.parseString(ElementTree.tostring(root)).toprettyxml(indent)
+
+    without building a second document in memory.
+    """
+    write = fp.write
+    write("<?xml version=\"1.0\" ?>\n")
+    _write_pretty_element_(write, root, "", indent)
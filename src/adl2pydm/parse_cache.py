@@ -0,0 +1,183 @@
+
+"""
+keep parsed .adl screens on disk, to skip parsing unchanged files
+
+Only rely on packages in the standard Python distribution.
+
+Each parsed :class:`~adl2pydm.adl_parser.MedmMainWidget` is saved
+(with all its widgets, geometry, colors, and contents) as a pickle
+file, named by the content hash of the .adl file and by the parser
+version.  Parsing a file with the same content again loads the
+pickle instead, which is several times faster.  A new version of
+adl2pydm (or of :data:`PARSE_CACHE_VERSION`) never uses the files
+of another version; eviction removes them in time.
+
+Eviction removes files not used within *max_age* seconds, then the
+least recently used files until the cache is no larger than
+*max_bytes*.
+
+The cache directory should be writable only by its owner:
+a pickle file can run code when it is loaded.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import time
+
+from . import adl_parser
+from . import manifest
+
+
+PARSE_CACHE_VERSION = 3     # change when the parsed tree changes
+CACHE_SUFFIX = ".pickle"
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60     # seconds
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def defaultCacheDir():
+    """the user's cache directory for adl2pydm parse trees"""
+    path = os.environ.get("XDG_CACHE_HOME")
+    if not path:
+        path = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(path, "adl2pydm", "parse")
+
+
+class ParseCache(object):
+    """
+    directory of parsed .adl screens
+
+    PARAMS
+
+    path (str) :
+        cache directory (created if needed),
+        default: :func:`defaultCacheDir`
+    max_bytes (int) :
+        largest total size of the cache files
+    max_age (float) :
+        seconds since last use before a cache file is removed
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        from . import __version__
+        self.path = path or defaultCacheDir()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        tag = f"{__version__}:{PARSE_CACHE_VERSION}"
+        self.tag = hashlib.sha256(tag.encode()).hexdigest()[:12]
+        self.hits = 0
+        self.misses = 0
+
+    def cacheFile(self, digest):
+        """name of the cache file for .adl content with this SHA-256 *digest*"""
+        return os.path.join(self.path, f"{digest}-{self.tag}{CACHE_SUFFIX}")
+
+    def load(self, adl_filename, digest):
+        """the parsed screen from the cache, None if not cached"""
+        cache_file = self.cacheFile(digest)
+        try:
+            with open(cache_file, "rb") as fp:
+                screen = pickle.load(fp)
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            # a damaged cache file only means the .adl file is parsed
+            logger.warning(f"ignoring parse cache {cache_file}: {exc}")
+            self.remove(cache_file)
+            return None
+        try:
+            os.utime(cache_file)    # recently used
+        except OSError:
+            pass
+        screen.given_filename = adl_filename    # same content, any name
+        return screen
+
+    def store(self, screen, digest):
+        """save the parsed screen in the cache"""
+        os.makedirs(self.path, exist_ok=True)
+        fd, tempname = tempfile.mkstemp(suffix=".tmp", dir=self.path)
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                pickle.dump(screen, fp, pickle.HIGHEST_PROTOCOL)
+            os.replace(tempname, self.cacheFile(digest))
+        except Exception:
+            self.remove(tempname)
+            raise
+
+    def parse(self, adl_filename, digest=None):
+        """
+        parse the .adl file (or load it from the cache), return a MedmMainWidget
+
+        *digest* is the SHA-256 hash of the file's content,
+        computed here if not given.
+        """
+        screen = adl_parser.MedmMainWidget(adl_filename)
+        screen.findAdlFile()
+        digest = digest or manifest.fileDigest(adl_filename)
+        cached = self.load(adl_filename, digest)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        screen.parseAdlFile()
+        try:
+            self.store(screen, digest)
+        except OSError as exc:
+            logger.warning(f"could not save parse cache for {adl_filename}: {exc}")
+        return screen
+
+    def remove(self, filename):
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+
+    def entries(self):
+        """``(last_used, size, filename)`` of each cache file, oldest first"""
+        found = []
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if not entry.name.endswith(CACHE_SUFFIX):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue    # removed by another process
+                    found.append((st.st_mtime, st.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            # such as a file instead of a directory: cache nothing, fail nothing
+            logger.warning(f"cannot read parse cache {self.path}: {exc}")
+        return sorted(found)
+
+    def evict(self, now=None):
+        """
+        remove old cache files, then the oldest until small enough
+
+        Returns the number of files removed.
+        """
+        now = now or time.time()
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for last_used, size, filename in entries:
+            if now - last_used <= self.max_age and total <= self.max_bytes:
+                break
+            self.remove(filename)
+            total -= size
+            removed += 1
+        if removed > 0:
+            logger.info(f"removed {removed} file(s) from parse cache {self.path}")
+        return removed
+
+    def clear(self):
+        """remove all cache files"""
+        for _, _, filename in self.entries():
+            self.remove(filename)
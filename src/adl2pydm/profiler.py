@@ -0,0 +1,144 @@
+
+"""
+time the phases of each conversion and the handler of each widget type
+
+Only rely on packages in the standard Python distribution.
+
+Phase times exclude the time of any phase inside them (such as
+``calc`` inside ``build``) so the phases of a file add up to its total.
+Widget times exclude the time of widgets inside them (composites).
+"""
+
+from collections import OrderedDict
+import time
+
+
+PROFILE_PHASES = "digest parse stylesheet build calc write".split()
+
+
+class _NoTiming(object):
+    """context manager that does nothing, used when not profiling"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_TIMING = _NoTiming()
+
+
+class _Timer(object):
+    """
+    context manager: time one step, less the time of steps inside it
+
+    *record* is called with the exclusive time (seconds)
+    when the step ends.
+    """
+
+    def __init__(self, stack, record):
+        self.stack = stack
+        self.record = record
+        self.t0 = None
+        self.nested = 0
+
+    def __enter__(self):
+        self.stack.append(self)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.t0
+        self.stack.pop()
+        if len(self.stack) > 0:
+            self.stack[-1].nested += elapsed
+        self.record(elapsed - self.nested)
+        return False
+
+
+class ConversionProfile(object):
+    """
+    time spent in each phase (by file) and in each widget handler (by type)
+    """
+
+    def __init__(self):
+        self.files = OrderedDict()     # file name: {phase: seconds}
+        self.widgets = {}              # widget symbol: [count, seconds]
+        self.current = None
+        self._phase_stack = []
+        self._widget_stack = []
+
+    def file(self, adl_filename):
+        """start timing the phases of this file"""
+        self.current = self.files.setdefault(adl_filename, OrderedDict())
+        return self.current
+
+    def phase(self, name):
+        """context manager: time this phase of the current file"""
+        if self.current is None:
+            self.file("(unknown)")
+        timings = self.current
+
+        def record(seconds):
+            timings[name] = timings.get(name, 0) + seconds
+
+        return _Timer(self._phase_stack, record)
+
+    def widget(self, symbol):
+        """context manager: time the handler of one widget"""
+
+        def record(seconds):
+            stats = self.widgets.setdefault(symbol, [0, 0])
+            stats[0] += 1
+            stats[1] += seconds
+
+        return _Timer(self._widget_stack, record)
+
+    def fileTotal(self, adl_filename):
+        return sum(self.files[adl_filename].values())
+
+    def report(self):
+        """text tables: phases by file, then handlers by widget type"""
+        phases = [
+            p
+            for p in PROFILE_PHASES
+            if any(p in timings for timings in self.files.values())
+        ]
+        phases += sorted(
+            set(
+                p
+                for timings in self.files.values()
+                for p in timings
+            ).difference(phases)
+        )
+        total = sum(self.fileTotal(f) for f in self.files)
+        lines = [
+            f"profile of {len(self.files)} file(s)"
+            f", {1000*total:.2f} ms (times in ms)"
+        ]
+
+        fmt = "%-40s" + " %10s" * (len(phases) + 1)
+        lines.append(fmt % tuple(["file"] + phases + ["total"]))
+        for fname, timings in self.files.items():
+            name = fname if len(fname) <= 40 else "..." + fname[-37:]
+            values = [name]
+            values += ["%.2f" % (1000 * timings.get(p, 0)) for p in phases]
+            values.append("%.2f" % (1000 * self.fileTotal(fname)))
+            lines.append(fmt % tuple(values))
+
+        if len(self.widgets) > 0:
+            lines.append("")
+            fmt = "%-24s %8s %10s %10s"
+            lines.append(fmt % ("widget type", "count", "total", "mean"))
+            by_time = sorted(
+                self.widgets.items(), key=lambda kv: kv[1][1], reverse=True)
+            for symbol, (count, seconds) in by_time:
+                lines.append(
+                    fmt % (
+                        symbol, count,
+                        "%.2f" % (1000 * seconds),
+                        "%.3f" % (1000 * seconds / count),
+                    )
+                )
+        return "\n".join(lines)
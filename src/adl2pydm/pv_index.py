@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+
+"""
+index the PVs (EPICS channels) used by MEDM .adl screens
+
+Only rely on packages in this project or from the standard Python distribution.
+
+Parses (does not convert) every .adl file in a tree of screens, in
+parallel, and writes one record for each PV used by each widget::
+
+    pv, file, line, widget, field
+
+*pv* is the channel as written in the .adl file (with MEDM macros
+such as ``$(P)``), *line* is where the widget starts in the file,
+*widget* is its MEDM symbol, and *field* tells where the PV is used
+(``monitor.chan``, ``dynamic attribute.chanB``, ``trace[0].xdata``,
+``pen[2].chan``, ...).
+
+The index is written as SQLite (``.db`` or ``.sqlite``, with an index
+on *pv*) or as JSON Lines (any other name, or ``-`` for stdout).
+Then, which screens use a PV::
+
+    adl2pydm-index -o pvs.db /path/to/screens
+    adl2pydm-index -o pvs.db --lookup '$(P)$(M).RBV'
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import sys
+
+from . import adl_parser
+from ._options import VersionAction, positiveInt
+from .watch import ADL_FILE_EXTENSION
+
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+INDEX_FIELDS = "pv file line widget field".split()
+
+logger = logging.getLogger(__name__)
+
+
+def widgetChannels(widget):
+    """
+    yield ``(field, pv)`` for each PV named in this widget
+
+    Looks in the same places as the converter
+    (:meth:`~adl2pydm.output_handler.Widget2Pydm.get_channel`,
+    :func:`~adl2pydm.output_handler.convertDynamicAttribute_to_Rules`,
+    and the cartesian plot and strip chart handlers).
+    """
+    contents = widget.contents
+    for part in ("monitor", "control"):
+        for k in ("chan", "rdbk", "ctrl"):
+            pv = contents.get(part, {}).get(k)
+            if pv:
+                yield f"{part}.{k}", pv
+    attr = contents.get("dynamic attribute", {})
+    for k in ("chan", "chanB", "chanC", "chanD"):
+        pv = attr.get(k)
+        if pv:
+            yield f"dynamic attribute.{k}", pv
+    for i, trace in enumerate(contents.get("traces", [])):
+        for k in ("xdata", "ydata"):
+            pv = trace.get(k)
+            if pv:
+                yield f"trace[{i}].{k}", pv
+    for i, pen in enumerate(contents.get("pens", [])):
+        pv = pen.get("chan")
+        if pv:
+            yield f"pen[{i}].chan", pv
+
+
+def screenChannels(parent, adl_filename):
+    """yield an index record (tuple) for each PV in the widgets of *parent*"""
+    for widget in parent.widgets:
+        for field, pv in widgetChannels(widget):
+            yield pv, adl_filename, widget.adl_line, widget.symbol, field
+        if hasattr(widget, "widgets"):      # composite
+            yield from screenChannels(widget, adl_filename)
+
+
+def indexFile(adl_filename):
+    """
+    parse one .adl file, return ``(adl_filename, records, error)``
+
+    *error* is ``None`` when the file was parsed.
+    """
+    try:
+        screen = adl_parser.MedmMainWidget(adl_filename)
+        screen.parseAdlFile()
+        records = list(screenChannels(screen, adl_filename))
+    except Exception as exc:
+        return adl_filename, [], f"{exc}"
+    return adl_filename, records, None
+
+
+def findAdlFiles(paths):
+    """the .adl files given, and those in (and below) the directories given"""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for fname in sorted(files):
+                if fname.endswith(ADL_FILE_EXTENSION):
+                    yield os.path.join(root, fname)
+
+
+def indexFiles(adl_files, jobs=None):
+    """
+    index many .adl files using a pool of worker processes
+
+    *jobs* is the number of worker processes (default: number of CPUs),
+    ``1`` to index in this process.
+    Yields ``(adl_filename, records, error)`` from :func:`indexFile`
+    in the same order as *adl_files*.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        yield from map(indexFile, adl_files)
+        return
+    with multiprocessing.Pool(jobs) as pool:
+        yield from pool.imap(indexFile, adl_files, chunksize=16)
+
+
+class JsonLinesIndex(object):
+    """write index records as JSON Lines, one object per line"""
+
+    def __init__(self, fp, close_file=False):
+        self.fp = fp
+        self.close_file = close_file
+
+    def add(self, records, adl_filename=None):
+        for record in records:
+            self.fp.write(json.dumps(dict(zip(INDEX_FIELDS, record))))
+            self.fp.write("\n")
+
+    def close(self):
+        if self.close_file:
+            self.fp.close()
+        else:
+            self.fp.flush()
+
+
+class SqliteIndex(object):
+    """
+    write index records to an SQLite database
+
+    Replaces any records of the same files already in the database.
+    """
+
+    def __init__(self, filename):
+        self.db = sqlite3.connect(filename)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS channels"
+            " (pv TEXT, file TEXT, line INTEGER, widget TEXT, field TEXT)")
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS channels_file ON channels (file)")
+        self.db.execute("DROP INDEX IF EXISTS channels_pv")  # faster inserts
+
+    def add(self, records, adl_filename=None):
+        if adl_filename is not None:
+            self.db.execute("DELETE FROM channels WHERE file = ?", (adl_filename,))
+        self.db.executemany(
+            "INSERT INTO channels VALUES (?, ?, ?, ?, ?)", records)
+
+    def close(self):
+        self.db.execute("CREATE INDEX IF NOT EXISTS channels_pv ON channels (pv)")
+        self.db.commit()
+        self.db.close()
+
+
+def openIndex(output):
+    """the index writer for this output file name (``-``: stdout)"""
+    if output.lower().endswith(SQLITE_EXTENSIONS):
+        return SqliteIndex(output)
+    if output == "-":
+        return JsonLinesIndex(sys.stdout)
+    return JsonLinesIndex(open(output, "w"), close_file=True)
+
+
+def lookup(output, pv):
+    """the index records (as dicts) of all widgets that use *pv*"""
+    if not os.path.exists(output):
+        raise ValueError("Could not find index file: " + output)
+    if output.lower().endswith(SQLITE_EXTENSIONS):
+        db = sqlite3.connect(output)
+        try:
+            rows = db.execute(
+                "SELECT * FROM channels WHERE pv = ?"
+                " ORDER BY file, line", (pv,)).fetchall()
+        finally:
+            db.close()
+        return [dict(zip(INDEX_FIELDS, row)) for row in rows]
+    with open(output, "r") as fp:
+        return [
+            record
+            for record in map(json.loads, fp)
+            if record["pv"] == pv
+        ]
+
+
+def writeIndex(adl_files, output, jobs=None):
+    """
+    index the .adl files into *output*
+
+    Returns ``(number of files, number of records, failures)``
+    where *failures* is a list of ``(adl_filename, error)``.
+    """
+    index = openIndex(output)
+    n_files, n_records, failures = 0, 0, []
+    try:
+        for adl_filename, records, err in indexFiles(adl_files, jobs):
+            n_files += 1
+            if err is not None:
+                failures.append((adl_filename, err))
+                continue
+            index.add(records, adl_filename)
+            n_records += len(records)
+    finally:
+        index.close()
+    return n_files, n_records, failures
+
+
+def get_user_parameters():
+    import adl2pydm
+    doc = __doc__.strip().splitlines()[0]
+    doc += ' (%s)' % adl2pydm.__url__
+    parser = argparse.ArgumentParser(
+        prog=adl2pydm.__package__ + "-index", description=doc)
+
+    msg = "MEDM '.adl' file(s) and directories (searched recursively)"
+    msg += " to index"
+    parser.add_argument(
+        'paths',
+        action='store',
+        nargs=argparse.ZERO_OR_MORE,
+        help=msg,
+        )
+
+    msg =  "index file: SQLite if it ends with"
+    msg += f" {' '.join(SQLITE_EXTENSIONS)}, otherwise JSON Lines"
+    msg += ", default: - (JSON Lines to stdout)"
+    parser.add_argument(
+        '-o',
+        '--output',
+        action='store',
+        dest='output',
+        help=msg,
+        default="-")
+
+    msg =  "parse files in parallel with this many worker processes"
+    msg += ", default: one per CPU"
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        action='store',
+        dest='jobs',
+        type=positiveInt,
+        help=msg,
+        default=None)
+
+    msg =  "print the screens (from the --output index) that use this PV"
+    parser.add_argument(
+        '--lookup',
+        action='store',
+        dest='lookup',
+        help=msg,
+        default=None)
+
+    parser.add_argument(
+        '-v',
+        '--version',
+        action=VersionAction)
+
+    options = parser.parse_args()
+    if options.lookup is not None:
+        if options.output == "-":
+            parser.error("--lookup reads the index file given with -o/--output")
+    elif len(options.paths) == 0:
+        parser.error("give the .adl file(s) or directories to index")
+    return options
+
+
+def main():
+    options = get_user_parameters()
+    logging.basicConfig(level=logging.WARNING)
+
+    if options.lookup is not None:
+        for record in lookup(options.output, options.lookup):
+            print("{file}:{line}: {widget} {field}".format(**record))
+        return
+
+    adl_files = findAdlFiles(options.paths)
+    n_files, n_records, failures = writeIndex(
+        adl_files, options.output, options.jobs)
+    for fname, err in failures:
+        logger.error(f"error indexing {fname}: {err}")
+    print(
+        f"indexed {n_records} PV reference(s)"
+        f" in {n_files - len(failures)} of {n_files} file(s)",
+        file=sys.stderr)
@@ -0,0 +1,297 @@
+
+"""
+daemon to convert .adl files on request: ``adl2pydm serve``
+
+Only rely on packages in this project or from the standard Python distribution.
+
+Starting Python and importing adl2pydm can take longer than converting
+a screen.  The daemon does that once, then converts the files sent by
+:mod:`adl2pydm.client` on a Unix socket (see there for the protocol),
+keeping its caches (parsed screens, colors, stylesheet lookups,
+conversion manifests) warm between requests.
+
+Requests are handled one at a time, in the order received.
+A client that sends nothing for *client_timeout* seconds is
+disconnected, so it does not hold up the others.
+The socket is usable only by the user who started the daemon.
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import time
+
+from . import cli
+from . import parse_cache
+from ._options import VersionAction
+from .client import defaultSocketPath
+
+
+DEFAULT_CLIENT_TIMEOUT = 60.0  # seconds
+
+logger = logging.getLogger(__name__)
+
+
+def removeStaleSocket(socket_path):
+    """remove the socket file of a daemon that is no longer running"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except FileNotFoundError:
+        return
+    except OSError:
+        if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            raise ValueError("not a socket: " + socket_path)
+        os.remove(socket_path)      # nothing is listening
+        return
+    finally:
+        sock.close()
+    raise ValueError("adl2pydm daemon already running at " + socket_path)
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """read requests from one connection, one JSON object per line"""
+
+    def handle(self):
+        self.request.settimeout(self.server.client_timeout)
+        try:
+            for line in self.rfile:
+                try:
+                    response = self.server.respond(json.loads(line))
+                except Exception as exc:
+                    response = dict(status="error", error=f"{exc}")
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                if self.server.stopping:
+                    break
+        except socket.timeout:
+            logger.warning(
+                f"client idle for {self.server.client_timeout} s, disconnected")
+
+
+class ConversionServer(socketserver.UnixStreamServer):
+    """
+    convert .adl files as requested on a Unix socket
+
+    PARAMS
+
+    socket_path (str) :
+        name of the socket file (created here)
+    cache (obj) :
+        :class:`~adl2pydm.parse_cache.ParseCache`, default: parse each file
+    settings (dict) :
+        conversion settings recorded in the manifests (for incremental
+        requests), from :func:`~adl2pydm.cli.conversionSettings`
+    client_timeout (float) :
+        seconds to wait for a client to send (or take) a line,
+        ``None``: wait forever
+    """
+
+    def __init__(
+            self, socket_path, cache=None, settings=None,
+            client_timeout=DEFAULT_CLIENT_TIMEOUT):
+        self.cache = cache
+        self.settings = settings or {}
+        self.client_timeout = client_timeout
+        self.manifests = {}     # output directory: ConversionManifest
+        self.started = time.time()
+        self.stopping = False
+        self.requests = 0
+        self.converted = 0
+        self.failed = 0
+        removeStaleSocket(socket_path)
+        socketserver.UnixStreamServer.__init__(self, socket_path, RequestHandler)
+
+    def server_bind(self):
+        umask = os.umask(0o077)     # only for this user
+        try:
+            socketserver.UnixStreamServer.server_bind(self)
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        try:
+            os.remove(self.server_address)
+        except OSError:
+            pass
+
+    def serve(self):
+        """handle requests until a ``shutdown`` request"""
+        while not self.stopping:
+            self.handle_request()
+
+    def respond(self, request):
+        """the response (dict) to one request (dict)"""
+        self.requests += 1
+        command = request.get("command")
+        if command == "convert":
+            return self.convert(
+                request.get("files", []),
+                request.get("output"),
+                request.get("incremental", False))
+        if command == "status":
+            return self.status()
+        if command == "shutdown":
+            self.stopping = True
+            return dict(status="ok")
+        return dict(status="error", error=f"unknown command: {command}")
+
+    def convert(self, adl_files, output_path=None, incremental=False):
+        if not isinstance(adl_files, list):
+            raise ValueError("files must be a list of file names")
+        for name in [output_path] + adl_files:
+            if name is not None and not os.path.isabs(name):
+                raise ValueError("file names must be absolute: " + str(name))
+
+        results = []
+        for adl_filename in adl_files:
+            conversions = None
+            if incremental:
+                conversions = cli.getManifest(
+                    self.manifests, adl_filename, output_path, self.settings)
+            try:
+                ui_filename = cli.processFile(
+                    adl_filename, output_path, conversions,
+                    parse_cache=self.cache)
+            except Exception as exc:
+                logger.error(f"error processing {adl_filename}: {exc}")
+                self.failed += 1
+                results.append(dict(file=adl_filename, output=None, error=f"{exc}"))
+                continue
+            logger.info(f"{adl_filename} -> {ui_filename}")
+            self.converted += 1
+            results.append(dict(file=adl_filename, output=ui_filename, error=None))
+        if incremental:
+            for conversions in self.manifests.values():
+                conversions.save()
+        if self.cache is not None:
+            self.cache.evict()     # keep to --parse-cache-size while running
+
+        failed = any(r["error"] is not None for r in results)
+        return dict(status="error" if failed else "ok", results=results)
+
+    def status(self):
+        from . import __version__
+        status = dict(
+            status="ok",
+            pid=os.getpid(),
+            version=__version__,
+            socket=self.server_address,
+            uptime=round(time.time() - self.started, 3),
+            requests=self.requests,
+            converted=self.converted,
+            failed=self.failed,
+        )
+        if self.cache is not None:
+            status["parse_cache"] = dict(
+                path=self.cache.path,
+                hits=self.cache.hits,
+                misses=self.cache.misses)
+        return status
+
+
+def get_user_parameters(args=None):
+    import adl2pydm
+    doc = __doc__.strip().splitlines()[0]
+    doc += ' (%s)' % adl2pydm.__url__
+    parser = argparse.ArgumentParser(
+        prog=adl2pydm.__package__ + " serve", description=doc)
+
+    msg = f"socket to listen on, default: {defaultSocketPath()}"
+    parser.add_argument(
+        '--socket',
+        action='store',
+        dest='socket',
+        help=msg,
+        default=None)
+
+    msg =  "keep parsed screens"
+    parser.add_argument(
+        '--parse-cache',
+        action='store_true',
+        help=msg,
+        default=False)
+
+    msg =  "directory of the --parse-cache (implies --parse-cache)"
+    msg += f", default: {parse_cache.defaultCacheDir()}"
+    parser.add_argument(
+        '--parse-cache-dir',
+        action='store',
+        dest='parse_cache_dir',
+        help=msg,
+        default=None)
+
+    msg =  "largest size of the parse cache, in MB"
+    msg += f", default: {parse_cache.DEFAULT_MAX_BYTES // (1024*1024)}"
+    parser.add_argument(
+        '--parse-cache-size',
+        action='store',
+        dest='parse_cache_size',
+        type=float,
+        help=msg,
+        default=parse_cache.DEFAULT_MAX_BYTES / (1024*1024))
+
+    msg =  "disconnect a client idle this long, in seconds"
+    msg += f", default: {DEFAULT_CLIENT_TIMEOUT:g}"
+    parser.add_argument(
+        '--client-timeout',
+        action='store',
+        dest='client_timeout',
+        type=float,
+        help=msg,
+        default=DEFAULT_CLIENT_TIMEOUT)
+
+    parser.add_argument(
+        "--use-scatterplot",
+        action="store_true",
+        default=False,
+        help=(
+            "Translate MEDM 'cartesian plot' widget as `PyDMScatterPlot` "
+            "instead of `PyDMWaveformPlot`, default=False"),
+        )
+
+    parser.add_argument(
+        "-log",
+        "--log",
+        default="warning",
+        help=(
+            "Provide logging level. "
+            "Example --log debug', default='warning'"),
+        )
+
+    parser.add_argument(
+        '-v',
+        '--version',
+        action=VersionAction)
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    options = get_user_parameters(args)
+    cli.configure_logging(options)
+    cli.configure_widgets(options)
+    cache = cli.getParseCache(options)
+    socket_path = options.socket or defaultSocketPath()
+    server = ConversionServer(
+        socket_path, cache, cli.conversionSettings(options), options.client_timeout)
+
+    def terminate(signum, frame):
+        sys.exit(0)     # close the server, below
+
+    signal.signal(signal.SIGTERM, terminate)
+    print(f"adl2pydm serving on {socket_path}, stop with ^C", file=sys.stderr)
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if cache is not None:
+            cache.evict()
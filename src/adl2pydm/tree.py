@@ -0,0 +1,95 @@
+
+"""
+find the .adl files in a tree of directories, as a stream
+
+Only rely on packages in this project or from the standard Python distribution.
+
+:func:`scanTree` walks the tree once (with ``os.scandir``) and yields
+each file as soon as its directory is read, so the conversions can
+start before the whole tree is listed.  :func:`treeWork` also chooses
+the output directory of each file, mirroring the tree under the
+output directory.
+
+A glob pattern with a ``/`` is matched to the path (with ``/``)
+relative to the top directory, otherwise to the name only.
+Excluded directories are not searched.
+"""
+
+import fnmatch
+import logging
+import os
+
+from .watch import ADL_FILE_EXTENSION
+
+
+DEFAULT_INCLUDE = ("*" + ADL_FILE_EXTENSION,)
+
+logger = logging.getLogger(__name__)
+
+
+def matches(name, relative_path, patterns):
+    """does the name (or, for patterns with ``/``, the relative path) match?"""
+    for pattern in patterns:
+        if "/" in pattern:
+            if fnmatch.fnmatch(relative_path, pattern):
+                return True
+        elif fnmatch.fnmatch(name, pattern):
+            return True
+    return False
+
+
+def scanTree(top, include=DEFAULT_INCLUDE, exclude=()):
+    """
+    yield ``(file name, relative directory)`` for each file found under *top*
+
+    Includes the files that match any of the *include* patterns and
+    none of the *exclude* patterns.  Each directory is listed in name
+    order, its files before its subdirectories (depth-first).
+    Symbolic links to directories are not followed.
+    """
+    include = list(include or DEFAULT_INCLUDE)
+    exclude = list(exclude or ())
+    stack = [""]    # relative directories not searched yet
+    while len(stack) > 0:
+        relative_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(top, relative_dir)) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as exc:
+            logger.warning(f"cannot search directory: {exc}")
+            continue
+        subdirs = []
+        for entry in entries:
+            relative_path = entry.name
+            if relative_dir:
+                relative_path = relative_dir.replace(os.sep, "/") + "/" + entry.name
+            if matches(entry.name, relative_path, exclude):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(os.path.join(relative_dir, entry.name))
+                elif entry.is_file() and matches(entry.name, relative_path, include):
+                    yield entry.path, relative_dir
+            except OSError:
+                continue    # removed while searching
+        stack += reversed(subdirs)
+
+
+def treeWork(top, output_path=None, include=DEFAULT_INCLUDE, exclude=()):
+    """
+    yield ``(adl_filename, output directory)`` for each file found under *top*
+
+    With an *output_path*, the .ui files go in the same relative
+    directories under *output_path* (created as needed) as the .adl
+    files under *top*.  Otherwise (``None``), each .ui file goes in
+    the directory of its .adl file.
+    """
+    made = set()
+    for adl_filename, relative_dir in scanTree(top, include, exclude):
+        path = None
+        if output_path is not None:
+            path = os.path.join(output_path, relative_dir)
+            if path not in made:
+                os.makedirs(path, exist_ok=True)
+                made.add(path)
+        yield adl_filename, path
@@ -0,0 +1,85 @@
+
+"""
+watch .adl files (and directories of them) for changes
+
+Only rely on packages in the standard Python distribution.
+
+Polls the files with ``os.stat()``, which works the same on all
+platforms and network file systems.
+"""
+
+from collections import OrderedDict
+import logging
+import os
+import time
+
+
+ADL_FILE_EXTENSION = ".adl"
+DEFAULT_POLL_INTERVAL = 0.25    # seconds
+
+logger = logging.getLogger(__name__)
+
+
+class AdlFileWatcher(object):
+    """
+    report .adl files that are new or changed since the last poll
+
+    PARAMS
+
+    paths (list of str) :
+        .adl files and directories containing .adl files
+    """
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.signatures = {}    # file name: (modified time, size)
+
+    def files(self):
+        """the .adl files now in the watched paths (each one only once)"""
+        found = []
+        for path in self.paths:
+            if os.path.isdir(path):
+                with os.scandir(path) as entries:
+                    found += sorted(
+                        entry.path
+                        for entry in entries
+                        if entry.name.endswith(ADL_FILE_EXTENSION)
+                        and entry.is_file()
+                    )
+            else:
+                found.append(path)
+        return list(OrderedDict.fromkeys(found))
+
+    def poll(self):
+        """return the list of files added or changed since the last poll"""
+        changed = []
+        signatures = {}
+        for fname in self.files():
+            try:
+                st = os.stat(fname)
+            except OSError:
+                continue    # removed, or not created yet
+            signature = (st.st_mtime_ns, st.st_size)
+            signatures[fname] = signature
+            if self.signatures.get(fname) != signature:
+                changed.append(fname)
+        self.signatures = signatures
+        return changed
+
+
+def watch(paths, callback, interval=DEFAULT_POLL_INTERVAL, polls=None):
+    """
+    call ``callback(adl_filename)`` for each file as it changes
+
+    The first poll reports all the files found.
+    Runs until interrupted or, if given, for *polls* polls.
+    """
+    watcher = AdlFileWatcher(paths)
+    count = 0
+    while polls is None or count < polls:
+        if count > 0:
+            time.sleep(interval)
+        for fname in watcher.poll():
+            logger.debug(f"changed: {fname}")
+            callback(fname)
+        count += 1
@@ -14,21 +14,45 @@ if _path not in sys.path:
 def suite(*args, **kw):
 
     from tests import test_adl_parser
+    from tests import test_benchmark
     from tests import test_calc2rules
     from tests import test_cli
+    from tests import test_converter
+    from tests import test_dedup
+    from tests import test_display_graph
+    from tests import test_geometry
+    from tests import test_manifest
     from tests import test_output_handler
+    from tests import test_parse_cache
+    from tests import test_profiler
+    from tests import test_pv_index
+    from tests import test_server
     from tests import test_simple
     from tests import test_symbols
     from tests import test_testDisplay
+    from tests import test_tree
+    from tests import test_watch
 
     test_list = [
         test_simple,
         test_symbols,
         test_adl_parser,
+        test_parse_cache,
         test_cli,
+        test_converter,
+        test_dedup,
+        test_display_graph,
+        test_geometry,
+        test_manifest,
         test_calc2rules,
+        test_benchmark,
         test_output_handler,
         test_testDisplay,
+        test_profiler,
+        test_pv_index,
+        test_server,
+        test_tree,
+        test_watch,
         ]
 
     test_suite = unittest.TestSuite()
@@ -0,0 +1,14 @@
+"""
+helpers shared by the unit tests
+"""
+
+
+def describe(widget):
+    """what was parsed for this widget (and its widgets), to compare"""
+    return (
+        widget.symbol, widget.line_offset, widget.adl_line, widget.geometry,
+        widget.color, widget.background_color, widget.title,
+        getattr(widget, "contents", None),
+        getattr(widget, "points", None),
+        [describe(w) for w in getattr(widget, "widgets", [])],
+    )
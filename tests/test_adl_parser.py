@@ -17,6 +17,7 @@ if _path not in sys.path:
     sys.path.insert(0, _path)
 
 from adl2pydm import adl_parser
+from tests.common import describe
 
 
 class Test_Files(unittest.TestCase):
@@ -127,6 +128,96 @@ class Test_Files(unittest.TestCase):
             screen.parseAdlBuffer(buf)
             self.assertGreater(len(screen.widgets), 0)
 
+    def test_locate_block_tree(self):
+        screen = adl_parser.MedmMainWidget()
+        buf = screen.getAdlLines(os.path.join(self.medm_path, "ADBase-R3-3-1.adl"))
+        tree = screen.locateBlockTree(buf)
+
+        # the same top-level blocks as found by rescanning
+        blocks = screen.locateBlocks(buf)
+        self.assertEqual(len(tree.blocks), len(blocks))
+        for found, expected in zip(tree.blocks, blocks):
+            self.assertEqual(found.symbol, expected.symbol)
+            self.assertEqual(found.start, expected.start)
+            self.assertEqual(found.end, expected.end)
+            self.assertEqual(found.level, 0)
+
+        block = screen.getNamedBlock("file", tree.blocks)
+        self.assertEqual(block.assignments["version"], "030109")
+
+        # nested assignments are kept with their own block
+        composite = screen.getNamedBlock("composite", tree.blocks)
+        self.assertEqual(composite.start, 100)
+        obj = screen.getNamedBlock("object", composite.blocks)
+        self.assertEqual(obj.level, 1)
+        self.assertEqual(obj.assignments["width"], "350")
+        self.assertNotIn("width", composite.assignments)
+        self.assertEqual(
+            composite.assignments,
+            screen.locateAssignments(buf[composite.start+1:composite.end]))
+
+    def test_compact_widgets(self):
+        screen = self.parseFile("motorx_all-R6-10-1.adl")
+        widgets = list(screen.widgets)
+        for widget in screen.widgets:
+            widgets += getattr(widget, "widgets", [])
+        self.assertGreater(len(widgets), 0)
+        for widget in widgets:
+            self.assertFalse(hasattr(widget, "__dict__"), widget)
+            self.assertIs(
+                widget.medm_widget_handlers,
+                adl_parser.MedmBaseWidget.medm_widget_handlers)
+
+        # keys are interned: one copy for all widgets
+        keys = [
+            k
+            for widget in widgets
+            for symbol in ("control", "monitor")
+            for k in widget.contents.get(symbol, {})
+            if k == "chan"
+        ]
+        self.assertGreater(len(keys), 1)
+        self.assertTrue(all(k is keys[0] for k in keys))
+
+    def test_interned_colors(self):
+        first = self.parseFile("xxx-R6-0.adl")
+        second = self.parseFile("motorx-R6-10-1.adl")
+        self.assertEqual(len(first.color_table), 65)
+        self.assertIs(first.color_table, second.color_table)
+
+        third = self.parseFile("beamHistory_full-R3-5.adl")    # dl_color blocks
+        self.assertIsNot(third.color_table, first.color_table)
+        for color in third.color_table:
+            self.assertIs(
+                color,
+                adl_parser.internColor(color.r, color.g, color.b))
+        self.assertIn(first.widgets[0].color, first.color_table)
+        self.assertIs(
+            first.widgets[0].color,
+            first.color_table[first.color_table.index(first.widgets[0].color)])
+
+    def test_parse_adl_stream(self):
+        for fname in ("ADBase-R3-3-1.adl", "xxx-R6-0.adl", "scanDetPlot-R2-11-1.adl"):
+            full_name = os.path.join(self.medm_path, fname)
+            expected = adl_parser.MedmMainWidget(full_name)
+            expected.parseAdlBuffer(expected.getAdlLines())
+
+            screen = adl_parser.MedmMainWidget(full_name)
+            with open(full_name, "r") as fp:
+                # any iterator of lines will do
+                screen.parseAdlStream(line for line in fp)
+            self.assertEqual(describe(screen), describe(expected), fname)
+            self.assertEqual(screen.color_table, expected.color_table)
+            self.assertEqual(screen.adl_version, expected.adl_version)
+
+        # top-level blocks keep only their own lines
+        with open(os.path.join(self.medm_path, "ADBase-R3-3-1.adl"), "r") as fp:
+            blocks = list(screen.iterBlockTree(fp))
+        composite = screen.getNamedBlock("composite", blocks)
+        self.assertEqual(composite.offset, composite.start)
+        self.assertEqual(len(composite.buf), composite.end - composite.start + 1)
+        self.assertEqual(composite.lines[0].strip(), "object {")
+
     # -------------------------------------------------
 
     def test_parse_medm_file(self):
@@ -0,0 +1,117 @@
+
+"""
+simple unit tests for this package
+"""
+
+import copy
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+# turn off logging output
+logging.basicConfig(level=logging.CRITICAL)
+
+_test_path = os.path.dirname(__file__)
+_path = os.path.join(_test_path, '..', 'src')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from adl2pydm import adl_parser, benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.medm_path = os.path.join(os.path.dirname(__file__), "medm")
+
+    def tearDown(self):
+        if os.path.exists(self.tempdir):
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_synthetic_screen(self):
+        adl_file = os.path.join(self.medm_path, "xxx-R6-0.adl")
+        screen = adl_parser.MedmMainWidget(adl_file)
+        screen.parseAdlBuffer(screen.getAdlLines(adl_file))
+
+        fname = benchmark.makeSyntheticScreen(adl_file, 3, self.tempdir)
+        self.assertEqual(os.path.basename(fname), "xxx-R6-0-x3.adl")
+        bigger = adl_parser.MedmMainWidget(fname)
+        bigger.parseAdlBuffer(bigger.getAdlLines(fname))
+        self.assertEqual(
+            benchmark.countWidgets(bigger),
+            3 * benchmark.countWidgets(screen))
+        self.assertEqual(bigger.title, screen.title)
+
+    def test_run(self):
+        adl_files = [
+            os.path.join(self.medm_path, "xxx-R6-0.adl"),
+            os.path.join(self.medm_path, "no-such-file.adl"),
+        ]
+        results = benchmark.runBenchmarks(adl_files, repeat=1, scales=(2,))
+        self.assertEqual(len(results["files"]), 1)
+        self.assertEqual(len(results["synthetic"]), 1)
+        self.assertEqual(list(results["errors"]), ["no-such-file.adl"])
+
+        r = results["files"][0]
+        self.assertEqual(r["file"], "xxx-R6-0.adl")
+        self.assertEqual(sorted(r["phases"]), sorted(benchmark.PHASES))
+        self.assertGreater(r["lines"], 0)
+        self.assertGreater(r["widgets"], 0)
+        self.assertGreater(r["peak_memory"], 0)
+        self.assertEqual(
+            results["synthetic"][0]["widgets"], 2 * r["widgets"])
+        self.assertEqual(results["totals"]["files"], 1)
+        self.assertEqual(results["totals"]["lines"], r["lines"])
+
+        table = benchmark.formatResults(results)
+        self.assertIn("xxx-R6-0.adl", table)
+        self.assertIn("ERROR no-such-file.adl", table)
+
+        self.assertAlmostEqual(
+            r["total"],
+            sum(r["phases"][p] for p in benchmark.CONVERSION_PHASES))
+
+        report = benchmark.compareResults(results, results)
+        self.assertIn("on 2 file(s)", report)
+        self.assertIn("total", report)
+        self.assertIn("stream", report)
+
+        # saved by a release without the stream phase
+        old = copy.deepcopy(results)
+        for r in old["files"] + old["synthetic"]:
+            del r["phases"]["stream"]
+        report = benchmark.compareResults(old, results)
+        self.assertIn("total", report)
+        self.assertNotIn("stream", report)
+
+    def test_repeat_option(self):
+        argv = sys.argv
+        try:
+            sys.argv = [argv[0], "--repeat", "2", self.medm_path]
+            self.assertEqual(benchmark.get_user_parameters().repeat, 2)
+            sys.argv = [argv[0], "--repeat", "0", self.medm_path]
+            with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+                benchmark.get_user_parameters()
+        finally:
+            sys.argv = argv
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        TestBenchmark,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
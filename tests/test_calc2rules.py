@@ -43,6 +43,34 @@ class TestSuite(unittest.TestCase):
             equal = rule == testcase[-1]
             self.assertEqual(rule, testcase[-1], testcase[0])
 
+    def test_tokenize(self):
+        tokens = list(calc2rules.tokenizeCalc("(A == 0) || !ABS(b-1.5e3)"))
+        expected = [
+            ("op", "("), ("name", "A"), ("op", "=="), ("number", "0"),
+            ("op", ")"), ("op", "||"), ("op", "!"), ("name", "ABS"),
+            ("op", "("), ("name", "b"), ("op", "-"), ("number", "1.5e3"),
+            ("op", ")"),
+        ]
+        self.assertEqual(tokens, expected)
+
+    def test_unhandled_variable(self):
+        for calc in ("E>0", "A+x"):
+            with self.assertRaises(ValueError):
+                calc2rules.convertCalcToRuleExpression(calc)
+
+    def test_cache(self):
+        calc2rules.clearCalcCache()
+        info = calc2rules.calcCacheInfo()
+        self.assertEqual((info.hits, info.misses, info.currsize), (0, 0, 0))
+
+        for calc in ("A=0", "A#0", "A=0", "A=0"):
+            calc2rules.convertCalcToRuleExpression(calc)
+        info = calc2rules.calcCacheInfo()
+        self.assertEqual((info.hits, info.misses, info.currsize), (2, 2, 2))
+        self.assertEqual(info.maxsize, calc2rules.CALC_CACHE_SIZE)
+        self.assertEqual(
+            calc2rules.convertCalcToRuleExpression("A#0"), "ch[0]!=0")
+
 
 def suite(*args, **kw):
     test_suite = unittest.TestSuite()
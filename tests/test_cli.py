@@ -3,12 +3,14 @@
 simple unit tests for this package
 """
 
+import io
 import logging
 import os
 import shutil
 import sys
 import tempfile
 import unittest
+from contextlib import redirect_stderr
 
 # turn off logging output
 logging.basicConfig(level=logging.CRITICAL)
@@ -76,6 +78,40 @@ class Test_Main(unittest.TestCase):
             uiname = os.path.splitext(fname)[0] + output_handler.SCREEN_FILE_EXTENSION
             self.assertTrue(os.path.exists(os.path.join(self.tempdir, uiname)))
 
+    def test_cli_jobs(self):
+        adl_files = [
+            os.path.join(self.medm_path, fname)
+            for fname in ("xxx-R6-0.adl", "motorx_all-R6-10-1.adl")
+        ]
+        missing = os.path.join(self.tempdir, "missing.adl")
+        adl_files.insert(1, missing)
+
+        results = list(cli.convertFiles(adl_files, self.tempdir, jobs=2))
+        # results come back in the order given
+        self.assertEqual([r[0] for r in results], adl_files)
+        self.assertIsNone(results[0][1])
+        self.assertIn("Could not find file", results[1][1])
+        self.assertIsNone(results[2][1])
+        for fname in (adl_files[0], adl_files[2]):
+            uiname = output_handler.replaceExtension(os.path.basename(fname))
+            self.assertTrue(os.path.exists(os.path.join(self.tempdir, uiname)))
+
+        summary = cli.summarize(results).splitlines()
+        self.assertEqual(len(summary), 2)
+        self.assertEqual(summary[0], "converted 2 of 3 file(s), 1 failed")
+        self.assertIn(missing, summary[1])
+
+    def test_cli_jobs_option(self):
+        adl_file = os.path.join(self.medm_path, "xxx-R6-0.adl")
+        sys.argv = [sys.argv[0], "-j", "3", adl_file]
+        self.assertEqual(cli.get_user_parameters().jobs, 3)
+        for jobs in ("0", "-2", "many"):
+            sys.argv = [sys.argv[0], "-j", jobs, adl_file]
+            with redirect_stderr(io.StringIO()) as err:
+                with self.assertRaises(SystemExit):
+                    cli.get_user_parameters()
+            self.assertIn("--jobs", err.getvalue())
+
 
 def suite(*args, **kw):
     test_suite = unittest.TestSuite()
@@ -0,0 +1,225 @@
+
+"""
+simple unit tests for this package
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import locale
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from xml.etree import ElementTree
+
+# turn off logging output
+logging.basicConfig(level=logging.CRITICAL)
+
+_test_path = os.path.dirname(__file__)
+_path = os.path.join(_test_path, '..', 'src')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from adl2pydm import cli, converter
+
+
+class TestConverter(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.medm_path = os.path.join(os.path.dirname(__file__), "medm")
+
+    def tearDown(self):
+        if os.path.exists(self.tempdir):
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def readAdlFile(self, fname):
+        with open(os.path.join(self.medm_path, fname), "r") as fp:
+            return fp.read()
+
+    def test_same_as_file(self):
+        for fname in ("xxx-R6-0.adl", "ADBase-R3-3-1.adl", "scatter_plot.adl"):
+            ui_file = cli.processFile(
+                os.path.join(self.medm_path, fname), self.tempdir)
+            with open(ui_file, "rb") as fp:
+                expected = fp.read()
+
+            # the file name hint need not exist
+            hint = os.path.join("not", "a", "directory", fname)
+            ui = converter.convert_text(self.readAdlFile(fname), hint)
+            self.assertIsInstance(ui, bytes)
+            self.assertEqual(ui, expected, fname)
+
+            # bytes and any line endings are accepted
+            adl_bytes = self.readAdlFile(fname).replace("\n", "\r\n").encode()
+            self.assertEqual(converter.convert_text(adl_bytes, hint), ui)
+
+    def test_options(self):
+        def plot_classes(ui):
+            root = ElementTree.fromstring(ui)
+            return set(
+                w.attrib["class"]
+                for w in root.iter("widget")
+                if w.attrib["name"].startswith("cartesian_plot")
+            )
+
+        text = self.readAdlFile("scatter_plot.adl")
+        ui = converter.convert_text(text, "scatter_plot.adl")
+        self.assertEqual(plot_classes(ui), {"PyDMWaveformPlot"})
+
+        options = dict(use_scatterplot=True)
+        ui = converter.convert_text(text, "scatter_plot.adl", options)
+        self.assertEqual(plot_classes(ui), {"PyDMScatterPlot"})
+
+        with self.assertRaises(TypeError):
+            converter.convert_text(text, "scatter_plot.adl", dict(no_such=1))
+
+    def processFiles(self, fnames):
+        """the .ui content from cli.processFile(), by .ui file base name"""
+        expected = {}
+        path = os.path.join(self.tempdir, "expected")
+        os.mkdir(path)
+        for fname in fnames:
+            ui_file = cli.processFile(os.path.join(self.medm_path, fname), path)
+            with open(ui_file, "rb") as fp:
+                expected[os.path.basename(ui_file)] = fp.read()
+        return expected
+
+    def test_convert_file(self):
+        fname = "xxx-R6-0.adl"
+        expected = self.processFiles([fname])
+        adl_file = os.path.join(self.medm_path, fname)
+
+        ui_file = asyncio.run(converter.convert_file(adl_file, self.tempdir))
+        self.assertEqual(os.path.dirname(ui_file), self.tempdir)
+        with open(ui_file, "rb") as fp:
+            self.assertEqual(fp.read(), expected[os.path.basename(ui_file)])
+
+        # parse and write in another process
+        os.remove(ui_file)
+        with ProcessPoolExecutor(1) as executor:
+            ui_file = asyncio.run(
+                converter.convert_file(adl_file, self.tempdir, executor=executor))
+        with open(ui_file, "rb") as fp:
+            self.assertEqual(fp.read(), expected[os.path.basename(ui_file)])
+
+        with self.assertRaises(ValueError):
+            asyncio.run(converter.convert_file(
+                os.path.join(self.tempdir, "no_such.adl"), self.tempdir))
+
+    def test_convert_many(self):
+        fnames = sorted(f for f in os.listdir(self.medm_path) if f.endswith(".adl"))
+        fnames = fnames[:12]
+        expected = self.processFiles(fnames)
+        adl_files = [os.path.join(self.medm_path, f) for f in fnames]
+        adl_files.insert(3, os.path.join(self.tempdir, "no_such.adl"))
+        started = []
+
+        async def names():
+            for adl_file in adl_files:
+                started.append(adl_file)
+                yield adl_file
+
+        async def convert():
+            results = []
+            async for result in converter.convert_many(
+                    names(), self.tempdir, concurrency=2):
+                # no more than 2 in progress: the others wait
+                self.assertLessEqual(len(started), len(results) + 2)
+                await asyncio.sleep(0)      # slow consumer
+                results.append(result)
+            return results
+
+        results = asyncio.run(convert())
+        self.assertEqual(
+            sorted(r[0] for r in results), sorted(adl_files))
+        for adl_file, ui_file, err in results:
+            if adl_file.endswith("no_such.adl"):
+                self.assertIsNone(ui_file)
+                self.assertIn("Could not find file", err)
+                continue
+            self.assertIsNone(err, adl_file)
+            with open(ui_file, "rb") as fp:
+                self.assertEqual(
+                    fp.read(), expected[os.path.basename(ui_file)], adl_file)
+
+        with self.assertRaises(ValueError):
+            asyncio.run(converter.convert_many(adl_files, concurrency=0).__anext__())
+
+    def test_convert_many_closed(self):
+        adl_files = [os.path.join(self.medm_path, "xxx-R6-0.adl")] * 20
+        started = []
+
+        async def names():
+            for adl_file in adl_files:
+                started.append(adl_file)
+                yield adl_file
+
+        async def convert():
+            results = converter.convert_many(names(), self.tempdir, concurrency=3)
+            first = await results.__anext__()
+            await results.aclose()
+            return first
+
+        self.assertIsNone(asyncio.run(convert())[2])
+        self.assertLessEqual(len(started), 3)
+
+        # the names are closed too (not only when the loop ends)
+        closed = []
+
+        async def names():
+            try:
+                for adl_file in adl_files:
+                    yield adl_file
+            finally:
+                closed.append(True)
+
+        async def convert_and_close():
+            await convert()
+            return list(closed)
+
+        self.assertEqual(asyncio.run(convert_and_close()), [True])
+
+    def test_encoding(self):
+        # not ASCII: read and written as processFile() does
+        with open(os.path.join(self.medm_path, "xxx-R6-0.adl"), "r") as fp:
+            text = fp.read().replace("xxx:", "\u00b5x:")
+        adl_file = os.path.join(self.tempdir, "micro.adl")
+        with open(adl_file, "w") as fp:
+            fp.write(text)
+        ui_file = cli.processFile(adl_file, self.tempdir)
+        with open(ui_file, "rb") as fp:
+            expected = fp.read()
+        os.remove(ui_file)
+        ui_file = asyncio.run(converter.convert_file(adl_file, self.tempdir))
+        with open(ui_file, "rb") as fp:
+            self.assertEqual(fp.read(), expected)
+
+        # another locale encoding
+        with open(adl_file, "w", encoding="latin-1") as fp:
+            fp.write(text)
+        getpreferredencoding = locale.getpreferredencoding
+        locale.getpreferredencoding = lambda do_setlocale=True: "latin-1"
+        try:
+            ui_file = asyncio.run(converter.convert_file(adl_file, self.tempdir))
+        finally:
+            locale.getpreferredencoding = getpreferredencoding
+        with open(ui_file, "r", encoding="latin-1") as fp:
+            self.assertIn("\u00b5x:", fp.read())
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        TestConverter,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
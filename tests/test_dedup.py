@@ -0,0 +1,193 @@
+
+"""
+simple unit tests for this package
+"""
+
+import logging
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+
+# turn off logging output
+logging.basicConfig(level=logging.CRITICAL)
+
+_test_path = os.path.dirname(__file__)
+_path = os.path.join(_test_path, '..', 'src')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from adl2pydm import cli, dedup
+
+
+class TestDedup(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.medm_path = os.path.join(os.path.dirname(__file__), "medm")
+
+        # copies of the same screens in several directories
+        self.adl_files = []
+        for subdir, fname in (
+                ("a", "xxx-R6-0.adl"),
+                ("b", "xxx-R6-0.adl"),       # same as a/
+                ("b", "motorx-R6-10-1.adl"),
+                ("c", "xxx-R6-0.adl"),       # same as a/
+                ("c", "motorx-R6-10-1.adl"),  # same as b/
+                ):
+            path = os.path.join(self.tempdir, subdir)
+            os.makedirs(path, exist_ok=True)
+            adl_file = os.path.join(path, fname)
+            shutil.copy(os.path.join(self.medm_path, fname), adl_file)
+            self.adl_files.append(adl_file)
+        # same content, another name: not the same .ui file
+        renamed = os.path.join(self.tempdir, "c", "renamed.adl")
+        shutil.copy(self.adl_files[0], renamed)
+        self.adl_files.append(renamed)
+        # changed content
+        changed = os.path.join(self.tempdir, "d", "xxx-R6-0.adl")
+        os.mkdir(os.path.dirname(changed))
+        with open(self.adl_files[0], "r") as fp:
+            text = fp.read()
+        with open(changed, "w") as fp:
+            fp.write(text.replace("xxx:", "yyy:"))
+        self.adl_files.append(changed)
+
+    def tearDown(self):
+        if os.path.exists(self.tempdir):
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def uiText(self, adl_file):
+        with open(dedup.uiFilename(adl_file), "r") as fp:
+            return fp.read()
+
+    def test_group_duplicates(self):
+        missing = os.path.join(self.tempdir, "missing.adl")
+        groups = dedup.groupDuplicates(self.adl_files + [missing, self.adl_files[1]])
+        a, b, b2, c, c2, renamed, changed = self.adl_files
+        self.assertEqual(list(groups.items()), [
+            (a, [b, c]),
+            (b2, [c2]),
+            (renamed, []),
+            (changed, []),
+            (missing, []),
+        ])
+
+    def convert(self, *args):
+        converted = []
+
+        def processFile(adl_filename, *args, **kwargs):
+            converted.append(adl_filename)
+            return process(adl_filename, *args, **kwargs)
+
+        process = cli.processFile
+        cli.processFile = processFile
+        try:
+            sys.argv = [sys.argv[0]] + list(args) + self.adl_files
+            cli.main()
+        finally:
+            cli.processFile = process
+        return converted
+
+    def test_dedup(self):
+        converted = self.convert()
+        self.assertEqual(converted, self.adl_files)
+        expected = {f: self.uiText(f) for f in self.adl_files}
+        for adl_file in self.adl_files:
+            os.remove(dedup.uiFilename(adl_file))
+
+        a, b, b2, c, c2, renamed, changed = self.adl_files
+        for mode in dedup.DEDUP_MODES:
+            converted = self.convert("--dedup", "--dedup-mode", mode)
+            self.assertEqual(converted, [a, b2, renamed, changed], mode)
+            for adl_file in self.adl_files:
+                self.assertEqual(self.uiText(adl_file), expected[adl_file])
+            for first, duplicate in ((a, b), (a, c), (b2, c2)):
+                source = dedup.uiFilename(first)
+                target = dedup.uiFilename(duplicate)
+                self.assertEqual(os.path.islink(target), mode == "symlink", mode)
+                self.assertEqual(os.path.samefile(source, target), mode != "copy", mode)
+                self.assertEqual(
+                    stat.S_IMODE(os.stat(target).st_mode),
+                    stat.S_IMODE(os.stat(source).st_mode), mode)
+        self.assertNotIn(".tmp", str(os.listdir(os.path.dirname(a))))
+
+        # the duplicates, converted in parallel
+        for adl_file in self.adl_files:
+            os.remove(dedup.uiFilename(adl_file))
+        sys.argv = [sys.argv[0], "--dedup", "-j", "2"] + self.adl_files
+        cli.main()
+        for adl_file in self.adl_files:
+            self.assertEqual(self.uiText(adl_file), expected[adl_file])
+
+    def test_convert_linked_duplicate(self):
+        a, b = self.adl_files[:2]
+        expected = {}
+        for mode in ("hardlink", "symlink"):
+            sys.argv = [sys.argv[0], "--dedup", "--dedup-mode", mode, a, b]
+            cli.main()
+            self.assertTrue(os.path.samefile(dedup.uiFilename(a), dedup.uiFilename(b)))
+            expected.setdefault(a, self.uiText(a))
+
+            # b changes and is converted alone: a's .ui file stays as it was
+            with open(b, "r") as fp:
+                text = fp.read()
+            with open(b, "w") as fp:
+                fp.write(text.replace("xxx:", "zzz:"))
+            sys.argv = [sys.argv[0], b]
+            cli.main()
+            self.assertEqual(self.uiText(a), expected[a], mode)
+            self.assertIn("zzz:", self.uiText(b))
+            self.assertFalse(os.path.islink(dedup.uiFilename(b)), mode)
+            self.assertFalse(
+                os.path.samefile(dedup.uiFilename(a), dedup.uiFilename(b)), mode)
+            shutil.copy(a, b)
+        self.assertNotIn(".tmp", str(os.listdir(os.path.dirname(b))))
+
+        # a new .ui file has the usual permissions, not those of a temporary file
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(
+            stat.S_IMODE(os.stat(dedup.uiFilename(b)).st_mode), 0o666 & ~umask)
+
+    def test_failures(self):
+        a, b, b2, c, c2, renamed, changed = self.adl_files
+        groups = dedup.groupDuplicates(self.adl_files)
+        results = dict(dedup.placeDuplicates(groups, failures={a: "broken"}))
+        self.assertEqual(results[b], f"same as {a}: broken")
+        self.assertIn("not found", results[c2])     # b2 not converted yet
+
+        # all in one output directory: nothing to place
+        out = os.path.join(self.tempdir, "out")
+        os.mkdir(out)
+        sys.argv = [sys.argv[0], "--dedup", "-d", out] + self.adl_files
+        cli.main()
+        self.assertEqual(
+            sorted(os.listdir(out)),
+            ["motorx-R6-10-1.ui", "renamed.ui", "xxx-R6-0.ui"])
+
+        with self.assertRaises(ValueError):
+            dedup.placeFile(a, b, "no_such_mode")
+
+        # --dedup takes no value: the next name is a file to convert
+        os.remove(os.path.join(out, "renamed.ui"))
+        sys.argv = [sys.argv[0], "-d", out, "--dedup", renamed, a]
+        cli.main()
+        self.assertTrue(os.path.exists(os.path.join(out, "renamed.ui")))
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        TestDedup,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
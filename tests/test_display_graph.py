@@ -0,0 +1,222 @@
+
+"""
+simple unit tests for this package
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# turn off logging output
+logging.basicConfig(level=logging.CRITICAL)
+
+_test_path = os.path.dirname(__file__)
+_path = os.path.join(_test_path, '..', 'src')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from adl2pydm import adl_parser, cli, display_graph, manifest
+
+
+HEADER = """\
+file {
+	name="%s"
+	version=030114
+}
+display {
+	object {
+		x=0
+		y=25
+		width=200
+		height=200
+	}
+	clr=14
+	bclr=4
+	cmap=""
+}
+"color map" {
+	ncolors=2
+	colors {
+		ffffff,
+		000000,
+	}
+}
+"""
+
+RELATED_DISPLAY = """\
+"related display" {
+	object {
+		x=0
+		y=0
+		width=70
+		height=20
+	}
+	display[0] {
+		label="%s"
+		name="%s"
+	}
+	clr=0
+	bclr=1
+}
+"""
+
+COMPOSITE_FILE = """\
+composite {
+	object {
+		x=0
+		y=50
+		width=100
+		height=50
+	}
+	"composite name"=""
+	"composite file"="%s;P=$(P)"
+}
+"""
+
+
+class TestDisplayGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.sub = os.path.join(self.tempdir, "sub")
+        os.makedirs(self.sub)
+
+        # main -> a (related), main -> missing.adl
+        # a -> sub/c (composite file), a -> main (cycle)
+        # c -> d (found in EPICS_DISPLAY_PATH), c -> $(X).adl
+        self.writeScreen("main.adl", ("a.adl", "missing.adl"))
+        self.writeScreen("a.adl", ("main",), ("sub/c.adl",))
+        self.writeScreen("sub/c.adl", ("d.adl", "$(X).adl"))
+        self.writeScreen("sub/d.adl")
+        self.writeScreen("unused.adl")
+        self.env = os.environ.get(display_graph.ENV_EPICS_DISPLAY_PATH)
+        os.environ[display_graph.ENV_EPICS_DISPLAY_PATH] = self.sub
+
+    def tearDown(self):
+        if self.env is None:
+            del os.environ[display_graph.ENV_EPICS_DISPLAY_PATH]
+        else:
+            os.environ[display_graph.ENV_EPICS_DISPLAY_PATH] = self.env
+        if os.path.exists(self.tempdir):
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.tempdir, name)
+
+    def writeScreen(self, name, related=(), composite=()):
+        with open(self.path(name), "w") as fp:
+            fp.write(HEADER % name)
+            for display in related:
+                fp.write(RELATED_DISPLAY % (display, display))
+            for fname in composite:
+                fp.write(COMPOSITE_FILE % fname)
+
+    def test_graph(self):
+        graph = display_graph.DisplayGraph()
+        graph.discover([self.path("main.adl")])
+        expected = [
+            self.path(f)
+            for f in ("main.adl", "a.adl", "sub/c.adl", "sub/d.adl")
+        ]
+        self.assertEqual(graph.files, expected)
+
+        missing = [(f, ref.name, ref.kind) for f, ref in graph.missing()]
+        self.assertEqual(missing, [
+            (expected[0], "missing.adl", "related display"),
+            (expected[2], "$(X).adl", "related display"),
+        ])
+        self.assertEqual(
+            graph.references[expected[1]][1],
+            display_graph.Reference(
+                "sub/c.adl", 37, "composite file", expected[2]))
+
+        self.assertEqual(graph.cycles(), [expected[:2] + expected[:1]])
+        order = graph.conversionOrder()
+        self.assertEqual(sorted(order), sorted(expected))
+        self.assertLess(order.index(expected[3]), order.index(expected[2]))
+        self.assertLess(order.index(expected[2]), order.index(expected[1]))
+
+        report = graph.report()
+        self.assertIn("found 4 screen(s)", report)
+        self.assertIn("MISSING", report)
+        self.assertIn("CYCLE", report)
+
+    def test_not_found(self):
+        graph = display_graph.DisplayGraph()
+        graph.discover([self.path("none.adl"), self.path("sub/d.adl")])
+        self.assertEqual(list(graph.errors), [self.path("none.adl")])
+        self.assertEqual(graph.files, [self.path("sub/d.adl")])
+        self.assertEqual(graph.conversionOrder(), [self.path("sub/d.adl")])
+        self.assertIn("ERROR", graph.report())
+
+    def test_cli(self):
+        outdir = os.path.join(self.tempdir, "ui")
+        os.makedirs(outdir)
+        sys.argv = [
+            sys.argv[0], "-d", outdir, "--related", "-j", "2",
+            self.path("main.adl")]
+        cli.main()
+        self.assertEqual(
+            sorted(os.listdir(outdir)),
+            ["a.ui", "c.ui", "d.ui", "main.ui"])
+
+    def test_parsed_once(self):
+        # log each file parsed (also in the worker processes)
+        log = self.path("parsed.log")
+        parseAdlFile = adl_parser.MedmMainWidget.parseAdlFile
+
+        def logged(screen, fname=None):
+            with open(log, "a") as fp:
+                fp.write(os.path.basename(fname or screen.given_filename) + "\n")
+            return parseAdlFile(screen, fname)
+
+        fileDigest = manifest.fileDigest
+
+        def hashed(fname):
+            with open(log, "a") as fp:
+                fp.write("hashed:" + os.path.basename(fname) + "\n")
+            return fileDigest(fname)
+
+        adl_parser.MedmMainWidget.parseAdlFile = logged
+        manifest.fileDigest = hashed    # not needed without a cache or manifest
+        try:
+            for args in ([], ["-j", "2"]):
+                outdir = os.path.join(self.tempdir, "ui" + "".join(args))
+                os.makedirs(outdir)
+                sys.argv = [
+                    sys.argv[0], "-d", outdir, "--related",
+                    self.path("main.adl")] + args
+                cli.main()
+                self.assertEqual(len(os.listdir(outdir)), 4, args)
+                with open(log, "r") as fp:
+                    parsed = fp.read().split()
+                os.remove(log)
+                self.assertEqual(
+                    sorted(parsed), ["a.adl", "c.adl", "d.adl", "main.adl"], args)
+        finally:
+            adl_parser.MedmMainWidget.parseAdlFile = parseAdlFile
+            manifest.fileDigest = fileDigest
+
+        screens = display_graph.ParsedScreens(
+            {self.path("main.adl"): "parsed"})
+        self.assertEqual(screens.parse(self.path("main.adl")), "parsed")
+        self.assertIsNone(screens.take(self.path("main.adl")))    # once
+        self.assertEqual(len(screens.parse(self.path("a.adl")).widgets), 2)
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        TestDisplayGraph,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,114 @@
+
+"""
+simple unit tests for this package
+"""
+
+import logging
+import os
+import pickle
+import sys
+import unittest
+
+# turn off logging output
+logging.basicConfig(level=logging.CRITICAL)
+
+_test_path = os.path.dirname(__file__)
+_path = os.path.join(_test_path, '..', 'src')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from adl2pydm import adl_parser, geometry
+from adl2pydm.geometry import Geometry, Point, PointArray
+
+
+class Widget(object):
+
+    def __init__(self, x, y, widgets=None):
+        self.geometry = Geometry(x, y, 10, 20)
+        if widgets is not None:
+            self.widgets = widgets
+
+
+class TestGeometry(unittest.TestCase):
+
+    def test_point_array(self):
+        points = PointArray([(1, 2), Point(3, -4)])
+        points.append(5, 6)
+        self.assertEqual(len(points), 3)
+        self.assertEqual(points[1], Point(3, -4))
+        self.assertEqual(points[-1].x, 5)
+        self.assertEqual(list(points), [Point(1, 2), Point(3, -4), Point(5, 6)])
+        self.assertEqual(points, [(1, 2), (3, -4), (5, 6)])
+        self.assertNotEqual(points, None)
+        self.assertNotEqual(points, 3)
+        self.assertFalse(PointArray())
+
+        copy = pickle.loads(pickle.dumps(points, pickle.HIGHEST_PROTOCOL))
+        self.assertIsInstance(copy, PointArray)
+        self.assertEqual(copy, points)
+
+        # the parser stores points this way
+        self.assertIs(adl_parser.Point, Point)
+        self.assertIs(adl_parser.Geometry, Geometry)
+
+    def test_point_strings(self):
+        points = [Point(i, 3*i - 100) for i in range(600)]
+        expected = ["%d, %d" % (pt.x - 7, pt.y + 2) for pt in points]
+        self.assertEqual(geometry.pointStrings(PointArray(points), 7, -2), expected)
+        self.assertEqual(geometry.pointStrings(points[:3], 7, -2), expected[:3])
+        self.assertEqual(geometry.pointStrings(PointArray(), 7, -2), [])
+
+        # same without NumPy (and with, if installed)
+        saved = geometry.numpy
+        geometry.numpy = None
+        try:
+            self.assertEqual(
+                geometry.pointStrings(PointArray(points), 7, -2), expected)
+        finally:
+            geometry.numpy = saved
+
+    @unittest.skipUnless(geometry.numpy, "NumPy is not installed")
+    def test_point_strings_numpy(self):
+        points = PointArray(
+            (i * 7919 % 2000 - 1000, -(i * 104729 % 3000))
+            for i in range(2 * geometry.NUMPY_MIN_POINTS))
+        with_numpy = geometry.pointStrings(points, -13, 250)
+        saved = geometry.numpy
+        geometry.numpy = None
+        try:
+            self.assertEqual(with_numpy, geometry.pointStrings(points, -13, 250))
+        finally:
+            geometry.numpy = saved
+        self.assertEqual(with_numpy[1], "%d, %d" % (points[1].x + 13, points[1].y - 250))
+
+    def test_layout_composites(self):
+        inner_child = Widget(130, 140)
+        inner = Widget(120, 110, [inner_child])
+        outer_child = Widget(105, 106)
+        outer = Widget(100, 100, [outer_child, inner])
+        empty = Widget(50, 60, [])
+        top = Widget(1, 2)
+        geometry.layoutComposites([top, outer, empty])
+
+        # moved by the composite's position, after the composite was moved
+        self.assertEqual(top.geometry, Geometry(1, 2, 10, 20))
+        self.assertEqual(outer.geometry, Geometry(100, 100, 10, 20))
+        self.assertEqual(outer_child.geometry, Geometry(5, 6, 10, 20))
+        self.assertEqual(inner.geometry, Geometry(20, 10, 10, 20))
+        self.assertEqual(inner_child.geometry, Geometry(110, 130, 10, 20))
+        self.assertEqual(empty.geometry, Geometry(50, 60, 10, 20))
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        TestGeometry,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,100 @@
+
+"""
+simple unit tests for this package
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# turn off logging output
+logging.basicConfig(level=logging.CRITICAL)
+
+_test_path = os.path.dirname(__file__)
+_path = os.path.join(_test_path, '..', 'src')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from adl2pydm import cli, manifest
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        medm_path = os.path.join(os.path.dirname(__file__), "medm")
+        self.adlfile = os.path.join(self.tempdir, "xxx-R6-0.adl")
+        shutil.copy(os.path.join(medm_path, "xxx-R6-0.adl"), self.adlfile)
+        self.settings = dict(use_scatterplot=False)
+
+    def tearDown(self):
+        if os.path.exists(self.tempdir):
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def convert(self, settings=None):
+        """returns .ui file name and whether it was converted"""
+        conversions = manifest.ConversionManifest(
+            self.tempdir, settings or self.settings)
+        ui_filename = cli.processFile(self.adlfile, self.tempdir, conversions)
+        converted = conversions.modified
+        conversions.save()
+        return ui_filename, converted
+
+    def test_skip_unchanged(self):
+        ui_filename, converted = self.convert()
+        self.assertTrue(converted)
+        self.assertTrue(os.path.exists(ui_filename))
+        mfile = os.path.join(self.tempdir, manifest.MANIFEST_FILE)
+        self.assertTrue(os.path.exists(mfile))
+
+        # nothing changed: not converted again
+        self.assertEqual(self.convert(), (ui_filename, False))
+
+        conversions = manifest.ConversionManifest(self.tempdir, self.settings)
+        entry = conversions.getEntry(self.adlfile)
+        self.assertEqual(entry["sha256"], manifest.fileDigest(self.adlfile))
+        self.assertEqual(entry["settings"], self.settings)
+        self.assertEqual(entry["ui_file"], ui_filename)
+
+    def test_convert_changed(self):
+        ui_filename, converted = self.convert()
+
+        # different settings
+        settings = dict(use_scatterplot=True)
+        self.assertTrue(self.convert(settings)[1])
+        self.assertFalse(self.convert(settings)[1])
+
+        # different .adl file content
+        with open(self.adlfile, "a") as fp:
+            fp.write("\n")
+        self.assertTrue(self.convert(settings)[1])
+
+        # .ui file removed
+        os.remove(ui_filename)
+        self.assertTrue(self.convert(settings)[1])
+        self.assertTrue(os.path.exists(ui_filename))
+
+    def test_unreadable_manifest(self):
+        mfile = os.path.join(self.tempdir, manifest.MANIFEST_FILE)
+        with open(mfile, "w") as fp:
+            fp.write("not JSON")
+        conversions = manifest.ConversionManifest(self.tempdir, self.settings)
+        self.assertEqual(conversions.entries, {})
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        TestManifest,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
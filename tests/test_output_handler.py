@@ -3,12 +3,14 @@
 simple unit tests for this package
 """
 
+import io
 import logging
 import os
 import shutil
 import sys
 import tempfile
 import unittest
+from xml.dom import minidom
 from xml.etree import ElementTree
 
 # turn off logging output
@@ -1326,6 +1328,49 @@ class Test_PYDM_Writer_Support(unittest.TestCase):
         if os.path.exists(self.tempdir):
             shutil.rmtree(self.tempdir, ignore_errors=True)
 
+    def test_file_lookup_cache(self):
+        displays = [os.path.join(self.tempdir, d) for d in ("a", "b")]
+        for path in displays:
+            os.mkdir(path)
+        saved_path = os.environ.get(output_handler.ENV_PYDM_DISPLAYS_PATH)
+        os.environ[output_handler.ENV_PYDM_DISPLAYS_PATH] = os.pathsep.join(displays)
+        try:
+            cache = output_handler.FileLookupCache()
+            fname = output_handler.QT_STYLESHEET_FILE
+            self.assertIsNone(cache.findFile(fname))
+            self.assertIsNone(cache.findFile(fname))
+            self.assertEqual(cache.searches, 1)
+
+            # new file in a directory of the path: search again
+            sfile = os.path.join(displays[1], fname)
+            with open(sfile, "w") as fp:
+                fp.write("QWidget {}")
+            os.utime(displays[1], ns=(1, 1))   # in case the clock is coarse
+            for _i in range(3):
+                writer = output_handler.PYDM_Writer(None, cache)
+                writer.openFile(os.path.join(self.tempdir, "test.ui"))
+                self.assertEqual(writer.stylesheet, "QWidget {}")
+            self.assertEqual(cache.searches, 2)
+            self.assertEqual(cache.reads, 1)
+
+            # changed file: read again
+            with open(sfile, "w") as fp:
+                fp.write("QLabel {}")
+            self.assertEqual(cache.readFile(sfile), "QLabel {}")
+            self.assertEqual(cache.reads, 2)
+
+            # file added earlier in the path: search again
+            earlier = os.path.join(displays[0], fname)
+            shutil.copy(sfile, earlier)
+            os.utime(displays[0], ns=(1, 1))
+            self.assertEqual(cache.findFile(fname), earlier)
+            self.assertEqual(cache.searches, 3)
+        finally:
+            if saved_path is None:
+                del os.environ[output_handler.ENV_PYDM_DISPLAYS_PATH]
+            else:
+                os.environ[output_handler.ENV_PYDM_DISPLAYS_PATH] = saved_path
+
     def test_zorder(self):
         fname = os.path.join(self.tempdir, "test.xml")
         writer = output_handler.PYDM_Writer(None)
@@ -1394,6 +1439,43 @@ class Test_PYDM_Writer_Support(unittest.TestCase):
             )
         self.assertEqual(len(buf), len(expected))
 
+    def minidomPrettyXml(self, root):
+        "how closeFile() wrote the .ui file before writePrettyXml()"
+        text = ElementTree.tostring(root)
+        return minidom.parseString(text).toprettyxml(indent=" "*2)
+
+    def test_pretty_xml_special_text(self):
+        root = ElementTree.Element("ui", attrib=dict(version="4.0"))
+        item = ElementTree.SubElement(root, "a", attrib={"x": 'q"<>&\n\t y'})
+        item.text = 'te"xt<>&\r\n line2\r end \t'
+        ElementTree.SubElement(root, "b").text = ""
+        ElementTree.SubElement(root, "c").text = "  "
+        item = ElementTree.SubElement(root, "d")
+        item.text = "head"
+        ElementTree.SubElement(item, "e").tail = "tail"
+
+        buf = io.StringIO()
+        output_handler.writePrettyXml(root, buf)
+        self.assertEqual(buf.getvalue(), self.minidomPrettyXml(root))
+
+    def test_pretty_xml_same_as_minidom(self):
+        path = os.path.join(os.path.dirname(__file__), "medm")
+        for adl_file in sorted(os.listdir(path)):
+            if not adl_file.endswith(".adl"):
+                continue
+            ui_file = cli.processFile(os.path.join(path, adl_file), self.tempdir)
+            with open(ui_file, "r") as fp:
+                text = fp.read()
+
+            # read the .ui file, remove the indentation, and pretty print
+            root = ElementTree.fromstring(text.encode())
+            for element in root.iter():
+                if len(element) > 0:
+                    element.text = None
+                    for child in element:
+                        child.tail = None
+            self.assertEqual(text, self.minidomPrettyXml(root), adl_file)
+
 
 def suite(*args, **kw):
     test_suite = unittest.TestSuite()
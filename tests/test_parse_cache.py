@@ -0,0 +1,159 @@
+
+"""
+simple unit tests for this package
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+# turn off logging output
+logging.basicConfig(level=logging.CRITICAL)
+
+_test_path = os.path.dirname(__file__)
+_path = os.path.join(_test_path, '..', 'src')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from adl2pydm import adl_parser, cli, parse_cache
+from tests.common import describe
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tempdir, "cache")
+        self.medm_path = os.path.join(os.path.dirname(__file__), "medm")
+
+    def tearDown(self):
+        if os.path.exists(self.tempdir):
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_same_as_parser(self):
+        cache = parse_cache.ParseCache(self.cache_dir)
+        for fname in ("ADBase-R3-3-1.adl", "xxx-R6-0.adl", "polyline.adl"):
+            adl_file = os.path.join(self.medm_path, fname)
+            expected = adl_parser.MedmMainWidget(adl_file)
+            expected.parseAdlFile()
+
+            first = cache.parse(adl_file)
+            second = cache.parse(adl_file)
+            self.assertIsNot(first, second)
+            for screen in (first, second):
+                self.assertEqual(describe(screen), describe(expected), fname)
+                self.assertEqual(screen.color_table, expected.color_table)
+                self.assertEqual(screen.given_filename, adl_file)
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+        self.assertEqual(len(cache.entries()), 3)
+
+        # same content, another name
+        copy = os.path.join(self.tempdir, "copy.adl")
+        shutil.copy(adl_file, copy)
+        screen = cache.parse(copy)
+        self.assertEqual(cache.hits, 4)
+        self.assertEqual(screen.given_filename, copy)
+
+        # changed content
+        with open(copy, "a") as fp:
+            fp.write("\n")
+        cache.parse(copy)
+        self.assertEqual(cache.misses, 4)
+
+    def test_damaged_file(self):
+        cache = parse_cache.ParseCache(self.cache_dir)
+        adl_file = os.path.join(self.medm_path, "xxx-R6-0.adl")
+        cache.parse(adl_file)
+        (_, _, cache_file), = cache.entries()
+        with open(cache_file, "wb") as fp:
+            fp.write(b"not a pickle")
+        screen = cache.parse(adl_file)
+        self.assertGreater(len(screen.widgets), 0)
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(len(cache.entries()), 1)
+
+    def test_evict(self):
+        cache = parse_cache.ParseCache(self.cache_dir)
+        fnames = ("ADBase-R3-3-1.adl", "xxx-R6-0.adl", "polyline.adl")
+        for i, fname in enumerate(fnames):
+            cache.parse(os.path.join(self.medm_path, fname))
+        now = time.time()
+        for i, (_, _, cache_file) in enumerate(cache.entries()):
+            os.utime(cache_file, (now, now - 1000 * (3 - i)))
+        self.assertEqual(cache.evict(now), 0)
+
+        # too old
+        cache.max_age = 2500
+        self.assertEqual(cache.evict(now), 1)
+        entries = cache.entries()
+        self.assertEqual(len(entries), 2)
+
+        # too big: the oldest goes first
+        cache.max_bytes = entries[-1][1]
+        self.assertEqual(cache.evict(now), 1)
+        self.assertEqual(cache.entries(), entries[-1:])
+
+        cache.clear()
+        self.assertEqual(cache.entries(), [])
+
+    def test_evict_when_opened(self):
+        cache = parse_cache.ParseCache(self.cache_dir)
+        for fname in ("ADBase-R3-3-1.adl", "xxx-R6-0.adl"):
+            cache.parse(os.path.join(self.medm_path, fname))
+        newest = cache.entries()[-1]
+
+        # as if an earlier run was stopped before its eviction
+        options = argparse.Namespace(
+            parse_cache=False,
+            parse_cache_dir=self.cache_dir,
+            parse_cache_size=newest[1] / (1024 * 1024))
+        self.assertEqual(len(cli.getParseCache(options, evict=False).entries()), 2)
+        cache = cli.getParseCache(options)
+        self.assertEqual(cache.entries(), [newest])
+
+    def test_cli(self):
+        adl_file = os.path.join(self.medm_path, "xxx-R6-0.adl")
+        sys.argv = [
+            sys.argv[0], "-d", self.tempdir,
+            "--parse-cache-dir", self.cache_dir, adl_file]
+        cli.main()
+        cli.main()
+        self.assertTrue(os.path.exists(os.path.join(self.tempdir, "xxx-R6-0.ui")))
+        cache = parse_cache.ParseCache(self.cache_dir)
+        self.assertEqual(len(cache.entries()), 1)
+
+        # --parse-cache takes no value: both files are converted
+        other = os.path.join(self.medm_path, "motorx-R6-10-1.adl")
+        sys.argv = [sys.argv[0], "--parse-cache", adl_file, other]
+        options = cli.get_user_parameters()
+        self.assertTrue(options.parse_cache)
+        self.assertEqual(options.adlfiles, [adl_file, other])
+
+        # a file as the cache directory: nothing cached, nothing fails
+        cache = parse_cache.ParseCache(adl_file)
+        self.assertEqual(cache.entries(), [])
+        self.assertEqual(cache.evict(), 0)
+        sys.argv = [
+            sys.argv[0], "-d", self.tempdir, "--parse-cache-dir", adl_file, other]
+        cli.main()
+        self.assertTrue(os.path.exists(os.path.join(self.tempdir, "motorx-R6-10-1.ui")))
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        TestParseCache,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,101 @@
+
+"""
+simple unit tests for this package
+"""
+
+import contextlib
+import io
+import logging
+import os
+import pstats
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+# turn off logging output
+logging.basicConfig(level=logging.CRITICAL)
+
+_test_path = os.path.dirname(__file__)
+_path = os.path.join(_test_path, '..', 'src')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from adl2pydm import cli, profiler
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.medm_path = os.path.join(os.path.dirname(__file__), "medm")
+
+    def tearDown(self):
+        if os.path.exists(self.tempdir):
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_nested_phases(self):
+        profile = profiler.ConversionProfile()
+        profile.file("a.adl")
+        with profile.phase("build"):
+            time.sleep(0.02)
+            with profile.phase("calc"):
+                time.sleep(0.05)
+        timings = profile.files["a.adl"]
+        # build does not include calc
+        self.assertLess(timings["build"], timings["calc"])
+        self.assertAlmostEqual(
+            profile.fileTotal("a.adl"),
+            timings["build"] + timings["calc"])
+
+        with profile.widget("composite"):
+            with profile.widget("text"):
+                time.sleep(0.02)
+            with profile.widget("text"):
+                pass
+        self.assertEqual(profile.widgets["text"][0], 2)
+        self.assertEqual(profile.widgets["composite"][0], 1)
+        self.assertLess(
+            profile.widgets["composite"][1], profile.widgets["text"][1])
+
+    def test_process_file(self):
+        profile = profiler.ConversionProfile()
+        fname = os.path.join(self.medm_path, "xxx-R6-0.adl")
+        cli.processFile(fname, self.tempdir, profile=profile)
+        self.assertEqual(list(profile.files), [fname])
+        for phase in "parse stylesheet build calc write".split():
+            self.assertIn(phase, profile.files[fname])
+        self.assertIn("related display", profile.widgets)
+
+        report = profile.report()
+        self.assertIn("profile of 1 file(s)", report)
+        self.assertIn("related display", report)
+
+    def test_cli_profile(self):
+        stats_file = os.path.join(self.tempdir, "conversion.pstats")
+        fname = os.path.join(self.medm_path, "xxx-R6-0.adl")
+        sys.argv = [
+            sys.argv[0], "-d", self.tempdir,
+            "--profile-stats", stats_file, fname]
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            cli.main()
+        self.assertIn("widget type", out.getvalue())
+        self.assertTrue(os.path.exists(os.path.join(self.tempdir, "xxx-R6-0.ui")))
+        stats = pstats.Stats(stats_file)
+        self.assertGreater(stats.total_calls, 0)
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        TestProfiler,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,156 @@
+
+"""
+simple unit tests for this package
+"""
+
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+# turn off logging output
+logging.basicConfig(level=logging.CRITICAL)
+
+_test_path = os.path.dirname(__file__)
+_path = os.path.join(_test_path, '..', 'src')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from adl2pydm import pv_index
+
+
+class TestPvIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.medm_path = os.path.join(os.path.dirname(__file__), "medm")
+
+    def tearDown(self):
+        if os.path.exists(self.tempdir):
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def fields(self, fname):
+        adl_file = os.path.join(self.medm_path, fname)
+        _, records, err = pv_index.indexFile(adl_file)
+        self.assertIsNone(err)
+        fields = {}
+        for pv, f, line, widget, field in records:
+            self.assertEqual(f, adl_file)
+            fields.setdefault((field, pv), (line, widget))    # first one
+        return fields
+
+    def test_index_file(self):
+        fields = self.fields("xxx-R6-0.adl")
+        self.assertEqual(
+            fields[("control.chan", "xxx:allstop.VAL")],
+            (892, "message button"))
+        self.assertEqual(
+            fields[("dynamic attribute.chan", "xxx:alldone.VAL")],
+            (916, "text"))     # in a composite at line 907
+
+        fields = self.fields("scanDetPlot-R2-11-1.adl")
+        self.assertIn("cartesian plot", [w for _, w in fields.values()])
+        self.assertTrue(any(f.startswith("trace[0].") for f, _ in fields))
+
+        fields = self.fields("calc-R3-7-1-FuncGen_full.adl")
+        self.assertIn("pen[0].chan", [f for f, _ in fields])
+
+        # widgets inside composites are indexed too
+        fields = self.fields("hydraStats.adl")
+        self.assertEqual(
+            fields[("monitor.chan", "hydra.alive")], (113, "text update"))
+
+        _, records, err = pv_index.indexFile(
+            os.path.join(self.tempdir, "missing.adl"))
+        self.assertEqual(records, [])
+        self.assertIsNotNone(err)
+
+    def test_lines(self):
+        # the line of each record starts the block of its widget,
+        # also for widgets in composites (at any depth)
+        for fname in ("motorx_all-R6-10-1.adl", "mca-R7-7-mca.adl"):
+            adl_file = os.path.join(self.medm_path, fname)
+            with open(adl_file, "r") as fp:
+                lines = fp.readlines()
+            _, records, err = pv_index.indexFile(adl_file)
+            self.assertGreater(len(records), 0)
+            for pv, f, line, widget, field in records:
+                self.assertIn(
+                    lines[line-1].strip(),
+                    (f'"{widget}" {{', f"{widget} {{"),
+                    f"{fname}:{line} {pv}")
+
+        fields = self.fields("motorx_all-R6-10-1.adl")
+        self.assertEqual(
+            fields[("control.chan", "$(P)$(M).FLNK")], (2577, "text entry"))
+
+    def test_find_files(self):
+        subdir = os.path.join(self.tempdir, "a", "b")
+        os.makedirs(subdir)
+        for fname in ("xxx-R6-0.adl", "polyline.adl"):
+            shutil.copy(os.path.join(self.medm_path, fname), subdir)
+        shutil.copy(os.path.join(self.medm_path, "xxx-R6-0.adl"), self.tempdir)
+        with open(os.path.join(subdir, "notes.txt"), "w") as fp:
+            fp.write("not a screen")
+        found = list(pv_index.findAdlFiles([self.tempdir, "other.adl"]))
+        self.assertEqual(found, [
+            os.path.join(self.tempdir, "xxx-R6-0.adl"),
+            os.path.join(subdir, "polyline.adl"),
+            os.path.join(subdir, "xxx-R6-0.adl"),
+            "other.adl",
+        ])
+
+    def test_write_and_lookup(self):
+        adl_files = [
+            os.path.join(self.medm_path, fname)
+            for fname in ("xxx-R6-0.adl", "motorx-R6-10-1.adl", "missing.adl")
+        ]
+        pv = "xxx:allstop.VAL"
+        expected = [dict(
+            pv=pv, file=adl_files[0], line=892,
+            widget="message button", field="control.chan")]
+        for output in ("pvs.db", "pvs.jsonl"):
+            output = os.path.join(self.tempdir, output)
+            for jobs in (1, 2):
+                n_files, n_records, failures = pv_index.writeIndex(
+                    adl_files, output, jobs)
+                self.assertEqual(n_files, 3)
+                self.assertGreater(n_records, 0)
+                self.assertEqual(len(failures), 1)
+                # writing again does not duplicate any records
+                self.assertEqual(pv_index.lookup(output, pv), expected)
+            self.assertEqual(pv_index.lookup(output, "no such PV"), [])
+
+        with self.assertRaises(ValueError):
+            pv_index.lookup(os.path.join(self.tempdir, "none.db"), pv)
+
+    def test_options(self):
+        argv = sys.argv
+        try:
+            sys.argv = [argv[0], "--lookup", "xxx:allstop.VAL", "-o", "pvs.db"]
+            self.assertEqual(pv_index.get_user_parameters().output, "pvs.db")
+            for args in (["--lookup", "xxx:allstop.VAL"], [], ["-o", "pvs.db"]):
+                sys.argv = [argv[0]] + args
+                with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+                    pv_index.get_user_parameters()
+        finally:
+            sys.argv = argv
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        TestPvIndex,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
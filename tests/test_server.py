@@ -0,0 +1,188 @@
+
+"""
+simple unit tests for this package
+"""
+
+import io
+import json
+import logging
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+# turn off logging output
+logging.basicConfig(level=logging.CRITICAL)
+
+_test_path = os.path.dirname(__file__)
+_path = os.path.join(_test_path, '..', 'src')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from adl2pydm import cli, client, parse_cache, server
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.medm_path = os.path.join(os.path.dirname(__file__), "medm")
+        self.socket_path = os.path.join(self.tempdir, "adl2pydm.sock")
+        self.server = server.ConversionServer(self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        if not self.server.stopping:
+            with client.Client(self.socket_path) as c:
+                c.request("shutdown")
+        self.thread.join(10)
+        self.server.server_close()
+        if os.path.exists(self.tempdir):
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_convert(self):
+        fnames = ["xxx-R6-0.adl", "ADBase-R3-3-1.adl"]
+        expected = os.path.join(self.tempdir, "expected")
+        os.mkdir(expected)
+        for fname in fnames:
+            cli.processFile(os.path.join(self.medm_path, fname), expected)
+
+        adl_files = [os.path.join(self.medm_path, f) for f in fnames]
+        adl_files.append(os.path.join(self.tempdir, "no_such.adl"))
+        with client.Client(self.socket_path) as c:
+            results = c.convert(adl_files, self.tempdir)
+            status = c.request("status")
+        # the client sends absolute names
+        self.assertEqual(
+            [r["file"] for r in results], [os.path.abspath(f) for f in adl_files])
+        for result in results[:2]:
+            self.assertIsNone(result["error"])
+            with open(result["output"], "rb") as fp:
+                ui = fp.read()
+            name = os.path.join(expected, os.path.basename(result["output"]))
+            with open(name, "rb") as fp:
+                self.assertEqual(ui, fp.read())
+        self.assertIsNone(results[2]["output"])
+        self.assertIn("Could not find file", results[2]["error"])
+
+        self.assertEqual(status["pid"], os.getpid())
+        self.assertEqual(status["requests"], 2)
+        self.assertEqual(status["converted"], 2)
+        self.assertEqual(status["failed"], 1)
+
+    def test_incremental(self):
+        adl_file = os.path.join(self.medm_path, "xxx-R6-0.adl")
+        with client.Client(self.socket_path) as c:
+            first = c.convert([adl_file], self.tempdir, incremental=True)
+            ui_file = first[0]["output"]
+            modified = os.stat(ui_file).st_mtime_ns
+            second = c.convert([adl_file], self.tempdir, incremental=True)
+        self.assertEqual(second, first)
+        self.assertEqual(os.stat(ui_file).st_mtime_ns, modified)  # not written again
+
+    def test_idle_client(self):
+        self.server.client_timeout = 0.2
+        idle = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        idle.connect(self.socket_path)
+        try:
+            # sends nothing: the others are served after the timeout
+            with client.Client(self.socket_path, timeout=10) as c:
+                self.assertEqual(c.request("status")["status"], "ok")
+            self.assertEqual(idle.recv(1), b"")     # disconnected
+        finally:
+            idle.close()
+
+    def test_evict(self):
+        adl_files = [
+            os.path.join(self.medm_path, fname)
+            for fname in ("xxx-R6-0.adl", "ADBase-R3-3-1.adl")]
+        cache = parse_cache.ParseCache(os.path.join(self.tempdir, "cache"))
+        cache.parse(adl_files[0])
+        cache.max_bytes = cache.entries()[0][1]     # room for one
+        self.server.cache = cache
+        with client.Client(self.socket_path) as c:
+            for adl_file in adl_files:
+                c.convert([adl_file], self.tempdir)
+                self.assertEqual(len(cache.entries()), 1)
+
+    def test_bad_requests(self):
+        with client.Client(self.socket_path) as c:
+            response = c.request("no_such_command")
+            self.assertEqual(response["status"], "error")
+            self.assertIn("unknown command", response["error"])
+
+            response = c.request("convert", files=["relative.adl"])
+            self.assertEqual(response["status"], "error")
+            self.assertIn("must be absolute", response["error"])
+            response = c.request(
+                "convert", files=[os.path.abspath("a.adl")], output="relative/dir")
+            self.assertIn("must be absolute", response["error"])
+
+            # not JSON: the connection can still be used
+            c.fp.write(b"not json\n")
+            c.fp.flush()
+            self.assertEqual(json.loads(c.fp.readline())["status"], "error")
+            self.assertEqual(c.request("status")["status"], "ok")
+
+    def test_client_main(self):
+        adl_file = os.path.join(self.medm_path, "xxx-R6-0.adl")
+        args = ["--socket", self.socket_path, "-d", self.tempdir]
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            self.assertEqual(client.main(args + [adl_file]), 0)
+            self.assertEqual(client.main(args + ["no_such.adl"]), 1)
+            self.assertEqual(client.main(args + ["--stop"]), 0)
+        self.assertIn(os.path.abspath(adl_file) + " -> ", out.getvalue())
+        self.assertIn("error processing", err.getvalue())
+        self.thread.join(10)
+        self.assertFalse(self.thread.is_alive())
+        self.server.server_close()
+        self.assertFalse(os.path.exists(self.socket_path))
+
+        # the daemon stopped
+        with redirect_stderr(err):
+            self.assertEqual(client.main(args + [adl_file]), 2)
+        self.assertIn("not running", err.getvalue())
+
+    def test_socket_file(self):
+        # only one daemon per socket
+        with self.assertRaises(ValueError):
+            server.ConversionServer(self.socket_path)
+        mode = os.stat(self.socket_path).st_mode
+        self.assertEqual(mode & 0o077, 0)
+
+        # socket left by a daemon that stopped
+        stale = os.path.join(self.tempdir, "stale.sock")
+        other = server.ConversionServer(stale)
+        other.socket.close()
+        self.assertTrue(os.path.exists(stale))
+        server.ConversionServer(stale).server_close()
+        self.assertFalse(os.path.exists(stale))
+
+        # not a socket
+        not_socket = os.path.join(self.tempdir, "file")
+        with open(not_socket, "w") as fp:
+            fp.write("keep")
+        with self.assertRaises(ValueError):
+            server.ConversionServer(not_socket)
+        self.assertTrue(os.path.exists(not_socket))
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        TestServer,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
@@ -4,6 +4,7 @@ simple unit tests for this package
 """
 
 import os
+import subprocess
 import sys
 import unittest
 
@@ -26,11 +27,58 @@ class Test_Something(unittest.TestCase):
     def test_the_package_name(self):
         self.assertEqual(adl2pydm.__project__, u'adl2pydm')
 
+    def test_metadata(self):
+        from adl2pydm import _version
+        self.assertEqual(adl2pydm.__version__, _version.get_versions()['version'])
+        self.assertIsInstance(adl2pydm.__install_requires__, list)
+        with self.assertRaises(AttributeError):
+            adl2pydm.__no_such_attribute__
+
+
+class Test_Import(unittest.TestCase):
+    """importing adl2pydm must stay fast (it is done for each conversion)"""
+
+    def importTimes(self, statement):
+        """
+        run *statement* in a new Python, return its imported modules
+
+        as a dict of ``module: cumulative import time (s)``
+        """
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [os.path.abspath(_path), env.get("PYTHONPATH", "")])
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            env=env, capture_output=True, text=True, check=True)
+        times = {}
+        for line in result.stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                _self, cumulative, module = line[12:].split("|")
+                if cumulative.strip().isdigit():
+                    times[module.strip()] = int(cumulative) * 1e-6
+        return times
+
+    def test_package_import(self):
+        for statement in ("import adl2pydm", "from adl2pydm import adl_parser"):
+            times = self.importTimes(statement)
+            self.assertIn("adl2pydm", times, statement)
+            # versioneer (may run git) and the requirements are not learned
+            for module in ("adl2pydm._version", "adl2pydm._requirements", "subprocess"):
+                self.assertNotIn(module, times, statement)
+
+    def test_index_import(self):
+        # adl2pydm-index parses, it does not need the converter
+        times = self.importTimes("import adl2pydm.pv_index")
+        self.assertIn("adl2pydm.pv_index", times)
+        for module in ("adl2pydm.cli", "adl2pydm.output_handler", "adl2pydm._version"):
+            self.assertNotIn(module, times)
+
 
 def suite(*args, **kw):
     test_suite = unittest.TestSuite()
     test_list = [
         Test_Something,
+        Test_Import,
         ]
     for test_case in test_list:
         test_suite.addTest(unittest.makeSuite(test_case))
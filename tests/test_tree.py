@@ -0,0 +1,144 @@
+"""
+simple unit tests for this package
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# turn off logging output
+logging.basicConfig(level=logging.CRITICAL)
+
+_test_path = os.path.dirname(__file__)
+_path = os.path.join(_test_path, '..', 'src')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from adl2pydm import cli, tree
+
+
+class TestTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.top = os.path.join(self.tempdir, "top")
+        self.medm_path = os.path.join(os.path.dirname(__file__), "medm")
+
+        for relative_path, fname in (
+                ("xxx.adl", "xxx-R6-0.adl"),
+                ("b/motorx.adl", "motorx-R6-10-1.adl"),
+                ("a/xxx.adl", "xxx-R6-0.adl"),
+                ("a/deep/er/motorx.adl", "motorx-R6-10-1.adl"),
+                ("old/xxx.adl", "xxx-R6-0.adl"),
+                ("a/notes.txt", "xxx-R6-0.adl"),
+                ("a/xxx_old.adl", "xxx-R6-0.adl"),
+                ):
+            adl_file = os.path.join(self.top, *relative_path.split("/"))
+            os.makedirs(os.path.dirname(adl_file), exist_ok=True)
+            shutil.copy(os.path.join(self.medm_path, fname), adl_file)
+        os.symlink(os.path.join(self.top, "a"), os.path.join(self.top, "link"))
+
+    def tearDown(self):
+        if os.path.exists(self.tempdir):
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def relative(self, found):
+        return [
+            os.path.relpath(fname, self.top).replace(os.sep, "/")
+            for fname, _path in found]
+
+    def test_scan_tree(self):
+        found = list(tree.scanTree(self.top))
+        self.assertEqual(self.relative(found), [
+            "xxx.adl",
+            "a/xxx.adl",
+            "a/xxx_old.adl",
+            "a/deep/er/motorx.adl",
+            "b/motorx.adl",
+            "old/xxx.adl",
+        ])   # no notes.txt, symbolic link not followed
+        self.assertEqual(found[3][1], os.path.join("a", "deep", "er"))
+
+        found = tree.scanTree(self.top, exclude=["old", "*_old.adl", "a/deep/*"])
+        self.assertEqual(self.relative(found), [
+            "xxx.adl",
+            "a/xxx.adl",
+            "b/motorx.adl",
+        ])
+
+        found = tree.scanTree(self.top, include=["motor*", "a/*.txt"])
+        self.assertEqual(self.relative(found), [
+            "a/notes.txt",
+            "a/deep/er/motorx.adl",
+            "b/motorx.adl",
+        ])
+
+        self.assertEqual(list(tree.scanTree(os.path.join(self.tempdir, "none"))), [])
+
+    def test_tree_work(self):
+        out = os.path.join(self.tempdir, "out")
+        work = tree.treeWork(self.top, out, exclude=["old"])
+        adl_file, path = next(work)     # a stream
+        self.assertEqual(path, os.path.join(out, ""))
+        self.assertFalse(os.path.exists(os.path.join(out, "a")))
+        work = dict(work)
+        self.assertEqual(
+            work[os.path.join(self.top, "a", "deep", "er", "motorx.adl")],
+            os.path.join(out, "a", "deep", "er"))
+        self.assertTrue(os.path.isdir(os.path.join(out, "a", "deep", "er")))
+        self.assertFalse(os.path.exists(os.path.join(out, "old")))
+
+        for adl_file, path in tree.treeWork(self.top):
+            self.assertIsNone(path)
+
+    def converted(self, path):
+        found = []
+        for parent, dirs, files in os.walk(path):
+            for fname in files:
+                found.append(os.path.relpath(
+                    os.path.join(parent, fname), path).replace(os.sep, "/"))
+        return sorted(found)
+
+    def test_recursive(self):
+        expected = [
+            "a/deep/er/motorx.ui",
+            "a/xxx.ui",
+            "b/motorx.ui",
+            "extra.ui",
+            "xxx.ui",
+        ]
+        extra = os.path.join(self.tempdir, "extra.adl")
+        shutil.copy(os.path.join(self.medm_path, "xxx-R6-0.adl"), extra)
+        for args in ([], ["-j", "2"], ["--dedup"], ["--incremental"]):
+            out = os.path.join(self.tempdir, "out")
+            shutil.rmtree(out, ignore_errors=True)
+            os.mkdir(out)
+            sys.argv = [
+                sys.argv[0], "-d", out, "--recursive", self.top,
+                "--exclude", "old", "--exclude", "*_old.adl", extra] + args
+            cli.main()
+            found = [f for f in self.converted(out) if f.endswith(".ui")]
+            self.assertEqual(found, expected, args)
+
+        # without --dir: beside each .adl file
+        sys.argv = [sys.argv[0], "-r", os.path.join(self.top, "b")]
+        cli.main()
+        self.assertTrue(os.path.exists(os.path.join(self.top, "b", "motorx.ui")))
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        TestTree,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())
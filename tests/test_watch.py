@@ -0,0 +1,91 @@
+
+"""
+simple unit tests for this package
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# turn off logging output
+logging.basicConfig(level=logging.CRITICAL)
+
+_test_path = os.path.dirname(__file__)
+_path = os.path.join(_test_path, '..', 'src')
+if _path not in sys.path:
+    sys.path.insert(0, _path)
+
+from adl2pydm import cli, watch
+
+
+class TestWatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.medm_path = os.path.join(os.path.dirname(__file__), "medm")
+
+    def tearDown(self):
+        if os.path.exists(self.tempdir):
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def copyAdlFile(self, fname):
+        target = os.path.join(self.tempdir, fname)
+        shutil.copy(os.path.join(self.medm_path, fname), target)
+        return target
+
+    def test_poll(self):
+        adl_1 = self.copyAdlFile("xxx-R6-0.adl")
+        missing = os.path.join(self.tempdir, "missing.adl")
+        watcher = watch.AdlFileWatcher([self.tempdir, missing])
+
+        # first poll finds all files
+        self.assertEqual(watcher.poll(), [adl_1])
+        self.assertEqual(watcher.poll(), [])
+
+        adl_2 = self.copyAdlFile("slider.adl")
+        with open(os.path.join(self.tempdir, "README.txt"), "w") as fp:
+            fp.write("not an .adl file")
+        self.assertEqual(watcher.poll(), [adl_2])
+
+        with open(adl_1, "a") as fp:
+            fp.write("\n")
+        self.assertEqual(watcher.poll(), [adl_1])
+
+        shutil.copy(adl_2, missing)
+        self.assertEqual(watcher.poll(), [missing])
+
+        os.remove(adl_2)
+        self.assertEqual(watcher.poll(), [])
+
+    def test_watch(self):
+        adl_file = self.copyAdlFile("xxx-R6-0.adl")
+        changes = []
+        watch.watch([self.tempdir], changes.append, interval=0.01, polls=3)
+        self.assertEqual(changes, [adl_file])
+
+    def test_cli_watch(self):
+        adl_file = self.copyAdlFile("xxx-R6-0.adl")
+        sys.argv = [sys.argv[0], "--watch", adl_file]
+        options = cli.get_user_parameters()
+        cli.configure_logging(options)
+        self.assertTrue(options.watch)
+        cli.watchFiles(options, polls=1)
+        self.assertTrue(os.path.exists(os.path.join(self.tempdir, "xxx-R6-0.ui")))
+
+
+def suite(*args, **kw):
+    test_suite = unittest.TestSuite()
+    test_list = [
+        TestWatch,
+        ]
+    for test_case in test_list:
+        test_suite.addTest(unittest.makeSuite(test_case))
+    return test_suite
+
+
+if __name__ == "__main__":
+    runner=unittest.TextTestRunner()
+    runner.run(suite())